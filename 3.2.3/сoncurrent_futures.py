@@ -1,49 +1,15 @@
 import cProfile
 import concurrent.futures
 import csv
+import itertools
 import os
+import sys
 
-currency_to_rub = {
-    "AZN": 35.68,
-    "BYR": 23.91,
-    "EUR": 59.90,
-    "GEL": 21.74,
-    "KGS": 0.76,
-    "KZT": 0.13,
-    "RUR": 1,
-    "UAH": 1.64,
-    "USD": 60.66,
-    "UZS": 0.0055,
-}
-
-
-def csv_divider(file_name):
-    """Разделяет csv-файл на отдельные файлы по годам.
-
-        Args:
-           file_name (str): Название csv-файла
-    """
-    with open(file_name, newline='', encoding='utf-8-sig') as file:
-        header = file.readline()
-        rows = []
-        year = 0
-        for row in file:
-            current_year = int(row.split(',')[-1].split('-')[0])
-            if year == 0:
-                year = current_year
-                rows.append(row)
-            elif current_year == year:
-                rows.append(row)
-            else:
-                with open('./csv/' + str(year) + '.csv', 'w', newline='', encoding='utf-8-sig') as out:
-                    out.write(header)
-                    out.writelines(rows)
-                year = current_year
-                rows = []
-        if len(rows) > 0:
-            with open('./csv/' + str(year) + '.csv', 'w', newline='', encoding='utf-8-sig') as out:
-                out.write(header)
-                out.writelines(rows)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from divider import csv_divider, get_chunks, read_chunk, read_manifest
+from rates import RateTable
+from sketch import QuantileSketch
 
 
 def read_csv(file_name):
@@ -66,61 +32,150 @@ def read_csv(file_name):
 
 
 def get_year_stats(file_name, p_name):
-    """Читает csv файл и формирует все (4) статистки за год.
+    """Читает csv-файл из папки csv_divider и формирует частичную статистику по нему (см. get_chunk_stats).
+    Год берется из даты публикации каждой вакансии, поэтому файл может содержать любую часть вакансий:
+    один год, один месяц или один город.
 
     Args:
         file_name(str): Название файла
         p_name(str): Название профессии
 
     Returns:
-        list: Список, содержащий год и всю статистку по нему
+        list[dict]: Частичная статистика файла в формате get_chunk_stats
     """
-    year = int(file_name[4:8])
-    salary_by_year = 0
-    vacancies_by_year = 0
-    p_name_salary_by_year = 0
-    p_name_vacancies_by_year = 0
-    data_vacancies = read_csv(file_name)
+    head, chunks = get_chunks(file_name, 1)
+    start, end = chunks[0] if chunks else (0, 0)
+    return get_chunk_stats(file_name, start, end, head, p_name)
 
-    for vac in data_vacancies:
-        salary = (float(vac['salary_from']) + float(vac['salary_to'])) / 2 * currency_to_rub[vac['salary_currency']]
-        salary_by_year += salary
-        vacancies_by_year += 1
-        if p_name in vac['name']:
-            p_name_salary_by_year += salary
-            p_name_vacancies_by_year += 1
 
-    salary_by_year = int(salary_by_year / vacancies_by_year)
-    p_name_salary_by_year = int(p_name_salary_by_year / p_name_vacancies_by_year)
+def get_multi_stats(p_name, directory='csv'):
+    """Считает статистику по всем годам по файлам из папки csv_divider в пуле процессов. Файлы берутся
+    из манифеста, самые большие отправляются в пул первыми. Частичная статистика файлов складывается по годам
+    в порядке манифеста, поэтому результат не зависит от того, какой процесс закончил раньше.
 
-    return [year, salary_by_year, vacancies_by_year, p_name_salary_by_year, p_name_vacancies_by_year]
+    Args:
+        p_name(str): Название профессии
+        directory(str): Папка с разделенными файлами
 
+    Returns:
+        list: Список, содержащий статистку по всем годам и квантили зарплат (p25, p50, p90) по годам
+    """
+    partitions = read_manifest(directory)['partitions']
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max(1, min(len(partitions), os.cpu_count()))) \
+            as executor:
+        year_stats, cities_stats = merge_chunk_stats(executor.map(
+            get_year_stats, [partition['file'] for partition in partitions], itertools.repeat(p_name)))
+    return year_stats
 
-def get_multi_stats(p_name):
-    """Создает отдельные процессы для каждого csv-файла и возвращает статистику по всем годам.
+
+def get_chunk_stats(file_name, start, end, head, p_name):
+    """Читает диапазон байт исходного csv-файла и формирует частичную статистику по годам и городам.
 
     Args:
+        file_name(str): Название файла
+        start(int): Начало диапазона
+        end(int): Конец диапазона
+        head(list[str]): Заголовок csv-файла
         p_name(str): Название профессии
 
     Returns:
-        list: Список, содержащий статистку по всем годам
+        list[dict]: Суммы зарплат и количества вакансий по годам, по годам для профессии и по городам,
+            а затем скетчи распределения зарплат по годам, по годам для профессии и по городам
     """
-    csv_directory = os.listdir("csv")
-    files_count = len([f for f in csv_directory])
-    with concurrent.futures.ProcessPoolExecutor(max_workers=files_count) as executor:
-        futures = [executor.submit(get_year_stats, os.path.join("csv", file_name), p_name) for file_name in csv_directory]
-    output = [future.result() for future in concurrent.futures.as_completed(futures)]
-
-    result = [{} for i in range(4)]
-    for year_data in output:
-        for i in range(4):
-            result[i][year_data[0]] = year_data[i + 1]
-
-    for i in range(len(result)):
-        result[i] = dict(sorted(result[i].items(), key=lambda x: x[0]))
+    result = [{} for i in range(9)]
+    salary_by_year, vacancies_by_year, p_name_salary_by_year, p_name_vacancies_by_year, salary_by_city, \
+        vacancies_by_city, salary_sketch_by_year, p_name_salary_sketch_by_year, salary_sketch_by_city = result
+    for row in read_chunk(file_name, start, end):
+        if len(row) != len(head) or '' in row:
+            continue
+        vac = dict(zip(head, row))
+        salary = (float(vac['salary_from']) + float(vac['salary_to'])) / 2 * \
+            RateTable.get_default().get_rate(vac['salary_currency'], vac['published_at'])
+        year = int(vac['published_at'].split('-')[0])
+        city = vac['area_name']
+        salary_by_year[year] = salary_by_year.get(year, 0) + salary
+        vacancies_by_year[year] = vacancies_by_year.get(year, 0) + 1
+        salary_sketch_by_year.setdefault(year, QuantileSketch()).add(salary)
+        if p_name in vac['name']:
+            p_name_salary_by_year[year] = p_name_salary_by_year.get(year, 0) + salary
+            p_name_vacancies_by_year[year] = p_name_vacancies_by_year.get(year, 0) + 1
+            p_name_salary_sketch_by_year.setdefault(year, QuantileSketch()).add(salary)
+        salary_by_city[city] = salary_by_city.get(city, 0) + salary
+        vacancies_by_city[city] = vacancies_by_city.get(city, 0) + 1
+        salary_sketch_by_city.setdefault(city, QuantileSketch()).add(salary)
     return result
 
 
+def merge_chunk_stats(partial_stats):
+    """Объединяет частичную статистику диапазонов и форматирует ее так же, как get_multi_stats и get_cities_stats.
+
+    Args:
+        partial_stats(Iterable[list[dict]]): Частичная статистика диапазонов (в порядке их следования в файле)
+            или файлов csv_divider (в порядке манифеста)
+
+    Returns:
+        tuple[list, list]: Статистика по годам и статистика по городам, дополненные квантилями зарплат
+    """
+    total = [{} for i in range(9)]
+    for stats in partial_stats:
+        for target, source in zip(total[:6], stats):
+            for key, value in source.items():
+                target[key] = target.get(key, 0) + value
+        for target, source in zip(total[6:], stats[6:]):
+            for key, sketch in source.items():
+                target.setdefault(key, QuantileSketch()).merge(sketch)
+    salary_by_year, vacancies_by_year, p_name_salary_by_year, p_name_vacancies_by_year, salary_by_city, \
+        vacancies_by_city, salary_sketch_by_year, p_name_salary_sketch_by_year, salary_sketch_by_city = total
+
+    years = sorted(vacancies_by_year)
+    year_stats = [
+        {year: int(salary_by_year[year] / vacancies_by_year[year]) for year in years},
+        {year: vacancies_by_year[year] for year in years},
+        {year: int(p_name_salary_by_year[year] / p_name_vacancies_by_year[year])
+         if year in p_name_vacancies_by_year else 0 for year in years},
+        {year: p_name_vacancies_by_year.get(year, 0) for year in years},
+        {year: get_quantiles(salary_sketch_by_year[year]) for year in years},
+        {year: get_quantiles(p_name_salary_sketch_by_year[year])
+         if year in p_name_salary_sketch_by_year else (0, 0, 0) for year in years},
+    ]
+    cities_stats = format_cities_stats(salary_by_city, vacancies_by_city)
+    cities_stats.append({city: get_quantiles(salary_sketch_by_city[city]) for city in cities_stats[0]})
+    return year_stats, cities_stats
+
+
+def get_quantiles(sketch):
+    """Оценивает квантили зарплат p25, p50 и p90 по скетчу.
+
+    Args:
+        sketch(QuantileSketch): Скетч распределения зарплат
+
+    Returns:
+        tuple[int]: Квантили, округленные вниз до целого
+    """
+    return tuple(int(value) for value in sketch.get_quantiles())
+
+
+def get_chunked_stats(file_name, p_name, processes_count=None):
+    """Делит исходный csv-файл на диапазоны байт и считает статистику по ним в отдельных процессах,
+    без предварительного разделения файла по годам. Каждый процесс возвращает частичные суммы, которые затем
+    объединяются, поэтому нагрузка не зависит от распределения вакансий по годам.
+
+    Args:
+        file_name(str): Название файла
+        p_name(str): Название профессии
+        processes_count(int or None): Количество процессов (по умолчанию - количество ядер)
+
+    Returns:
+        tuple[list, list]: Статистика по годам и статистика по городам
+    """
+    processes_count = processes_count or os.cpu_count()
+    head, chunks = get_chunks(file_name, processes_count * 4)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes_count) as executor:
+        partial_stats = executor.map(get_chunk_stats, *zip(*[(file_name, start, end, head, p_name)
+                                                             for start, end in chunks]))
+        return merge_chunk_stats(partial_stats)
+
+
 def get_cities_stats(file_name):
     """Получает статистику по городам, не используя многопроцессорную обработку.
 
@@ -136,7 +191,8 @@ def get_cities_stats(file_name):
 
     for vac in data_vacancies:
         current_city = vac['area_name']
-        salary = (float(vac['salary_from']) + float(vac['salary_to'])) / 2 * currency_to_rub[vac['salary_currency']]
+        salary = (float(vac['salary_from']) + float(vac['salary_to'])) / 2 * \
+            RateTable.get_default().get_rate(vac['salary_currency'], vac['published_at'])
 
         if current_city in salary_by_city:
             salary_by_city[current_city] += salary
@@ -148,6 +204,19 @@ def get_cities_stats(file_name):
         else:
             vacancies_by_city[current_city] = 1
 
+    return format_cities_stats(salary_by_city, vacancies_by_city)
+
+
+def format_cities_stats(salary_by_city, vacancies_by_city):
+    """Вычисляет средние зарплаты и доли вакансий по городам, оставляя первые 10 городов с долей больше 1%.
+
+    Args:
+        salary_by_city(dict[str, float]): Суммы зарплат по городам
+        vacancies_by_city(dict[str, int]): Количества вакансий по городам
+
+    Returns:
+        list: Список, содержащий статистку по городам
+    """
     salary_by_city = {city: salary_by_city[city] / vacancies_by_city[city] for city in
                       salary_by_city}
 
@@ -172,12 +241,13 @@ def get_cities_stats(file_name):
 if __name__ == "__main__":
     file = input('Введите название файла: ')
     name = input('Введите название профессии: ')
-    csv_divider(file)
-    year_stats = get_multi_stats(name)
-    cities_stats = get_cities_stats(file)
+    year_stats, cities_stats = get_chunked_stats(file, name)
     print(f"Динамика уровня зарплат по годам: {year_stats[0]}")
     print(f"Динамика количества вакансий по годам: {year_stats[1]}")
     print(f"Динамика уровня зарплат по годам для выбранной профессии: {year_stats[2]}")
     print(f"Динамика количества вакансий по годам для выбранной профессии: {year_stats[3]}")
     print(f"Уровень зарплат по городам (в порядке убывания): {cities_stats[0]}")
     print(f"Доля вакансий по городам (в порядке убывания): {cities_stats[1]}")
+    print(f"Квантили уровня зарплат по годам (p25, p50, p90): {year_stats[4]}")
+    print(f"Квантили уровня зарплат по годам для выбранной профессии (p25, p50, p90): {year_stats[5]}")
+    print(f"Квантили уровня зарплат по городам (p25, p50, p90): {cities_stats[2]}")
@@ -1,35 +1,203 @@
+import datetime
+import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CBR_URL = "https://www.cbr.ru/scripts/XML_daily.asp"
+
+
+class RateFetcher:
+    """Класс для загрузки курсов валют ЦБ РФ по месяцам. Месяцы загружаются параллельно через общую сессию
+    (соединения переиспользуются, неудачные запросы повторяются), ответы сохраняются на диск, поэтому при
+    повторном запуске загружаются только недостающие месяцы. Месяцы, у которых 15 число еще не прошло,
+    не сохраняются: курс на эту дату еще может измениться.
+
+    Attributes:
+        base_url (str): Адрес XML_daily.asp (для проверки можно указать локальный сервер)
+        cache_dir (str or None): Папка для ответов (None - без кеша)
+        workers (int): Количество одновременных запросов
+        timeout (float): Время ожидания ответа в секундах
+        session (requests.Session): Сессия с пулом соединений
+    """
+    def __init__(self, base_url=CBR_URL, cache_dir="cbr_cache", workers=8, retries=3, timeout=10):
+        """Инициализирует объект RateFetcher.
+
+        Args:
+            base_url (str): Адрес XML_daily.asp
+            cache_dir (str or None): Папка для ответов (None - без кеша)
+            workers (int): Количество одновременных запросов
+            retries (int): Количество повторов неудачного запроса
+            timeout (float): Время ожидания ответа в секундах
+        """
+        self.base_url = base_url
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get_cache_path(self, date):
+        """Возвращает путь к сохраненному ответу за месяц.
+
+        Args:
+            date (str): Месяц в формате ММ/ГГГГ
+
+        Returns:
+            str: Путь к файлу
+
+        >>> RateFetcher(cache_dir="cache").get_cache_path("01/2003").replace(os.sep, "/")
+        'cache/2003_01.xml'
+        """
+        month, year = date.split("/")
+        return os.path.join(self.cache_dir, f"{year}_{month}.xml")
+
+    def download(self, date):
+        """Загружает курсы на 15 число месяца.
+
+        Args:
+            date (str): Месяц в формате ММ/ГГГГ
+
+        Returns:
+            bytes: Ответ ЦБ РФ (XML)
+        """
+        response = self.session.get(f"{self.base_url}?date_req=15/{date}", timeout=self.timeout)
+        response.raise_for_status()
+        return response.content
+
+    @staticmethod
+    def is_final(date, today=None):
+        """Проверяет, что курс за месяц окончательный: 15 число месяца уже прошло.
+
+        Args:
+            date (str): Месяц в формате ММ/ГГГГ
+            today (datetime.date or None): Текущая дата (None - сегодня)
+
+        Returns:
+            bool: Ответ за месяц можно сохранить
+
+        >>> RateFetcher.is_final("05/2022", datetime.date(2022, 5, 16))
+        True
+        >>> RateFetcher.is_final("05/2022", datetime.date(2022, 5, 15))
+        False
+        """
+        month, year = date.split("/")
+        return datetime.date(int(year), int(month), 15) < (today or datetime.date.today())
+
+    @staticmethod
+    def parse(content):
+        """Разбирает ответ ЦБ РФ: курс валюты - стоимость одной единицы в рублях. Если код валюты встречается
+        несколько раз, берется первый.
+
+        Args:
+            content (bytes): Ответ ЦБ РФ (XML)
+
+        Returns:
+            dict[str, float]: Курсы по кодам валют (в порядке ответа)
+
+        >>> RateFetcher.parse('<ValCurs><Valute><CharCode>KZT</CharCode><Nominal>100</Nominal><Value>20,4519</Value></Valute></ValCurs>'.encode())
+        {'KZT': 0.20451899999999998}
+        """
+        rates = {}
+        for valute in ET.fromstring(content).iter("Valute"):
+            value = float(valute.findtext("Value").replace(",", ".")) / float(valute.findtext("Nominal"))
+            rates.setdefault(valute.findtext("CharCode"), value)
+        return rates
+
+    def get_month_rates(self, date):
+        """Возвращает курсы за месяц: из сохраненного ответа или загружает и сохраняет ответ. Ответ сохраняется
+        только после успешного разбора, поэтому испорченный ответ будет загружен заново. Ответы за месяцы, курс
+        которых еще не окончательный (см. is_final), всегда загружаются заново и не сохраняются.
+
+        Args:
+            date (str): Месяц в формате ММ/ГГГГ
+
+        Returns:
+            dict[str, float]: Курсы по кодам валют
+        """
+        path = None if self.cache_dir is None or not self.is_final(date) else self.get_cache_path(date)
+        if path is not None and os.path.exists(path):
+            with open(path, "rb") as file:
+                return self.parse(file.read())
+        content = self.download(date)
+        rates = self.parse(content)
+        if path is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(f"{path}.{os.getpid()}.tmp", "wb") as file:
+                file.write(content)
+            os.replace(f"{path}.{os.getpid()}.tmp", path)
+        return rates
+
+    def get_rates(self, dates):
+        """Возвращает курсы за несколько месяцев, загружая их параллельно.
+
+        Args:
+            dates (list[str]): Месяцы в формате ММ/ГГГГ
+
+        Returns:
+            list[dict[str, float]]: Курсы по кодам валют для каждого месяца (в порядке dates)
+        """
+        with ThreadPoolExecutor(self.workers) as executor:
+            return list(executor.map(self.get_month_rates, dates))
+
+
+def get_dates(first_date, last_date):
+    """Возвращает все месяцы между двумя датами включительно.
+
+    Args:
+        first_date (list[str]): Первая дата [год, месяц]
+        last_date (list[str]): Последняя дата [год, месяц]
+
+    Returns:
+        list[str]: Месяцы в формате ММ/ГГГГ
+
+    >>> get_dates(['2003', '11'], ['2004', '02'])
+    ['11/2003', '12/2003', '01/2004', '02/2004']
+    """
+    dates = []
+    for year in range(int(first_date[0]), int(last_date[0]) + 1):
+        for month in range(int(first_date[1]) if year == int(first_date[0]) else 1, int(last_date[1]) + 1 if year == int(last_date[0]) else 13):
+            dates.append(f"{f'0{month}' if month in range(1, 10) else month}/{year}")
+    return dates
+
+
+def main(fetcher=None):
+    """Составляет таблицу курсов currencies.csv для валют, которые встречаются в вакансиях больше 5000 раз.
+    Если валюты нет в ответе за месяц, остается курс предыдущего месяца.
+
+    Args:
+        fetcher (RateFetcher or None): Загрузчик курсов (по умолчанию - с сайта ЦБ РФ)
+    """
+    df = pd.read_csv("vacancies_dif_currencies.csv")
+    published_at_df = df["published_at"]
+    first_date = published_at_df.min()[0:7].split('-')
+    last_date = published_at_df.max()[0:7].split('-')
+
+    currencies = df.groupby("salary_currency").size()
+    currencies = {cur: 0 for cur in currencies.index if currencies[cur] > 5000 and cur != 'RUR'}
+    result = pd.DataFrame(columns=["date"] + list(currencies.keys()))
+
+    cur_codes = list(currencies.keys())
+    if 'BYR' in cur_codes:
+        cur_codes.append('BYN')
+
+    dates = get_dates(first_date, last_date)
+    fetcher = fetcher or RateFetcher()
+    for i, (date, rates) in enumerate(zip(dates, fetcher.get_rates(dates))):
+        for cur, value in rates.items():
+            if cur in cur_codes:
+                currencies['BYR' if cur == 'BYN' else cur] = value
+        result.loc[i] = [date] + [currencies[cur] for cur in currencies]
+
+    result.to_csv("currencies.csv", index=False)
+
 
-df = pd.read_csv("vacancies_dif_currencies.csv")
-published_at_df = df["published_at"]
-first_date = published_at_df.min()[0:7].split('-')
-last_date = published_at_df.max()[0:7].split('-')
-
-currencies = df.groupby("salary_currency").size()
-currencies = {cur: 0 for cur in currencies.index if currencies[cur] > 5000 and cur != 'RUR'}
-result = pd.DataFrame(columns=["date"] + list(currencies.keys()))
-
-cur_codes = list(currencies.keys())
-if 'BYR' in cur_codes:
-    cur_codes.append('BYN')
-
-dates = []
-for year in range(int(first_date[0]), int(last_date[0]) + 1):
-    for month in range(int(first_date[1]) if year == int(first_date[0]) else 1, int(last_date[1]) + 1 if year == int(last_date[0]) else 13):
-        dates.append(f"{f'0{month}' if month in range(1, 10) else month}/{year}")
-
-
-for i in range(len(dates)):
-    date = dates[i]
-    url = f"https://www.cbr.ru/scripts/XML_daily.asp?date_req=15/{date}"
-    response = requests.get(url)
-    current_df = pd.read_xml(response.text)
-    filtered_df = current_df.loc[current_df['CharCode'].isin(cur_codes)]
-    for cur in filtered_df['CharCode']:
-        currency = 'BYR' if cur == 'BYN' else cur
-        currencies[currency] = float(filtered_df[filtered_df['CharCode'] == cur]['Value'].values[0].replace(',', '.')) / float(
-            filtered_df[filtered_df['CharCode'] == cur]['Nominal'].values[0])
-    result.loc[i] = [date] + [currencies[cur] for cur in currencies]
-
-result.to_csv("currencies.csv", index=False)
+if __name__ == '__main__':
+    main()
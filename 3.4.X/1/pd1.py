@@ -1,33 +1,44 @@
 import pandas as pd
 
 
-def format_salary(date, salary_from, salary_to, currency):
-    """Считает зарплату вакансии в рублях, если известна хотя бы одна граница вилки оклада.
+def get_exchange_rates(published_at, currency):
+    """Находит курсы валют вакансий за месяц публикации одним соединением с таблицей курсов.
 
         Args:
-            date(list[str]): Дата [год, месяц]
-            salary_from(float): Нижняя граница вилки оклада
-            salary_to(float): Верхняя граница вилки оклада
-            currency(str): Валюта
+            published_at(pd.Series): Даты публикации вакансий
+            currency(pd.Series): Валюты вакансий
         Returns:
-            float: Средний оклад
+            pd.Series: Курсы валют (1 - для рублей, 0 - для валют, которых нет в таблице курсов)
     """
-    exchange_rate = 1 if currency == 'RUR' else 0
-    if currency in currencies:
-        date = f"{date[1]}/{date[0]}"
-        exchange_rate = currency_dates.loc[currency_dates["date"] == date][currency].values[0]
-    if pd.notna(salary_from) and pd.notna(salary_to):
-        return 0.5 * (salary_from + salary_to) * exchange_rate
-    return salary_from * exchange_rate if pd.notna(salary_from) else salary_to * exchange_rate
+    dates = published_at.str[5:7] + "/" + published_at.str[0:4]
+    keys = pd.DataFrame({"date": dates.to_numpy(), "salary_currency": currency.to_numpy()})
+    exchange_rate = keys.merge(rates, how="left", on=["date", "salary_currency"])["exchange_rate"].to_numpy()
+    default_rate = (currency == "RUR").astype(float).to_numpy()
+    return pd.Series(exchange_rate, index=currency.index).where(currency.isin(currencies), default_rate)
+
+
+def format_salary(salary_from, salary_to, exchange_rate):
+    """Считает зарплаты вакансий в рублях, если известна хотя бы одна граница вилки оклада.
+
+        Args:
+            salary_from(pd.Series): Нижние границы вилки оклада
+            salary_to(pd.Series): Верхние границы вилки оклада
+            exchange_rate(pd.Series): Курсы валют
+        Returns:
+            pd.Series: Средние оклады
+    """
+    salary = (0.5 * (salary_from + salary_to)).where(salary_from.notna() & salary_to.notna(),
+                                                     salary_from.where(salary_from.notna(), salary_to))
+    return salary * exchange_rate
 
 
 df = pd.read_csv("vacancies_dif_currencies.csv")
 currency_dates = pd.read_csv("currencies.csv")
 currencies = list(currency_dates.columns)[1:len(list(currency_dates.columns))]
-salary = []
-for index, row in df.iterrows():
-    salary.append(format_salary(row["published_at"][0:7].split("-"), row["salary_from"],
-                                row["salary_to"], row["salary_currency"]))
+rates = currency_dates.melt(id_vars="date", var_name="salary_currency", value_name="exchange_rate")
+rates = rates.drop_duplicates(subset=["date", "salary_currency"])
+exchange_rate = get_exchange_rates(df["published_at"], df["salary_currency"])
+salary = format_salary(df["salary_from"], df["salary_to"], exchange_rate)
 
 df.insert(1, 'salary', salary)
 df = df.drop(columns=['salary_from', 'salary_to', 'salary_currency'])
@@ -4,36 +4,57 @@ import pandas as pd
 con = sqlite3.connect('vacancies.db')
 cur = con.execute('SELECT * FROM currencies')
 currencies = list(map(lambda x: x[0], cur.description))[1:]
-con.row_factory = sqlite3.Row
-cur = con.cursor()
+cur.close()
+con.execute('CREATE INDEX IF NOT EXISTS currencies_date ON currencies (date)')
 
-def format_salary(date, salary_from, salary_to, currency):
-    """Считает среднюю зарплату вакансии в рублях, если известна хотя бы одна граница вилки оклада.
+
+def get_exchange_rate_sql():
+    """Формирует SQL-выражение курса валюты вакансии v по строке таблицы курсов c за месяц публикации.
+
+        Returns:
+            str: Выражение курса (1 - для рублей, 0 - для валют, которых нет в таблице курсов)
+    """
+    cases = ' '.join(f"WHEN '{currency}' THEN c.\"{currency}\"" for currency in currencies)
+    return f"CASE v.salary_currency {cases} WHEN 'RUR' THEN 1 ELSE 0 END"
+
+
+def get_salary_sql(exchange_rate):
+    """Формирует SQL-выражение средней зарплаты вакансии v в рублях, если известна хотя бы одна граница вилки оклада.
 
         Args:
-            date(list[str]): Дата [год, месяц]
-            salary_from(float): Нижняя граница вилки оклада
-            salary_to(float): Верхняя граница вилки оклада
-            currency(str): Валюта
+            exchange_rate(str): Выражение курса валюты
         Returns:
-            float: Средний оклад
+            str: Выражение среднего оклада
+    """
+    return (f"CASE WHEN v.salary_from IS NOT NULL AND v.salary_to IS NOT NULL "
+            f"THEN 0.5 * (v.salary_from + v.salary_to) * {exchange_rate} "
+            f"WHEN v.salary_from IS NOT NULL THEN v.salary_from * {exchange_rate} "
+            f"ELSE v.salary_to * {exchange_rate} END")
+
+
+def format_salaries(columns):
+    """Переносит вакансии из временной таблицы vacancies_raw в таблицу vacancies, заменяя вилку оклада и валюту
+    средней зарплатой в рублях. Курсы берутся одним соединением с таблицей currencies по месяцу публикации
+    (ключ "ММ/ГГГГ", как в таблице курсов).
+
+        Args:
+            columns(list[str]): Столбцы таблицы vacancies (зарплата - столбец salary)
     """
-    exchange_rate = 1 if currency == 'RUR' else 0
-    if currency in currencies:
-        date = f"{date[1]}/{date[0]}"
-        cur.execute("SELECT * FROM currencies WHERE date == :date", {"date": date})
-        exchange_rate = cur.fetchall()[0][currency]
-    if pd.notna(salary_from) and pd.notna(salary_to):
-        return 0.5 * (salary_from + salary_to) * exchange_rate
-    return salary_from * exchange_rate if pd.notna(salary_from) else salary_to * exchange_rate
+    month = "substr(v.published_at, 6, 2) || '/' || substr(v.published_at, 1, 4)"
+    values = ', '.join(get_salary_sql(get_exchange_rate_sql()) if column == 'salary' else f'v."{column}"'
+                       for column in columns)
+    names = ', '.join(f'"{column}"' for column in columns)
+    con.execute(f"INSERT INTO vacancies ({names}) SELECT {values} FROM vacancies_raw v "
+                f"LEFT JOIN currencies c ON c.rowid = "
+                f"(SELECT rowid FROM currencies WHERE date = {month} ORDER BY rowid LIMIT 1) "
+                f"ORDER BY v.rowid")
 
 
 df = pd.read_csv("vacancies_dif_currencies.csv")
-salary = []
-for index, row in df.iterrows():
-    salary.append(format_salary(row["published_at"][0:7].split("-"), row["salary_from"],
-                                row["salary_to"], row["salary_currency"]))
-
-df.insert(1, 'salary', salary)
-df = df.drop(columns=['salary_from', 'salary_to', 'salary_currency'])
-df.to_sql("vacancies", con=con, index=False)
+df.to_sql("vacancies_raw", con=con, index=False, if_exists='replace')
+result = df.drop(columns=['salary_from', 'salary_to', 'salary_currency']).head(0)
+result.insert(1, 'salary', pd.Series(dtype=float))
+result.to_sql("vacancies", con=con, index=False)
+format_salaries(list(result.columns))
+con.execute('DROP TABLE vacancies_raw')
+con.commit()
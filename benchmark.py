@@ -0,0 +1,368 @@
+import argparse
+import contextlib
+import csv
+import importlib.util
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import statistics
+import vacancies
+from column_cache import ColumnCache
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+schemas = {
+    'statistics': ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at'],
+    'vacancies': ['name', 'description', 'key_skills', 'experience_id', 'premium', 'employer_name', 'salary_from',
+                  'salary_to', 'salary_gross', 'salary_currency', 'area_name', 'published_at'],
+}
+
+names = ['Программист', 'Web-программист', 'Аналитик', 'Системный аналитик', 'Аналитик данных', 'Тестировщик',
+         'Менеджер проектов', 'Frontend-разработчик', 'Backend-разработчик', 'Инженер-программист 1С']
+areas = ['Москва', 'Санкт-Петербург', 'Екатеринбург', 'Новосибирск', 'Казань', 'Нижний Новгород', 'Краснодар',
+         'Самара', 'Уфа', 'Пермь'] + [f'Город {i}' for i in range(1, 191)]
+currencies = ['RUR'] * 12 + ['USD', 'USD', 'EUR', 'KZT', 'BYR', 'UAH', 'UZS', 'AZN', 'GEL', 'KGS']
+employers = ['СКБ Контур', 'Яндекс', 'Сбер', 'Тинькофф', 'Ozon', 'УрФУ', 'Naumen', 'Точка', 'Альфа-Банк', 'МТС']
+skills = ['Python', 'SQL', 'Git', 'Linux', 'Docker', 'Java', 'C#', '1С', 'JavaScript', 'TypeScript', 'React',
+          'HTML', 'CSS', 'PostgreSQL', 'Английский язык', 'Разработка ПО', 'Аналитическое мышление', 'Excel']
+experiences = ['noExperience', 'between1And3', 'between3And6', 'moreThan6']
+description_parts = ['<p><strong>Обязанности:</strong></p>', '<ul> <li>разработка новых сервисов</li>',
+                     '<li>поддержка существующего кода</li> </ul>', '<p><strong>Требования:</strong></p>',
+                     '<p>опыт коммерческой разработки от года;</p>', '<p>знание SQL и Git</p>',
+                     '<p><br /><strong>Условия:</strong></p>', '<p>- дружный коллектив</p>',
+                     '<p>- гибкий график, удаленная работа</p>', '<p> </p>']
+
+
+def generate_rows(schema, rows_count, seed=1):
+    """Генерирует синтетические вакансии. При одинаковых параметрах строки всегда одинаковые,
+    поэтому замеры на разных коммитах сравнимы.
+
+    Args:
+        schema (str): Схема csv файла ('statistics' или 'vacancies')
+        rows_count (int): Количество вакансий
+        seed (int): Начальное значение генератора случайных чисел
+
+    Yields:
+        list[str]: Строка csv файла в порядке столбцов схемы
+
+    >>> next(generate_rows('statistics', 1))
+    ['Системный аналитик', '78000.0', '150000.0', 'RUR', 'Краснодар', '2009-05-04T15:48:28+0300']
+    >>> list(generate_rows('vacancies', 3, seed=5)) == list(generate_rows('vacancies', 3, seed=5))
+    True
+    """
+    rand = random.Random(seed)
+    for i in range(rows_count):
+        salary_from = rand.randint(10, 300) * 1000
+        salary_to = salary_from + rand.randint(0, 100) * 1000
+        published_at = f'{rand.randint(2007, 2022)}-{rand.randint(1, 12):02d}-{rand.randint(1, 28):02d}T' \
+                       f'{rand.randint(0, 23):02d}:{rand.randint(0, 59):02d}:{rand.randint(0, 59):02d}+0300'
+        area_name = rand.choice(areas[:10]) if rand.random() < 0.8 else rand.choice(areas)
+        if schema == 'statistics':
+            yield [rand.choice(names), f'{salary_from}.0', f'{salary_to}.0', rand.choice(currencies), area_name,
+                   published_at]
+            continue
+        description = ' '.join(rand.choice(description_parts) for _ in range(rand.randint(5, 60)))
+        yield [rand.choice(names), description, '\n'.join(rand.sample(skills, rand.randint(1, 8))),
+               rand.choice(experiences), rand.choice(['True', 'False']), rand.choice(employers), f'{salary_from}.0',
+               f'{salary_to}.0', rand.choice(['True', 'False']), rand.choice(currencies), area_name, published_at]
+
+
+def generate_csv(file_name, schema, rows_count, seed=1):
+    """Записывает синтетические вакансии в csv файл в том же формате, что и выгрузки hh.ru.
+
+    Args:
+        file_name (str): Название файла
+        schema (str): Схема csv файла ('statistics' или 'vacancies')
+        rows_count (int): Количество вакансий
+        seed (int): Начальное значение генератора случайных чисел
+    """
+    with open(file_name + '.tmp', 'w', newline='', encoding='utf-8-sig') as file:
+        writer = csv.writer(file)
+        writer.writerow(schemas[schema])
+        writer.writerows(generate_rows(schema, rows_count, seed))
+    os.replace(file_name + '.tmp', file_name)
+
+
+def get_dataset(directory, schema, rows_count, seed=1):
+    """Возвращает путь к синтетическому датасету, генерируя его только при первом обращении.
+
+    Args:
+        directory (str): Папка с датасетами
+        schema (str): Схема csv файла
+        rows_count (int): Количество вакансий
+        seed (int): Начальное значение генератора случайных чисел
+
+    Returns:
+        str: Абсолютный путь к csv файлу
+    """
+    file_name = os.path.abspath(os.path.join(directory, f'{schema}_{rows_count}_{seed}.csv'))
+    if not os.path.exists(file_name):
+        generate_csv(file_name, schema, rows_count, seed)
+    return file_name
+
+
+def load_script(path, name):
+    """Загружает скрипт из папки задания как модуль. Модуль регистрируется в sys.modules, чтобы его функции
+    можно было передавать в дочерние процессы.
+
+    Args:
+        path (str): Путь к скрипту относительно корня репозитория
+        name (str): Имя модуля
+
+    Returns:
+        module: Загруженный модуль
+    """
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, path))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def prepare_report(file_name):
+    """Готовит замер полного отчета statistics.Report без колоночного кеша (кеш строится во время замера).
+
+    Args:
+        file_name (str): Путь к датасету
+
+    Returns:
+        () -> None: Замеряемая функция
+    """
+    shutil.rmtree(file_name + '.cache', ignore_errors=True)
+    return lambda: statistics.Report(file_name, 'Программист')
+
+
+def prepare_cached_report(file_name):
+    """Готовит замер statistics.Report с уже построенным колоночным кешем.
+
+    Args:
+        file_name (str): Путь к датасету
+
+    Returns:
+        () -> None: Замеряемая функция
+    """
+    ColumnCache(file_name).get()
+    return lambda: statistics.Report(file_name, 'Программист')
+
+
+def prepare_multi_processing(file_name):
+    """Готовит замер get_multi_stats из 3.2.2: файл заранее делится по годам.
+
+    Args:
+        file_name (str): Путь к датасету
+
+    Returns:
+        () -> None: Замеряемая функция
+    """
+    module = load_script(os.path.join('3.2.2', 'multi_processing.py'), 'multi_processing')
+    module.csv_divider(file_name)
+    return lambda: module.get_multi_stats('Программист')
+
+
+def prepare_concurrent_futures(file_name):
+    """Готовит замер get_multi_stats из 3.2.3: файл заранее делится по годам.
+
+    Args:
+        file_name (str): Путь к датасету
+
+    Returns:
+        () -> None: Замеряемая функция
+    """
+    module = load_script(os.path.join('3.2.3', 'сoncurrent_futures.py'), 'concurrent_futures_stats')
+    module.csv_divider(file_name)
+    return lambda: module.get_multi_stats('Программист')
+
+
+def prepare_read_csv(file_name):
+    """Готовит замер чтения файла vacancies.DataSet.read_csv.
+
+    Args:
+        file_name (str): Путь к датасету
+
+    Returns:
+        () -> None: Замеряемая функция
+    """
+    return lambda: vacancies.DataSet(file_name).read_csv()
+
+
+def prepare_get_data(file_name):
+    """Готовит замер создания объектов Vacancy в vacancies.DataSet.get_data по уже прочитанным строкам.
+
+    Args:
+        file_name (str): Путь к датасету
+
+    Returns:
+        () -> None: Замеряемая функция
+    """
+    data_vacancies = vacancies.DataSet(file_name).read_csv()
+    return lambda: vacancies.DataSet(file_name).get_data(data_vacancies)
+
+
+def prepare_print_table(file_name):
+    """Готовит замер печати таблицы: сортировка по окладу в обратном порядке и вывод строк с 10 по 20.
+
+    Args:
+        file_name (str): Путь к датасету
+
+    Returns:
+        () -> None: Замеряемая функция
+    """
+    data = vacancies.DataSet(file_name)
+    data.get_data(data.read_csv())
+    connect = vacancies.InputConnect.__new__(vacancies.InputConnect)
+    connect.file, connect._filter, connect._sort = file_name, '', 'Оклад'
+    connect.is_reverse, connect.segment, connect.fields = 'Да', '10 20', ''
+    connect.validate()
+    return lambda: connect.print_table(data.vacancies_objects, connect.rus_dict)
+
+
+cases = {
+    'statistics.Report': ('statistics', prepare_report),
+    'statistics.Report (cached)': ('statistics', prepare_cached_report),
+    'multi_processing.get_multi_stats': ('statistics', prepare_multi_processing),
+    'concurrent_futures.get_multi_stats': ('statistics', prepare_concurrent_futures),
+    'vacancies.DataSet.read_csv': ('vacancies', prepare_read_csv),
+    'vacancies.DataSet.get_data': ('vacancies', prepare_get_data),
+    'vacancies.InputConnect.print_table': ('vacancies', prepare_print_table),
+}
+
+
+def get_peak_rss():
+    """Возвращает пиковый объем резидентной памяти текущего процесса и его дочерних процессов.
+
+    Returns:
+        int: Пиковый RSS в килобайтах
+    """
+    rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+              resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def run_case(case, file_name):
+    """Выполняет один замер в текущем процессе. Подготовка (чтение файла, разделение на части) в замер не входит.
+    Рабочая папка временная, чтобы отчеты и части файла не попадали в репозиторий.
+
+    Args:
+        case (str): Название замера
+        file_name (str): Путь к датасету
+
+    Returns:
+        dict: Время выполнения в секундах и пиковый RSS в килобайтах
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+                function = cases[case][1](file_name)
+                start = time.perf_counter()
+                function()
+                seconds = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+    return {'seconds': seconds, 'peak_rss_kb': get_peak_rss()}
+
+
+def measure(case, file_name, rows_count, repeat=1):
+    """Запускает замер в отдельном процессе, чтобы пиковый RSS относился только к нему.
+    Из нескольких повторов берется самый быстрый.
+
+    Args:
+        case (str): Название замера
+        file_name (str): Путь к датасету
+        rows_count (int): Количество вакансий в датасете
+        repeat (int): Количество повторов
+
+    Returns:
+        dict: Результат замера
+    """
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--case', case, '--file', file_name],
+                                check=True, capture_output=True, text=True, cwd=ROOT).stdout
+        runs.append(json.loads(output.splitlines()[-1]))
+    best = min(runs, key=lambda run: run['seconds'])
+    return {'case': case, 'schema': cases[case][0], 'rows': rows_count, 'seconds': round(best['seconds'], 4),
+            'rows_per_sec': round(rows_count / best['seconds']), 'peak_rss_kb': max(run['peak_rss_kb'] for run in runs)}
+
+
+def get_commit():
+    """Возвращает хеш текущего коммита, чтобы результаты можно было сопоставить с историей.
+
+    Returns:
+        str or None: Хеш коммита или None, если git недоступен
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], check=True, capture_output=True, text=True,
+                              cwd=ROOT).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Печатает изменение времени и памяти относительно предыдущих результатов.
+
+    Args:
+        results (list[dict]): Текущие результаты
+        baseline (list[dict]): Результаты, с которыми нужно сравнить
+    """
+    previous = {(result['case'], result['rows']): result for result in baseline}
+    for result in results:
+        old = previous.get((result['case'], result['rows']))
+        if old is None:
+            continue
+        print(f"{result['case']} ({result['rows']} строк): время x{result['seconds'] / old['seconds']:.2f}, "
+              f"память x{result['peak_rss_kb'] / old['peak_rss_kb']:.2f}")
+
+
+def main():
+    """Генерирует датасеты, выполняет замеры и сохраняет результаты в json.
+
+    """
+    parser = argparse.ArgumentParser(description='Замеры производительности на синтетических вакансиях')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000],
+                        help='размеры датасетов (например, 10000 1000000 10000000)')
+    parser.add_argument('--cases', nargs='+', choices=list(cases), default=list(cases), help='замеры')
+    parser.add_argument('--repeat', type=int, default=1, help='количество повторов каждого замера')
+    parser.add_argument('--seed', type=int, default=1, help='начальное значение генератора')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'vacancies_benchmark'),
+                        help='папка для сгенерированных датасетов')
+    parser.add_argument('--output', default='benchmark.json', help='файл для результатов в формате json')
+    parser.add_argument('--compare', help='файл с предыдущими результатами для сравнения')
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    parser.add_argument('--file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args.file)))
+        return
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    results = []
+    for rows_count in args.rows:
+        for case in args.cases:
+            file_name = get_dataset(args.data_dir, cases[case][0], rows_count, args.seed)
+            result = measure(case, file_name, rows_count, args.repeat)
+            results.append(result)
+            print(f"{case} ({rows_count} строк): {result['seconds']} с, {result['rows_per_sec']} строк/с, "
+                  f"{result['peak_rss_kb']} КБ")
+
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump({'commit': get_commit(), 'python': platform.python_version(), 'platform': platform.platform(),
+                   'cpu_count': os.cpu_count(), 'seed': args.seed, 'results': results}, file, ensure_ascii=False,
+                  indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            compare(results, json.load(file)['results'])
+
+
+if __name__ == '__main__':
+    main()
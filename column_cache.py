@@ -0,0 +1,500 @@
+import csv
+import hashlib
+import json
+import mmap
+import os
+import shutil
+from array import array
+from datetime import datetime
+
+import numpy as np
+
+from columnar import VacancyColumns
+from rates import get_month
+
+CACHE_VERSION = 2
+HASH_SAMPLE_SIZE = 1 << 20
+
+float_columns = {'salary_from', 'salary_to'}
+category_columns = {'name', 'salary_currency', 'area_name', 'employer_name', 'experience_id', 'premium',
+                    'salary_gross'}
+
+
+def get_epoch(published_at):
+    """Переводит дату публикации в секунды с начала эпохи.
+
+    Args:
+        published_at (str): Дата и время публикации
+
+    Returns:
+        int: Время публикации в секундах
+
+    >>> get_epoch('2022-06-21T17:33:46+0300')
+    1655822026
+    """
+    try:
+        return int(datetime.fromisoformat(published_at).timestamp())
+    except ValueError:
+        return int(datetime.strptime(published_at, '%Y-%m-%dT%H:%M:%S%z').timestamp())
+
+
+def get_file_key(file_name):
+    """Вычисляет ключ файла: путь, размер, время изменения и хеш содержимого. Хешируются размер и первый и
+    последний мегабайты файла - этого достаточно, чтобы заметить перезапись или дописывание, и при этом ключ
+    вычисляется за миллисекунды даже для многогигабайтных файлов.
+
+    Args:
+        file_name (str): Название файла
+
+    Returns:
+        dict: Ключ файла
+    """
+    stat = os.stat(file_name)
+    digest = hashlib.blake2b(str(stat.st_size).encode(), digest_size=16)
+    with open(file_name, 'rb') as file:
+        digest.update(file.read(HASH_SAMPLE_SIZE))
+        if stat.st_size > HASH_SAMPLE_SIZE:
+            file.seek(max(HASH_SAMPLE_SIZE, stat.st_size - HASH_SAMPLE_SIZE))
+            digest.update(file.read(HASH_SAMPLE_SIZE))
+    return {'path': os.path.abspath(file_name), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'hash': digest.hexdigest()}
+
+
+class ColumnStore:
+    """Класс для чтения колоночного кеша. Массивы отображаются в память (mmap) и читаются по мере обращения.
+
+    Attributes:
+        directory (str): Папка кеша
+        meta (dict): Описание кеша: ключ файла, заголовок, количество строк и типы столбцов
+        header (list[str]): Заголовок исходного csv-файла
+        columns (list[str]): Столбцы строк: заголовок и дописанные производные столбцы (см. add_text_column)
+    """
+    def __init__(self, directory, meta):
+        """Инициализирует объект ColumnStore.
+
+        Args:
+            directory (str): Папка кеша
+            meta (dict): Описание кеша
+        """
+        self.directory = directory
+        self.meta = meta
+        self.header = meta['header']
+        self.columns = self.header + meta.get('derived', [])
+        self._arrays = {}
+        self._vocabularies = {}
+        self._blobs = {}
+
+    def __len__(self):
+        """Возвращает количество корректных строк в кеше.
+
+        Returns:
+            int: Количество строк
+        """
+        return self.meta['rows']
+
+    def get_array(self, name):
+        """Отображает в память массив из кеша.
+
+        Args:
+            name (str): Название массива (файл name.npy)
+
+        Returns:
+            np.ndarray: Массив только для чтения
+        """
+        if name not in self._arrays:
+            self._arrays[name] = np.load(os.path.join(self.directory, f'{name}.npy'), mmap_mode='r')
+        return self._arrays[name]
+
+    def get_category(self, column):
+        """Возвращает закодированный словарем столбец.
+
+        Args:
+            column (str): Название столбца
+
+        Returns:
+            tuple[np.ndarray, list]: Коды значений и словарь в порядке первого появления
+        """
+        if column not in self._vocabularies:
+            with open(os.path.join(self.directory, f'{column}.vocabulary.json'), encoding='utf-8') as file:
+                self._vocabularies[column] = json.load(file)
+        return self.get_array(f'{column}.codes'), self._vocabularies[column]
+
+    def get_blob(self, column):
+        """Отображает в память файл со значениями текстового столбца.
+
+        Args:
+            column (str): Название столбца
+
+        Returns:
+            mmap.mmap or bytes: Значения столбца в UTF-8, записанные подряд
+        """
+        if column not in self._blobs:
+            with open(os.path.join(self.directory, f'{column}.bin'), 'rb') as file:
+                self._blobs[column] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) \
+                    if os.fstat(file.fileno()).st_size else b''
+        return self._blobs[column]
+
+    def get_text(self, column, i):
+        """Возвращает значение текстового столбца.
+
+        Args:
+            column (str): Название столбца
+            i (int): Номер строки
+
+        Returns:
+            str: Значение
+        """
+        offsets = self.get_array(f'{column}.offsets')
+        return self.get_blob(column)[int(offsets[i]):int(offsets[i + 1])].decode('utf-8')
+
+    def get_value(self, column, i):
+        """Возвращает значение столбца в строке.
+
+        Args:
+            column (str): Название столбца
+            i (int): Номер строки
+
+        Returns:
+            float or str: Значение (числовые столбцы возвращаются как float)
+        """
+        kind = self.meta['columns'][column]
+        if kind == 'float':
+            return float(self.get_array(column)[i])
+        if kind == 'category':
+            codes, vocabulary = self.get_category(column)
+            return vocabulary[codes[i]]
+        return self.get_text(column, i)
+
+    def row(self, i):
+        """Восстанавливает строку кеша в виде словаря, как после csv_filter.
+
+        Args:
+            i (int): Номер строки
+
+        Returns:
+            dict: Вакансия в виде словаря
+        """
+        return {column: self.get_value(column, i) for column in self.columns}
+
+    def iter_column(self, column, block_size=1 << 16):
+        """Последовательно читает значения столбца блоками.
+
+        Args:
+            column (str): Название столбца
+            block_size (int): Количество строк в блоке
+
+        Yields:
+            float or str: Значения столбца
+        """
+        kind = self.meta['columns'][column]
+        for start in range(0, len(self), block_size):
+            end = min(start + block_size, len(self))
+            if kind == 'float':
+                yield from self.get_array(column)[start:end].tolist()
+            elif kind == 'category':
+                codes, vocabulary = self.get_category(column)
+                yield from (vocabulary[code] for code in codes[start:end].tolist())
+            else:
+                blob, offsets = self.get_blob(column), self.get_array(f'{column}.offsets')[start:end + 1].tolist()
+                yield from (blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(end - start))
+
+    def rows(self):
+        """Последовательно восстанавливает все строки кеша.
+
+        Yields:
+            dict: Вакансия в виде словаря
+        """
+        columns = self.columns
+        for values in zip(*[self.iter_column(column) for column in columns]):
+            yield dict(zip(columns, values))
+
+    def add_text_column(self, column, values):
+        """Дописывает в кеш производный текстовый столбец (например, очищенные описания), чтобы не вычислять
+        его при следующих загрузках. Описание кеша обновляется последним, поэтому прерванная запись не
+        оставляет неполного столбца.
+
+        Args:
+            column (str): Название столбца
+            values (Iterable[str]): Значения столбца для всех строк по порядку
+        """
+        temp_name = os.path.join(self.directory, f'{column}.bin.{os.getpid()}.tmp')
+        writer = TextWriter(temp_name)
+        try:
+            for value in values:
+                writer.append(value)
+            writer.save(self.directory, column)
+            os.replace(temp_name, os.path.join(self.directory, f'{column}.bin'))
+        finally:
+            writer.file.close()
+            if os.path.exists(temp_name):
+                os.remove(temp_name)
+        meta = dict(self.meta, columns=dict(self.meta['columns'], **{column: 'text'}),
+                    derived=self.meta.get('derived', []) + [column])
+        temp_meta = os.path.join(self.directory, f'meta.json.{os.getpid()}.tmp')
+        with open(temp_meta, 'w', encoding='utf-8') as file:
+            json.dump(meta, file, ensure_ascii=False)
+        os.replace(temp_meta, os.path.join(self.directory, 'meta.json'))
+        self.meta = meta
+        self.columns = self.header + meta['derived']
+
+    def preload(self):
+        """Читает все столбцы кеша в память вместо отображения файлов. После этого объект не обращается к папке
+        кеша, поэтому им можно пользоваться, даже если другой процесс или поток перестроит или удалит кеш.
+
+        Returns:
+            ColumnStore: Этот же кеш
+        """
+        for column, kind in self.meta['columns'].items():
+            name = column
+            if kind == 'category':
+                self.get_category(column)
+                name = f'{column}.codes'
+            elif kind == 'text':
+                with open(os.path.join(self.directory, f'{column}.bin'), 'rb') as file:
+                    self._blobs[column] = file.read()
+                name = f'{column}.offsets'
+            self._arrays[name] = np.load(os.path.join(self.directory, f'{name}.npy'))
+        return self
+
+    def get_vacancy_columns(self):
+        """Возвращает столбцы, нужные для статистики, без разбора csv-файла.
+
+        Returns:
+            VacancyColumns: Вакансии в колоночном виде
+        """
+        return VacancyColumns(self.get_array('salary_from'), self.get_array('salary_to'),
+                              *self.get_category('salary_currency'), *self.get_category('year'),
+                              *self.get_category('month'),
+                              *self.get_category('area_name'), *self.get_category('name'))
+
+
+class ColumnCache:
+    """Класс для колоночного кеша csv-файла. Кеш лежит рядом с файлом (папка file_name.cache) и содержит
+    числовые столбцы зарплат, год, месяц и время публикации, закодированные словарем категории и текстовые столбцы.
+    Кеш привязан к ключу файла (get_file_key) и перестраивается, если файл изменился.
+
+    Attributes:
+        file_name (str): Название csv-файла
+        directory (str): Папка кеша
+    """
+    def __init__(self, file_name):
+        """Инициализирует объект ColumnCache.
+
+        Args:
+            file_name (str): Название csv-файла
+        """
+        self.file_name = file_name
+        self.directory = file_name + '.cache'
+
+    def load(self):
+        """Открывает кеш, если он построен для текущей версии файла.
+
+        Returns:
+            ColumnStore or None: Кеш или None, если его нет или он устарел
+        """
+        try:
+            with open(os.path.join(self.directory, 'meta.json'), encoding='utf-8') as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if meta.get('version') != CACHE_VERSION or meta.get('key') != get_file_key(self.file_name):
+            return None
+        return ColumnStore(self.directory, meta)
+
+    def get(self):
+        """Открывает актуальный кеш или строит его заново.
+
+        Returns:
+            ColumnStore: Кеш
+        """
+        return self.load() or self.build()
+
+    def build(self):
+        """Разбирает csv-файл и записывает колоночный кеш. Кеш сначала пишется во временную папку,
+        которая затем заменяет старую, поэтому прерванная запись не оставляет испорченного кеша. Если запись
+        прервана ошибкой, временная папка удаляется.
+
+        Returns:
+            ColumnStore: Построенный кеш
+
+        Raises:
+            OSError: Кеш нельзя записать
+            ValueError: Значение числового столбца не является числом
+        """
+        key = get_file_key(self.file_name)
+        temp_directory = f'{self.directory}.{os.getpid()}.tmp'
+        shutil.rmtree(temp_directory, ignore_errors=True)
+        os.makedirs(temp_directory)
+        writers = {}
+        try:
+            with open(self.file_name, newline='', encoding='utf-8-sig') as file:
+                reader = csv.reader(file)
+                header = next(reader, [])
+                for column in header:
+                    writers[column] = self._get_writer(column, temp_directory)
+                date_index = header.index('published_at') if 'published_at' in header else None
+                if date_index is not None:
+                    writers['year'] = CategoryWriter()
+                    writers['month'] = CategoryWriter()
+                    writers['epoch'] = NumberWriter('q')
+                lines, rows = 0, 0
+                for row in reader:
+                    lines += 1
+                    if len(row) != len(header) or '' in row:
+                        continue
+                    rows += 1
+                    for column, value in zip(header, row):
+                        writers[column].append(value)
+                    if date_index is not None:
+                        published_at = row[date_index]
+                        writers['year'].append(int(published_at.split('-')[0]))
+                        writers['month'].append(get_month(published_at))
+                        writers['epoch'].append(get_epoch(published_at))
+            columns = {}
+            for column, writer in writers.items():
+                columns[column] = writer.save(temp_directory, column)
+            meta = {'version': CACHE_VERSION, 'key': key, 'header': header, 'lines': lines, 'rows': rows,
+                    'columns': columns}
+            with open(os.path.join(temp_directory, 'meta.json'), 'w', encoding='utf-8') as file:
+                json.dump(meta, file, ensure_ascii=False)
+            shutil.rmtree(self.directory, ignore_errors=True)
+            os.replace(temp_directory, self.directory)
+        finally:
+            for writer in writers.values():
+                if isinstance(writer, TextWriter):
+                    writer.file.close()
+            shutil.rmtree(temp_directory, ignore_errors=True)
+        return ColumnStore(self.directory, meta)
+
+    @staticmethod
+    def _get_writer(column, directory):
+        """Выбирает способ хранения столбца.
+
+        Args:
+            column (str): Название столбца
+            directory (str): Папка кеша
+
+        Returns:
+            NumberWriter or CategoryWriter or TextWriter: Объект для записи столбца
+        """
+        if column in float_columns:
+            return NumberWriter('d')
+        if column in category_columns:
+            return CategoryWriter()
+        return TextWriter(os.path.join(directory, f'{column}.bin'))
+
+
+class NumberWriter:
+    """Класс для записи числового столбца кеша.
+
+    Attributes:
+        values (array): Значения столбца
+    """
+    def __init__(self, typecode):
+        """Инициализирует объект NumberWriter.
+
+        Args:
+            typecode (str): Тип значений модуля array ('d' - float, 'q' - int64)
+        """
+        self.values = array(typecode)
+
+    def append(self, value):
+        """Добавляет значение в столбец.
+
+        Args:
+            value (str or int): Значение
+        """
+        self.values.append(float(value) if self.values.typecode == 'd' else value)
+
+    def save(self, directory, column):
+        """Записывает столбец в файл column.npy.
+
+        Args:
+            directory (str): Папка кеша
+            column (str): Название столбца
+
+        Returns:
+            str: Тип столбца
+        """
+        np.save(os.path.join(directory, f'{column}.npy'), np.frombuffer(self.values, dtype=self.values.typecode))
+        return 'float' if self.values.typecode == 'd' else 'int'
+
+
+class CategoryWriter:
+    """Класс для записи столбца, закодированного словарем.
+
+    Attributes:
+        codes (array): Коды значений
+        vocabulary (dict): Словарь значений в порядке первого появления
+    """
+    def __init__(self):
+        """Инициализирует объект CategoryWriter.
+
+        """
+        self.codes = array('i')
+        self.vocabulary = {}
+
+    def append(self, value):
+        """Добавляет значение в столбец.
+
+        Args:
+            value (str or int): Значение
+        """
+        self.codes.append(self.vocabulary.setdefault(value, len(self.vocabulary)))
+
+    def save(self, directory, column):
+        """Записывает коды в column.codes.npy, а словарь в column.vocabulary.json.
+
+        Args:
+            directory (str): Папка кеша
+            column (str): Название столбца
+
+        Returns:
+            str: Тип столбца
+        """
+        np.save(os.path.join(directory, f'{column}.codes.npy'), np.frombuffer(self.codes, dtype=np.int32))
+        with open(os.path.join(directory, f'{column}.vocabulary.json'), 'w', encoding='utf-8') as file:
+            json.dump(list(self.vocabulary), file, ensure_ascii=False)
+        return 'category'
+
+
+class TextWriter:
+    """Класс для записи текстового столбца: значения в UTF-8 пишутся подряд в column.bin,
+    а смещения начала каждого значения - в column.offsets.npy.
+
+    Attributes:
+        file (BinaryIO): Файл со значениями
+        offsets (array): Смещения значений
+    """
+    def __init__(self, file_name):
+        """Инициализирует объект TextWriter.
+
+        Args:
+            file_name (str): Название файла со значениями
+        """
+        self.file = open(file_name, 'wb')
+        self.offsets = array('q', [0])
+
+    def append(self, value):
+        """Добавляет значение в столбец.
+
+        Args:
+            value (str): Значение
+        """
+        data = value.encode('utf-8')
+        self.file.write(data)
+        self.offsets.append(self.offsets[-1] + len(data))
+
+    def save(self, directory, column):
+        """Закрывает файл со значениями и записывает смещения.
+
+        Args:
+            directory (str): Папка кеша
+            column (str): Название столбца
+
+        Returns:
+            str: Тип столбца
+        """
+        self.file.close()
+        np.save(os.path.join(directory, f'{column}.offsets.npy'), np.frombuffer(self.offsets, dtype=np.int64))
+        return 'text'
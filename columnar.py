@@ -0,0 +1,254 @@
+import math
+
+import numpy as np
+
+from rates import get_month
+from sketch import QuantileSketch
+
+
+def encode(values):
+    """Кодирует значения словарем: каждое значение заменяется номером в порядке первого появления.
+
+    Args:
+        values (Iterable): Значения столбца
+
+    Returns:
+        tuple[np.ndarray, list]: Коды значений и словарь (список уникальных значений)
+
+    >>> codes, vocabulary = encode(['Москва', 'Казань', 'Москва'])
+    >>> codes.tolist(), vocabulary
+    ([0, 1, 0], ['Москва', 'Казань'])
+    """
+    index = {}
+    codes = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.int64)
+    return codes, list(index)
+
+
+def group_sums(codes, weights, size):
+    """Считает суммы и количества по группам. Суммирование идет в порядке строк, как и при построчном подсчете,
+    поэтому суммы совпадают с построчными до бита.
+
+    Args:
+        codes (np.ndarray): Коды групп
+        weights (np.ndarray): Значения для суммирования
+        size (int): Количество групп
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Суммы и количества по группам
+    """
+    return np.bincount(codes, weights=weights, minlength=size), np.bincount(codes, minlength=size)
+
+
+def first_seen(codes):
+    """Возвращает коды групп в порядке их первого появления.
+
+    Args:
+        codes (np.ndarray): Коды групп
+
+    Returns:
+        np.ndarray: Уникальные коды в порядке первого появления
+    """
+    unique, first_index = np.unique(codes, return_index=True)
+    return unique[np.argsort(first_index, kind='stable')]
+
+
+class VacancyColumns:
+    """Класс для колоночного представления вакансий. Числовые поля хранятся в массивах NumPy,
+    строковые - закодированы словарем.
+
+    Attributes:
+        salary_from (np.ndarray): Нижние границы вилки оклада
+        salary_to (np.ndarray): Верхние границы вилки оклада
+        currency_codes (np.ndarray): Коды валют
+        currencies (list[str]): Словарь валют
+        year_codes (np.ndarray): Коды годов публикации
+        years (list[int]): Словарь годов публикации
+        month_codes (np.ndarray): Коды месяцев публикации
+        months (list[int]): Словарь месяцев публикации (номера месяцев, см. rates.get_month)
+        area_codes (np.ndarray): Коды городов
+        areas (list[str]): Словарь городов
+        name_codes (np.ndarray): Коды названий вакансий
+        names (list[str]): Словарь названий вакансий
+    """
+    def __init__(self, salary_from, salary_to, currency_codes, currencies, year_codes, years, month_codes, months,
+                 area_codes, areas, name_codes, names):
+        """Инициализирует объект VacancyColumns.
+
+        Args:
+            salary_from (np.ndarray): Нижние границы вилки оклада
+            salary_to (np.ndarray): Верхние границы вилки оклада
+            currency_codes (np.ndarray): Коды валют
+            currencies (list[str]): Словарь валют
+            year_codes (np.ndarray): Коды годов публикации
+            years (list[int]): Словарь годов публикации
+            month_codes (np.ndarray): Коды месяцев публикации
+            months (list[int]): Словарь месяцев публикации
+            area_codes (np.ndarray): Коды городов
+            areas (list[str]): Словарь городов
+            name_codes (np.ndarray): Коды названий вакансий
+            names (list[str]): Словарь названий вакансий
+        """
+        self.salary_from = salary_from
+        self.salary_to = salary_to
+        self.currency_codes = currency_codes
+        self.currencies = currencies
+        self.year_codes = year_codes
+        self.years = years
+        self.month_codes = month_codes
+        self.months = months
+        self.area_codes = area_codes
+        self.areas = areas
+        self.name_codes = name_codes
+        self.names = names
+
+    def __len__(self):
+        """Возвращает количество вакансий.
+
+        Returns:
+            int: Количество вакансий
+        """
+        return len(self.salary_from)
+
+    @classmethod
+    def from_rows(cls, data_vacancies):
+        """Раскладывает вакансии по столбцам.
+
+        Args:
+            data_vacancies (Iterable[dict]): Вакансии в виде словарей
+
+        Returns:
+            VacancyColumns: Вакансии в колоночном виде
+        """
+        names, salary_from, salary_to, currencies, areas, years, months = [], [], [], [], [], [], []
+        for vac in data_vacancies:
+            names.append(vac['name'])
+            salary_from.append(vac['salary_from'])
+            salary_to.append(vac['salary_to'])
+            currencies.append(vac['salary_currency'])
+            areas.append(vac['area_name'])
+            years.append(int(vac['published_at'].split('-')[0]))
+            months.append(get_month(vac['published_at']))
+        return cls(np.array([float(value) for value in salary_from], dtype=np.float64),
+                   np.array([float(value) for value in salary_to], dtype=np.float64),
+                   *encode(currencies), *encode(years), *encode(months), *encode(areas), *encode(names))
+
+    def get_salaries(self, rate_table):
+        """Вычисляет средние зарплаты в рублях по курсам за месяц публикации. Словари валют и месяцев переводятся
+        в номера столбцов и строк таблицы курсов один раз, а курсы всех вакансий выбираются одним обращением к массиву.
+
+        Args:
+            rate_table (RateTable): Таблица курсов валют
+
+        Returns:
+            np.ndarray: Средние зарплаты в рублях
+        """
+        currency_indexes = np.array([rate_table.get_currency_index(currency) for currency in self.currencies],
+                                    dtype=np.int64)
+        month_indexes = rate_table.get_month_indexes(self.months)
+        return rate_table.convert(month_indexes[self.month_codes], currency_indexes[self.currency_codes],
+                                  (self.salary_from + self.salary_to) / 2)
+
+    def get_name_mask(self, p_name):
+        """Отмечает вакансии, в названии которых встречается профессия. Проверяется только словарь названий.
+
+        Args:
+            p_name (str): Название профессии
+
+        Returns:
+            np.ndarray: Булева маска вакансий
+        """
+        return np.array([p_name in name for name in self.names], dtype=bool)[self.name_codes]
+
+    def accumulate(self, accumulator, rate_table):
+        """Добавляет статистику по всем вакансиям в аккумулятор. Порядок ключей в словарях совпадает
+        с построчным подсчетом.
+
+        Args:
+            accumulator (Accumulator or BatchAccumulator): Аккумулятор статистики
+            rate_table (RateTable): Таблица курсов валют
+        """
+        salaries = self.get_salaries(rate_table)
+        self.add_groups(accumulator.salary_by_year, accumulator.vacancies_by_year, self.year_codes, self.years,
+                        salaries)
+        self.add_groups(accumulator.salary_by_city, accumulator.vacancies_by_city, self.area_codes, self.areas,
+                        salaries)
+        if hasattr(accumulator, 'p_names'):
+            matches = [accumulator.matcher.find(name) for name in self.names]
+            targets = [(np.array([p_name in found for found in matches], dtype=bool)[self.name_codes],
+                        accumulator.p_names_salary_by_year[p_name], accumulator.p_names_vacancies_by_year[p_name])
+                       for p_name in accumulator.p_names]
+        else:
+            targets = [(self.get_name_mask(accumulator.p_name), accumulator.p_name_salary_by_year,
+                        accumulator.p_name_vacancies_by_year)]
+        for mask, salary_by_year, vacancies_by_year in targets:
+            self.add_groups(salary_by_year, vacancies_by_year, self.year_codes[mask], self.years, salaries[mask])
+
+        bucket_keys, is_zero = self.get_bucket_keys(salaries), salaries <= 0
+        self.add_sketches(accumulator.salary_sketch_by_year, self.year_codes, self.years, bucket_keys, is_zero)
+        self.add_sketches(accumulator.salary_sketch_by_city, self.area_codes, self.areas, bucket_keys, is_zero)
+        if hasattr(accumulator, 'p_names'):
+            sketch_targets = [(mask, accumulator.p_names_salary_sketch_by_year[p_name])
+                              for (mask, _, _), p_name in zip(targets, accumulator.p_names)]
+        else:
+            sketch_targets = [(targets[0][0], accumulator.p_name_salary_sketch_by_year)]
+        for mask, sketch_by_year in sketch_targets:
+            self.add_sketches(sketch_by_year, self.year_codes[mask], self.years, bucket_keys[mask], is_zero[mask])
+
+    @staticmethod
+    def get_bucket_keys(salaries):
+        """Вычисляет номера корзин QuantileSketch для зарплат. Логарифм берется через math.log, как и при
+        построчном добавлении, поэтому номера корзин совпадают с QuantileSketch.get_key. Зарплаты часто
+        повторяются, поэтому номер корзины вычисляется один раз для каждой различной зарплаты.
+
+        Args:
+            salaries (np.ndarray): Зарплаты
+
+        Returns:
+            np.ndarray: Номера корзин (0 для нулевых зарплат, у которых корзины нет)
+        """
+        gamma_log = QuantileSketch().gamma_log
+        values, inverse = np.unique(salaries, return_inverse=True)
+        keys = np.fromiter((math.ceil(math.log(value) / gamma_log) if value > 0 else 0
+                            for value in values.tolist()), dtype=np.int64, count=len(values))
+        return keys[inverse.reshape(-1)]
+
+    @staticmethod
+    def add_groups(salary_by_key, vacancies_by_key, codes, keys, salaries):
+        """Добавляет суммы зарплат и количества вакансий по группам в словари аккумулятора.
+
+        Args:
+            salary_by_key (dict): Суммы зарплат по ключам
+            vacancies_by_key (dict): Количества вакансий по ключам
+            codes (np.ndarray): Коды групп
+            keys (list): Словарь групп
+            salaries (np.ndarray): Зарплаты
+        """
+        sums, counts = group_sums(codes, salaries, len(keys))
+        for code in first_seen(codes).tolist():
+            key = keys[code]
+            salary_by_key[key] = salary_by_key.get(key, 0) + float(sums[code])
+            vacancies_by_key[key] = vacancies_by_key.get(key, 0) + int(counts[code])
+
+    @staticmethod
+    def add_sketches(sketch_by_key, codes, keys, bucket_keys, is_zero):
+        """Добавляет зарплаты в скетчи по группам: одинаковые пары (группа, корзина) сначала подсчитываются
+        через np.unique, а затем добавляются в скетч одним вызовом.
+
+        Args:
+            sketch_by_key (dict): Скетчи по ключам
+            codes (np.ndarray): Коды групп
+            keys (list): Словарь групп
+            bucket_keys (np.ndarray): Номера корзин зарплат
+            is_zero (np.ndarray): Булева маска нулевых зарплат
+        """
+        if len(codes) == 0:
+            return
+        for code in first_seen(codes).tolist():
+            if keys[code] not in sketch_by_key:
+                sketch_by_key[keys[code]] = QuantileSketch()
+        for code, count in enumerate(np.bincount(codes[is_zero], minlength=len(keys)).tolist()):
+            if count:
+                sketch_by_key[keys[code]].add_bucket(None, count)
+        pairs, counts = np.unique(np.stack([codes[~is_zero], bucket_keys[~is_zero]]), axis=1, return_counts=True)
+        for (code, key), count in zip(pairs.T.tolist(), counts.tolist()):
+            sketch_by_key[keys[code]].add_bucket(key, count)
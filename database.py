@@ -0,0 +1,171 @@
+import math
+import sqlite3
+
+from sketch import QuantileSketch
+
+SQLITE_HEADER = b'SQLite format 3\x00'
+YEAR_SQL = 'CAST(substr(published_at, 1, 4) AS INTEGER)'
+
+
+def is_database(file_name):
+    """Проверяет, что файл - база SQLite (по заголовку файла).
+
+    Args:
+        file_name (str): Название файла
+
+    Returns:
+        bool: Файл - база SQLite
+    """
+    try:
+        with open(file_name, 'rb') as file:
+            return file.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+    except OSError:
+        return False
+
+
+class VacancyDatabase:
+    """Класс для вычисления статистики по базе SQLite с таблицей вакансий (name, salary, area_name, published_at),
+    которую записывает 3.5.X/2/vac_sql.py: зарплата уже переведена в рубли. Суммы, количества и корзины скетчей
+    считаются запросами GROUP BY по индексам, в Python передаются только итоги по группам.
+
+    Индексы создаются при первом обращении: по году публикации (выражение YEAR_SQL), по городу и по названию.
+    Для профессий ведется таблица name_tokens: для каждой запрошенной профессии (токена) - различные названия
+    вакансий, в которых она встречается (как p_name in name). Таблица заполняется по словарю названий один раз
+    на профессию, а триггеры дописывают в нее названия новых вакансий.
+
+    Attributes:
+        file_name (str): Название файла базы
+        table (str): Название таблицы вакансий
+        connection (sqlite3.Connection): Соединение с базой
+    """
+    def __init__(self, file_name, table='vacancies'):
+        """Открывает базу и создает индексы и таблицу name_tokens, если их еще нет.
+
+        Args:
+            file_name (str): Название файла базы
+            table (str): Название таблицы вакансий
+        """
+        self.file_name = file_name
+        self.table = table
+        self.connection = sqlite3.connect(file_name)
+        try:
+            self.connection.execute('SELECT ln(1), ceil(1)')
+        except sqlite3.OperationalError:
+            self.connection.create_function('ln', 1, math.log, deterministic=True)
+            self.connection.create_function('ceil', 1, math.ceil, deterministic=True)
+        self.prepare()
+
+    def prepare(self):
+        """Создает индексы по году, городу и названию, таблицу name_tokens и триггеры, которые ее дополняют.
+
+        """
+        table = self.table
+        with self.connection:
+            self.connection.execute(f'CREATE INDEX IF NOT EXISTS "{table}_year" ON "{table}" ({YEAR_SQL}, salary)')
+            self.connection.execute(f'CREATE INDEX IF NOT EXISTS "{table}_area" ON "{table}" (area_name, salary)')
+            self.connection.execute(f'CREATE INDEX IF NOT EXISTS "{table}_name" ON "{table}" '
+                                    f'(name, {YEAR_SQL}, salary)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS name_token_sources (token TEXT PRIMARY KEY)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS name_tokens (token TEXT, name TEXT, '
+                                    'PRIMARY KEY (token, name)) WITHOUT ROWID')
+            for event in ('INSERT', 'UPDATE OF name'):
+                self.connection.execute(
+                    f'CREATE TRIGGER IF NOT EXISTS "{table}_name_tokens_{event.split()[0].lower()}" '
+                    f'AFTER {event} ON "{table}" BEGIN '
+                    f'INSERT OR IGNORE INTO name_tokens SELECT token, NEW.name FROM name_token_sources '
+                    f'WHERE instr(NEW.name, token) > 0; END')
+
+    def close(self):
+        """Закрывает соединение с базой.
+
+        """
+        self.connection.close()
+
+    def add_token(self, token):
+        """Заполняет name_tokens для профессии, если она запрашивается впервые: названия из словаря различных
+        названий (индекс по названию), в которых встречается профессия.
+
+        Args:
+            token (str): Название профессии
+        """
+        with self.connection:
+            if self.connection.execute('INSERT OR IGNORE INTO name_token_sources VALUES (?)', (token,)).rowcount:
+                self.connection.execute(f'INSERT OR IGNORE INTO name_tokens SELECT ?, name FROM '
+                                        f'(SELECT DISTINCT name FROM "{self.table}") WHERE instr(name, ?) > 0',
+                                        (token, token))
+
+    def get_source(self, token=None):
+        """Возвращает часть запроса FROM ... WHERE: все вакансии с зарплатой или только вакансии профессии.
+
+        Args:
+            token (str or None): Название профессии
+
+        Returns:
+            tuple[str, tuple]: Часть запроса и ее параметры
+        """
+        if token is None:
+            return f'FROM "{self.table}" WHERE salary IS NOT NULL', ()
+        self.add_token(token)
+        return (f'FROM name_tokens JOIN "{self.table}" USING (name) '
+                f'WHERE name_tokens.token = ? AND salary IS NOT NULL', (token,))
+
+    def add_groups(self, salary_by_key, vacancies_by_key, key_sql, token=None):
+        """Добавляет суммы зарплат и количества вакансий по группам в словари аккумулятора. Группы идут в порядке
+        первого появления в таблице, как при построчном подсчете.
+
+        Args:
+            salary_by_key (dict): Суммы зарплат по ключам
+            vacancies_by_key (dict): Количества вакансий по ключам
+            key_sql (str): Выражение ключа группы
+            token (str or None): Название профессии (None - все вакансии)
+        """
+        source, params = self.get_source(token)
+        for key, salary, count, _ in self.connection.execute(
+                f'SELECT {key_sql} AS key, SUM(salary), COUNT(*), MIN("{self.table}".rowid) AS first '
+                f'{source} GROUP BY key ORDER BY first', params):
+            salary_by_key[key] = salary_by_key.get(key, 0) + salary
+            vacancies_by_key[key] = vacancies_by_key.get(key, 0) + count
+
+    def add_sketches(self, sketch_by_key, key_sql, token=None):
+        """Добавляет зарплаты в скетчи по группам. Номер корзины QuantileSketch считается в запросе, поэтому
+        в Python передаются только пары (группа, корзина) с количествами. Сначала вакансии группируются по паре
+        (группа, зарплата) в порядке индекса, и логарифм считается один раз для каждой различной зарплаты, а не
+        для каждой строки. Скетчи должны быть уже созданы в нужном порядке (см. add_groups).
+
+        Args:
+            sketch_by_key (dict): Скетчи по ключам
+            key_sql (str): Выражение ключа группы
+            token (str or None): Название профессии (None - все вакансии)
+        """
+        source, params = self.get_source(token)
+        bucket_sql = 'CASE WHEN salary > 0 THEN CAST(ceil(ln(salary) / ?) AS INTEGER) END'
+        for key, bucket, count in self.connection.execute(
+                f'SELECT key, {bucket_sql} AS bucket, SUM(count) FROM '
+                f'(SELECT {key_sql} AS key, salary, COUNT(*) AS count {source} GROUP BY key, salary) '
+                f'GROUP BY key, bucket', (QuantileSketch().gamma_log,) + params):
+            sketch_by_key[key].add_bucket(bucket, count)
+
+    def accumulate(self, accumulator):
+        """Добавляет статистику по всем вакансиям в аккумулятор. Порядок ключей в словарях совпадает
+        с построчным подсчетом.
+
+        Args:
+            accumulator (Accumulator or BatchAccumulator): Аккумулятор статистики
+        """
+        targets = [(accumulator.salary_by_year, accumulator.vacancies_by_year, accumulator.salary_sketch_by_year,
+                    YEAR_SQL, None),
+                   (accumulator.salary_by_city, accumulator.vacancies_by_city, accumulator.salary_sketch_by_city,
+                    'area_name', None)]
+        if hasattr(accumulator, 'p_names'):
+            targets += [(accumulator.p_names_salary_by_year[p_name], accumulator.p_names_vacancies_by_year[p_name],
+                         accumulator.p_names_salary_sketch_by_year[p_name], YEAR_SQL, p_name)
+                        for p_name in accumulator.p_names]
+        else:
+            targets.append((accumulator.p_name_salary_by_year, accumulator.p_name_vacancies_by_year,
+                            accumulator.p_name_salary_sketch_by_year, YEAR_SQL, accumulator.p_name))
+        for salary_by_key, vacancies_by_key, sketch_by_key, key_sql, token in targets:
+            self.add_groups(salary_by_key, vacancies_by_key, key_sql, token)
+            for key in vacancies_by_key:
+                if key not in sketch_by_key:
+                    sketch_by_key[key] = QuantileSketch()
+            self.add_sketches(sketch_by_key, key_sql, token)
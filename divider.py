@@ -1,27 +1,204 @@
-def csv_divider(file_name):
-    """Разделяет csv-файл на отдельные файлы по годам.
+import csv
+import json
+import os
+import re
+
+
+partition_keys = {
+    'year': lambda vac: vac['published_at'][:4],
+    'month': lambda vac: vac['published_at'][:7],
+    'area': lambda vac: vac['area_name'],
+}
+
+
+def csv_divider(file_name, by='year', directory='csv', buffer_size=1000):
+    """Разделяет csv-файл на отдельные файлы по годам, месяцам или городам за один проход.
+    Порядок строк во входном файле не важен. Для каждого файла копится не больше buffer_size строк, после чего
+    они дописываются в конец файла. В конце в папку записывается manifest.json с количеством строк и размером
+    каждого файла (от большего к меньшему), чтобы обработчики могли начинать с самых больших.
 
         Args:
            file_name (str): Название csv-файла
+           by (str): Ключ разделения: year, month или area
+           directory (str): Папка для файлов
+           buffer_size (int): Максимальное количество строк в буфере одного файла
+
+        Returns:
+           dict: Манифест разделения
     """
+    get_key = partition_keys[by]
+    os.makedirs(directory, exist_ok=True)
+    partitions = {}
+    buffers = {}
+    used_names = set()
+
+    def flush(key):
+        partition = partitions[key]
+        with open(partition['file'], 'a' if partition['rows'] else 'w', newline='', encoding='utf-8-sig') as out:
+            writer = csv.writer(out)
+            if partition['rows'] == 0:
+                writer.writerow(header)
+            writer.writerows(buffers[key])
+        partition['rows'] += len(buffers[key])
+        buffers[key] = []
+
     with open(file_name, newline='', encoding='utf-8-sig') as file:
-        header = file.readline()
-        rows = []
-        year = 0
-        for row in file:
-            current_year = int(row.split(',')[-1].split('-')[0])
-            if year == 0:
-                year = current_year
-                rows.append(row)
-            elif current_year == year:
-                rows.append(row)
-            else:
-                with open('./csv/' + str(year) + '.csv', 'w', newline='', encoding='utf-8-sig') as out:
-                    out.write(header)
-                    out.writelines(rows)
-                year = current_year
-                rows = []
-        if len(rows) > 0:
-            with open('./csv/' + str(year) + '.csv', 'w', newline='', encoding='utf-8-sig') as out:
-                out.write(header)
-                out.writelines(rows)
+        reader = csv.reader(file)
+        header = next(reader, [])
+        for row in reader:
+            if len(row) != len(header):
+                continue
+            key = get_key(dict(zip(header, row)))
+            if key not in partitions:
+                base_name = name = re.sub(r'[\\/:*?"<>|\s]+', '_', key) or '_'
+                suffix = 0
+                while name in used_names:
+                    suffix += 1
+                    name = f'{base_name}_{suffix}'
+                used_names.add(name)
+                partitions[key] = {'key': key, 'file': os.path.join(directory, f'{name}.csv'), 'rows': 0, 'bytes': 0}
+                buffers[key] = []
+            buffers[key].append(row)
+            if len(buffers[key]) >= buffer_size:
+                flush(key)
+    for key in partitions:
+        if buffers[key] or partitions[key]['rows'] == 0:
+            flush(key)
+        partitions[key]['bytes'] = os.path.getsize(partitions[key]['file'])
+
+    manifest = {
+        'source': file_name,
+        'by': by,
+        'header': header,
+        'partitions': sorted(partitions.values(), key=lambda x: x['bytes'], reverse=True),
+    }
+    with open(os.path.join(directory, 'manifest.json'), 'w', encoding='utf-8') as out:
+        json.dump(manifest, out, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def read_manifest(directory='csv'):
+    """Читает манифест разделения csv-файла.
+
+        Args:
+           directory (str): Папка с разделенными файлами
+
+        Returns:
+           dict: Манифест разделения
+    """
+    with open(os.path.join(directory, 'manifest.json'), encoding='utf-8') as file:
+        return json.load(file)
+
+
+def read_record(file):
+    """Читает из бинарного файла одну csv-запись целиком, даже если поля в кавычках содержат переводы строк.
+
+    Args:
+        file (BinaryIO): Файл, открытый в бинарном режиме
+
+    Returns:
+        bytes: Запись (пустая строка, если файл закончился)
+    """
+    record = file.readline()
+    while record.count(b'"') % 2 == 1:
+        line = file.readline()
+        if not line:
+            break
+        record += line
+    return record
+
+
+def find_record_end(file, position, in_quotes, block_size=1 << 20):
+    """Ищет ближайший конец записи (перевод строки вне кавычек), начиная с текущей позиции файла.
+
+    Args:
+        file (BinaryIO): Файл, открытый в бинарном режиме
+        position (int): Текущая позиция в файле
+        in_quotes (bool): Находится ли текущая позиция внутри поля в кавычках
+        block_size (int): Размер блока чтения
+
+    Returns:
+        int: Позиция начала следующей записи (или конец файла)
+    """
+    while True:
+        block = file.read(block_size)
+        if not block:
+            return position
+        i = 0
+        while True:
+            if in_quotes:
+                quote = block.find(b'"', i)
+                if quote == -1:
+                    break
+                in_quotes, i = False, quote + 1
+                continue
+            newline, quote = block.find(b'\n', i), block.find(b'"', i)
+            if newline != -1 and (quote == -1 or newline < quote):
+                return position + newline + 1
+            if quote == -1:
+                break
+            in_quotes, i = True, quote + 1
+        position += len(block)
+
+
+def get_chunks(file_name, chunks_count, block_size=1 << 20):
+    """Делит csv-файл на диапазоны байт примерно одинакового размера. Границы диапазонов совпадают с границами
+    записей, в том числе для многострочных полей в кавычках: для этого файл один раз просматривается с подсчетом
+    кавычек, без разбора csv.
+
+    Args:
+        file_name (str): Название csv-файла
+        chunks_count (int): Желаемое количество диапазонов
+        block_size (int): Размер блока чтения
+
+    Returns:
+        tuple[list[str], list[tuple[int, int]]]: Заголовок файла и список диапазонов (начало, конец)
+    """
+    with open(file_name, 'rb') as file:
+        header = next(csv.reader([read_record(file).decode('utf-8-sig')]), [])
+        start = file.tell()
+        size = os.fstat(file.fileno()).st_size
+        bounds = [start]
+        position, in_quotes = start, False
+        for i in range(1, chunks_count):
+            target = start + (size - start) * i // chunks_count
+            if target <= bounds[-1]:
+                continue
+            while position < target:
+                block = file.read(min(block_size, target - position))
+                in_quotes ^= block.count(b'"') % 2 == 1
+                position += len(block)
+            position = find_record_end(file, position, in_quotes, block_size)
+            if position >= size:
+                break
+            file.seek(position)
+            in_quotes = False
+            bounds.append(position)
+        bounds.append(size)
+    return header, [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+
+
+def read_chunk(file_name, start, end):
+    """Построчно читает записи csv-файла из диапазона байт.
+
+    Args:
+        file_name (str): Название csv-файла
+        start (int): Начало диапазона (начало записи)
+        end (int): Конец диапазона (начало следующей записи)
+
+    Yields:
+        list[str]: Запись csv-файла
+    """
+    with open(file_name, 'rb') as file:
+        file.seek(start)
+
+        def lines():
+            position = start
+            while position < end:
+                line = file.readline()
+                if not line:
+                    return
+                position += len(line)
+                yield line.decode('utf-8')
+
+        yield from csv.reader(lines())
@@ -0,0 +1,403 @@
+import json
+import os
+import shutil
+import threading
+from array import array
+
+import numpy as np
+
+from columnar import encode
+
+
+def group_positions(codes, size):
+    """Группирует номера строк по кодам значений. Внутри группы номера строк идут по возрастанию.
+
+    Args:
+        codes (np.ndarray): Код значения для каждой строки
+        size (int): Количество значений
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Номера строк, сгруппированные по кодам, и границы групп
+
+    >>> positions, offsets = group_positions(np.array([1, 0, 1, 1]), 2)
+    >>> positions.tolist(), offsets.tolist()
+    ([1, 0, 2, 3], [0, 1, 4])
+    """
+    positions = np.argsort(codes, kind='stable').astype(np.int64)
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=size), out=offsets[1:])
+    return positions, offsets
+
+
+class HashIndex:
+    """Класс для индекса по значению: для каждого значения хранится отсортированный список номеров строк.
+
+    Attributes:
+        keys (dict): Номер группы для каждого значения
+        positions (np.ndarray): Номера строк, сгруппированные по значениям
+        offsets (np.ndarray): Границы групп в positions
+    """
+    def __init__(self, keys, positions, offsets):
+        """Инициализирует объект HashIndex.
+
+        Args:
+            keys (list): Значения в порядке групп
+            positions (np.ndarray): Номера строк, сгруппированные по значениям
+            offsets (np.ndarray): Границы групп в positions
+        """
+        self.keys = {key: i for i, key in enumerate(keys)}
+        self.positions = positions
+        self.offsets = offsets
+
+    @classmethod
+    def from_codes(cls, codes, vocabulary, key_function=None):
+        """Строит индекс по столбцу, закодированному словарем. Функция ключа применяется только к словарю,
+        а не к каждой строке. Если несколько значений словаря дают один ключ, их строки объединяются.
+
+        Args:
+            codes (np.ndarray): Коды значений
+            vocabulary (list): Словарь значений
+            key_function ((Any) -> Any or None): Преобразование значения в ключ индекса
+
+        Returns:
+            HashIndex: Индекс
+        """
+        key_codes, keys = encode(vocabulary if key_function is None else map(key_function, vocabulary))
+        return cls(keys, *group_positions(key_codes[np.asarray(codes)], len(keys)))
+
+    @classmethod
+    def from_values(cls, values, key_function=None):
+        """Строит индекс по значениям столбца.
+
+        Args:
+            values (Iterable): Значения столбца
+            key_function ((Any) -> Any or None): Преобразование значения в ключ индекса
+
+        Returns:
+            HashIndex: Индекс
+        """
+        codes, keys = encode(values if key_function is None else map(key_function, values))
+        return cls(keys, *group_positions(codes, len(keys)))
+
+    def get(self, key):
+        """Возвращает номера строк с заданным значением.
+
+        Args:
+            key: Значение
+
+        Returns:
+            np.ndarray: Номера строк по возрастанию
+        """
+        i = self.keys.get(key)
+        if i is None:
+            return np.zeros(0, dtype=np.int64)
+        return np.asarray(self.positions[self.offsets[i]:self.offsets[i + 1]])
+
+    def save(self, directory):
+        """Записывает индекс в папку.
+
+        Args:
+            directory (str): Папка индекса
+        """
+        np.save(os.path.join(directory, 'positions.npy'), self.positions)
+        np.save(os.path.join(directory, 'offsets.npy'), self.offsets)
+        with open(os.path.join(directory, 'keys.json'), 'w', encoding='utf-8') as file:
+            json.dump(list(self.keys), file, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory):
+        """Читает индекс из папки. Номера строк отображаются в память.
+
+        Args:
+            directory (str): Папка индекса
+
+        Returns:
+            HashIndex: Индекс
+        """
+        with open(os.path.join(directory, 'keys.json'), encoding='utf-8') as file:
+            keys = json.load(file)
+        return cls(keys, np.load(os.path.join(directory, 'positions.npy'), mmap_mode='r'),
+                   np.load(os.path.join(directory, 'offsets.npy')))
+
+
+class InvertedIndex(HashIndex):
+    """Класс для инвертированного индекса по списку значений в строке (например, навыкам): для каждого значения
+    хранится список строк, где оно встречается. Запрос по нескольким значениям пересекает списки,
+    начиная с самого короткого.
+    """
+    @classmethod
+    def from_texts(cls, texts, separator='\n'):
+        """Строит индекс по текстовому столбцу со значениями через разделитель.
+
+        Args:
+            texts (Iterable[str]): Значения столбца
+            separator (str): Разделитель значений
+
+        Returns:
+            InvertedIndex: Индекс
+        """
+        keys, codes, rows = {}, array('q'), array('q')
+        for row, text in enumerate(texts):
+            for token in dict.fromkeys(text.split(separator)):
+                codes.append(keys.setdefault(token, len(keys)))
+                rows.append(row)
+        positions, offsets = group_positions(np.frombuffer(codes, dtype=np.int64), len(keys))
+        return cls(list(keys), np.frombuffer(rows, dtype=np.int64)[positions], offsets)
+
+    def get_all(self, keys):
+        """Возвращает номера строк, где встречаются все значения.
+
+        Args:
+            keys (Iterable): Значения
+
+        Returns:
+            np.ndarray: Номера строк по возрастанию
+
+        >>> index = InvertedIndex.from_texts(['Python\\nSQL', 'SQL', 'Git\\nPython\\nSQL'])
+        >>> index.get_all(['SQL', 'Python']).tolist()
+        [0, 2]
+        """
+        postings = sorted((self.get(key) for key in keys), key=len)
+        result = postings[0]
+        for posting in postings[1:]:
+            if len(result) == 0:
+                break
+            result = np.intersect1d(result, posting, assume_unique=True)
+        return result
+
+
+class IntervalTree:
+    """Класс для дерева интервалов (centered interval tree): находит все интервалы [lo, hi], содержащие точку,
+    за O(log n + k). Каждый узел хранит центр и интервалы, которые его содержат, отсортированные по левой
+    и по правой границе. Узлы хранятся в плоских массивах, чтобы дерево можно было сохранить в .npy.
+
+    Attributes:
+        arrays (dict[str, np.ndarray]): Массивы узлов и отсортированных границ
+    """
+    names = ('centers', 'left', 'right', 'offsets', 'lo_values', 'lo_positions', 'hi_values', 'hi_positions')
+
+    def __init__(self, arrays):
+        """Инициализирует объект IntervalTree.
+
+        Args:
+            arrays (dict[str, np.ndarray]): Массивы дерева (см. names)
+        """
+        self.arrays = arrays
+
+    @classmethod
+    def build(cls, lo, hi):
+        """Строит дерево по границам интервалов. Интервалы с lo > hi не содержат ни одной точки и пропускаются.
+
+        Args:
+            lo (np.ndarray): Левые границы
+            hi (np.ndarray): Правые границы
+
+        Returns:
+            IntervalTree: Дерево
+
+        >>> tree = IntervalTree.build(np.array([1., 5., 2., 8.]), np.array([3., 9., 2., 4.]))
+        >>> tree.query(2).tolist(), tree.query(6).tolist(), tree.query(0).tolist()
+        ([0, 2], [1], [])
+        """
+        lo, hi = np.asarray(lo, dtype=np.float64), np.asarray(hi, dtype=np.float64)
+        centers, left, right, offsets = [], [], [], [0]
+        lo_values, lo_positions, hi_values, hi_positions = [], [], [], []
+        rows = np.flatnonzero(lo <= hi)
+        stack = [(rows, -1, None)] if len(rows) else []
+        while stack:
+            rows, parent, side = stack.pop()
+            node = len(centers)
+            if parent >= 0:
+                (left if side == 'left' else right)[parent] = node
+            center = float(np.median(np.concatenate([lo[rows], hi[rows]])))
+            is_left, is_right = hi[rows] < center, lo[rows] > center
+            overlap = rows[~is_left & ~is_right]
+            by_lo = overlap[np.argsort(lo[overlap], kind='stable')]
+            by_hi = overlap[np.argsort(hi[overlap], kind='stable')]
+            lo_values.append(lo[by_lo])
+            lo_positions.append(by_lo)
+            hi_values.append(hi[by_hi])
+            hi_positions.append(by_hi)
+            offsets.append(offsets[-1] + len(overlap))
+            centers.append(center)
+            left.append(-1)
+            right.append(-1)
+            if is_left.any():
+                stack.append((rows[is_left], node, 'left'))
+            if is_right.any():
+                stack.append((rows[is_right], node, 'right'))
+        return cls({
+            'centers': np.array(centers, dtype=np.float64), 'left': np.array(left, dtype=np.int64),
+            'right': np.array(right, dtype=np.int64), 'offsets': np.array(offsets, dtype=np.int64),
+            'lo_values': np.concatenate(lo_values + [np.zeros(0)]),
+            'lo_positions': np.concatenate(lo_positions + [np.zeros(0, dtype=np.int64)]).astype(np.int64),
+            'hi_values': np.concatenate(hi_values + [np.zeros(0)]),
+            'hi_positions': np.concatenate(hi_positions + [np.zeros(0, dtype=np.int64)]).astype(np.int64),
+        })
+
+    def query(self, point):
+        """Находит интервалы, содержащие точку (lo <= point <= hi).
+
+        Args:
+            point (float): Точка
+
+        Returns:
+            np.ndarray: Номера строк по возрастанию
+        """
+        arrays = self.arrays
+        centers, left, right, offsets = arrays['centers'], arrays['left'], arrays['right'], arrays['offsets']
+        found = []
+        node = 0 if len(centers) else -1
+        while node >= 0:
+            start, end = int(offsets[node]), int(offsets[node + 1])
+            center = centers[node]
+            if point <= center:
+                count = int(np.searchsorted(arrays['lo_values'][start:end], point, side='right'))
+                found.append(arrays['lo_positions'][start:start + count])
+                node = int(left[node]) if point < center else -1
+            else:
+                first = int(np.searchsorted(arrays['hi_values'][start:end], point, side='left'))
+                found.append(arrays['hi_positions'][start + first:end])
+                node = int(right[node])
+        return np.sort(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+
+    def save(self, directory):
+        """Записывает дерево в папку.
+
+        Args:
+            directory (str): Папка индекса
+        """
+        for name in self.names:
+            np.save(os.path.join(directory, f'{name}.npy'), self.arrays[name])
+
+    @classmethod
+    def load(cls, directory):
+        """Читает дерево из папки. Массивы отображаются в память.
+
+        Args:
+            directory (str): Папка индекса
+
+        Returns:
+            IntervalTree: Дерево
+        """
+        return cls({name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r') for name in cls.names})
+
+
+class VacancyIndex:
+    """Класс для вторичных индексов колоночного кеша (см. ColumnCache). Индексы строятся при первом запросе
+    и сохраняются в папку indexes внутри кеша, поэтому повторные запросы к тому же файлу не читают строки,
+    а при изменении файла индексы перестраиваются вместе с кешем. Индексы возвращают номера строк кеша.
+
+    Attributes:
+        store (ColumnStore): Колоночный кеш
+        directory (str or None): Папка индексов (None - индексы не сохраняются)
+        indexes (dict): Загруженные индексы
+    """
+    def __init__(self, store, persistent=True):
+        """Инициализирует объект VacancyIndex.
+
+        Args:
+            store (ColumnStore): Колоночный кеш
+            persistent (bool): Загружать и сохранять индексы в папке кеша (False - строить только в памяти)
+        """
+        self.store = store
+        self.directory = os.path.join(store.directory, 'indexes') if persistent else None
+        self.indexes = {}
+        self._lock = threading.Lock()
+
+    def get_hash_index(self, column, key_function=None):
+        """Возвращает индекс по значению столбца.
+
+        Args:
+            column (str): Название столбца
+            key_function ((Any) -> Any or None): Преобразование значения в ключ индекса (например, в то значение,
+                которое видит пользователь)
+
+        Returns:
+            HashIndex: Индекс
+        """
+        def build():
+            if self.store.meta['columns'][column] == 'category':
+                return HashIndex.from_codes(*self.store.get_category(column), key_function)
+            return HashIndex.from_values(self.store.iter_column(column), key_function)
+        return self.get(column, HashIndex, build)
+
+    def get_inverted_index(self, column, separator='\n'):
+        """Возвращает инвертированный индекс по значениям текстового столбца через разделитель.
+
+        Args:
+            column (str): Название столбца
+            separator (str): Разделитель значений
+
+        Returns:
+            InvertedIndex: Индекс
+        """
+        return self.get(column, InvertedIndex, lambda: InvertedIndex.from_texts(self.store.iter_column(column),
+                                                                                separator))
+
+    def get_interval_tree(self, lo_column, hi_column):
+        """Возвращает дерево интервалов по двум числовым столбцам. Границы отбрасывают дробную часть,
+        как границы вилки оклада в Salary.
+
+        Args:
+            lo_column (str): Столбец левых границ
+            hi_column (str): Столбец правых границ
+
+        Returns:
+            IntervalTree: Дерево интервалов
+        """
+        return self.get(f'{lo_column}-{hi_column}', IntervalTree,
+                        lambda: IntervalTree.build(np.trunc(self.store.get_array(lo_column)),
+                                                   np.trunc(self.store.get_array(hi_column))))
+
+    def get(self, name, index_class, build):
+        """Возвращает индекс: загружает его из папки или строит и сохраняет (см. load_or_build), а без папки
+        индексов - только строит. Если сохранить индекс не удалось, он используется только в памяти. Индексы
+        загружаются под блокировкой, поэтому объект можно использовать из нескольких потоков.
+
+        Args:
+            name (str): Название индекса
+            index_class (type): Класс индекса (с методами save и load)
+            build (() -> Any): Функция построения индекса
+
+        Returns:
+            HashIndex or InvertedIndex or IntervalTree: Индекс
+        """
+        if name in self.indexes:
+            return self.indexes[name]
+        with self._lock:
+            if name in self.indexes:
+                return self.indexes[name]
+            if self.directory is None:
+                index = build()
+            else:
+                index = self.load_or_build(os.path.join(self.directory, name), index_class, build)
+            self.indexes[name] = index
+            return index
+
+    @staticmethod
+    def load_or_build(directory, index_class, build):
+        """Загружает индекс из папки или строит и сохраняет его. Индекс сначала пишется во временную папку,
+        которая затем заменяет старую.
+
+        Args:
+            directory (str): Папка индекса
+            index_class (type): Класс индекса (с методами save и load)
+            build (() -> Any): Функция построения индекса
+
+        Returns:
+            HashIndex or InvertedIndex or IntervalTree: Индекс
+        """
+        try:
+            return index_class.load(directory)
+        except (OSError, ValueError):
+            index = build()
+        temp_directory = f'{directory}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(temp_directory, exist_ok=True)
+            index.save(temp_directory)
+            shutil.rmtree(directory, ignore_errors=True)
+            os.replace(temp_directory, directory)
+        except OSError:
+            shutil.rmtree(temp_directory, ignore_errors=True)
+        return index
@@ -6,19 +6,21 @@ class Program:
     """Класс для выбора и запуска программы.
 
     Attributes:
-        type (string): Тип программы (Вакансии/Статистика)
-        program (InputConnect or Report): Выбранная программа
+        type (string): Тип программы (Вакансии/Статистика/Пакетная статистика)
+        program (InputConnect or Report or BatchReport): Выбранная программа
     """
     def __init__(self):
         """Инициализирует объект Program, валидирует выбор программы.
 
         """
         print('Привет!')
-        self.type = input('Выберите программу (Вакансии/Статистика): ')
+        self.type = input('Выберите программу (Вакансии/Статистика/Пакетная статистика): ')
         if self.type == 'Вакансии':
             self.program = vacancies.InputConnect()
         elif self.type == 'Статистика':
             self.program = statistics.Report()
+        elif self.type == 'Пакетная статистика':
+            self.program = statistics.BatchReport()
         else:
             print('Некорректная программа!')
 
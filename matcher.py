@@ -0,0 +1,73 @@
+from collections import deque
+
+
+class ProfessionMatcher:
+    """Класс для поиска нескольких названий профессий в строке за один проход (алгоритм Ахо-Корасик).
+    Время поиска зависит от длины строки и количества совпадений, но не от количества профессий.
+
+    Attributes:
+        patterns (list[str]): Названия профессий
+        transitions (list[dict[str, int]]): Переходы бора
+        fail (list[int]): Суффиксные ссылки
+        output (list[tuple[str]]): Названия, которые заканчиваются в каждом состоянии
+    """
+    def __init__(self, patterns):
+        """Инициализирует объект ProfessionMatcher: строит бор и суффиксные ссылки.
+
+        Args:
+            patterns (Iterable[str]): Названия профессий
+
+        >>> sorted(ProfessionMatcher(['Аналитик', 'аналитик', 'Программист']).find('Web-программист, аналитик'))
+        ['аналитик']
+        >>> ProfessionMatcher(['he', 'she', 'his', 'hers']).find('ushers') == {'he', 'she', 'hers'}
+        True
+        """
+        self.patterns = list(dict.fromkeys(patterns))
+        self.transitions = [{}]
+        self.fail = [0]
+        output = [[]]
+        for pattern in self.patterns:
+            state = 0
+            for char in pattern:
+                if char not in self.transitions[state]:
+                    self.transitions.append({})
+                    self.fail.append(0)
+                    output.append([])
+                    self.transitions[state][char] = len(self.transitions) - 1
+                state = self.transitions[state][char]
+            output[state].append(pattern)
+
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, target in self.transitions[state].items():
+                queue.append(target)
+                fail = self.fail[state]
+                while fail and char not in self.transitions[fail]:
+                    fail = self.fail[fail]
+                self.fail[target] = self.transitions[fail].get(char, 0)
+                output[target].extend(output[self.fail[target]])
+        self.output = [tuple(names) for names in output]
+
+    def find(self, text):
+        """Ищет в строке все названия профессий (аналог `name in text` для каждого названия).
+
+        Args:
+            text (str): Строка, например название вакансии
+
+        Returns:
+            set[str]: Найденные названия профессий
+
+        >>> ProfessionMatcher(['', 'abc']).find('xyz')
+        {''}
+        """
+        transitions, fail, output = self.transitions, self.fail, self.output
+        found = set(output[0])
+        state = 0
+        for char in text:
+            while state and char not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
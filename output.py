@@ -0,0 +1,174 @@
+import csv
+import json
+import sys
+
+import prettytable
+
+
+class RowWriter:
+    """Базовый класс для потокового вывода строк таблицы: строки записываются по одной, по мере получения,
+    и не накапливаются в памяти.
+
+    Attributes:
+        header (list[str]): Заголовки всех столбцов строки
+        fields (list[str]): Заголовки выводимых столбцов
+        file (TextIO): Файл для вывода
+        count (int): Количество записанных строк
+    """
+    def __init__(self, header, fields, file=None):
+        """Инициализирует объект RowWriter.
+
+        Args:
+            header (list[str]): Заголовки всех столбцов строки
+            fields (list[str]): Заголовки выводимых столбцов
+            file (TextIO or None): Файл для вывода (None - стандартный вывод)
+        """
+        self.header = header
+        self.fields = fields
+        self.file = sys.stdout if file is None else file
+        self.count = 0
+        self._indexes = [header.index(field) for field in fields]
+
+    def select(self, row):
+        """Оставляет в строке только выводимые столбцы.
+
+        Args:
+            row (list): Строка со всеми столбцами
+
+        Returns:
+            list: Значения выводимых столбцов
+        """
+        return [row[i] for i in self._indexes]
+
+    def write(self, row):
+        """Записывает строку.
+
+        Args:
+            row (list): Строка со всеми столбцами
+        """
+        self.count += 1
+
+    def close(self):
+        """Завершает вывод.
+
+        """
+
+    def write_rows(self, rows):
+        """Записывает все строки и завершает вывод.
+
+        Args:
+            rows (Iterable[list]): Строки со всеми столбцами
+
+        Returns:
+            int: Количество записанных строк
+        """
+        for row in rows:
+            self.write(row)
+        self.close()
+        return self.count
+
+
+class TableWriter(RowWriter):
+    """Класс для вывода таблицы prettytable по страницам: каждые page_size строк печатаются отдельной таблицей,
+    поэтому память ограничена размером страницы. Если строк не больше page_size, вывод совпадает с одной
+    общей таблицей.
+
+    Attributes:
+        page_size (int): Количество строк на странице
+        empty_message (str): Сообщение, если не было ни одной строки
+    """
+    empty_message = 'Ничего не найдено'
+
+    def __init__(self, header, fields, file=None, page_size=1000):
+        """Инициализирует объект TableWriter.
+
+        Args:
+            header (list[str]): Заголовки всех столбцов строки
+            fields (list[str]): Заголовки выводимых столбцов
+            file (TextIO or None): Файл для вывода (None - стандартный вывод)
+            page_size (int): Количество строк на странице
+        """
+        super().__init__(header, fields, file)
+        self.page_size = page_size
+        self._page = []
+
+    def write(self, row):
+        """Добавляет строку на страницу и печатает страницу, если она заполнена.
+
+        Args:
+            row (list): Строка со всеми столбцами
+        """
+        super().write(row)
+        self._page.append(row)
+        if len(self._page) >= self.page_size:
+            self.flush()
+
+    def flush(self):
+        """Печатает накопленную страницу.
+
+        """
+        if len(self._page) == 0:
+            return
+        table = prettytable.PrettyTable()
+        table.hrules = prettytable.ALL
+        table.align = 'l'
+        table.field_names = self.header
+        table.max_width = 20
+        table.add_rows(self._page)
+        print(table.get_string(fields=self.fields), file=self.file)
+        self._page = []
+
+    def close(self):
+        """Печатает последнюю страницу или сообщение, что ничего не найдено.
+
+        """
+        if self.count == 0:
+            print(self.empty_message, file=self.file)
+        self.flush()
+
+
+class CsvWriter(RowWriter):
+    """Класс для вывода строк в формате csv (первая строка - заголовки выводимых столбцов).
+
+    """
+    def __init__(self, header, fields, file=None):
+        """Инициализирует объект CsvWriter и записывает заголовки.
+
+        Args:
+            header (list[str]): Заголовки всех столбцов строки
+            fields (list[str]): Заголовки выводимых столбцов
+            file (TextIO or None): Файл для вывода (None - стандартный вывод)
+        """
+        super().__init__(header, fields, file)
+        self._writer = csv.writer(self.file)
+        self._writer.writerow(fields)
+
+    def write(self, row):
+        """Записывает строку.
+
+        Args:
+            row (list): Строка со всеми столбцами
+        """
+        super().write(row)
+        self._writer.writerow(self.select(row))
+
+
+class JsonLinesWriter(RowWriter):
+    """Класс для вывода строк в формате JSON Lines: каждая строка - json-объект {заголовок: значение}.
+
+    """
+    def write(self, row):
+        """Записывает строку.
+
+        Args:
+            row (list): Строка со всеми столбцами
+        """
+        super().write(row)
+        self.file.write(json.dumps(dict(zip(self.fields, self.select(row))), ensure_ascii=False) + '\n')
+
+
+writers = {
+    'table': TableWriter,
+    'csv': CsvWriter,
+    'jsonl': JsonLinesWriter,
+}
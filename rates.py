@@ -0,0 +1,210 @@
+import csv
+import os
+
+import numpy as np
+
+DEFAULT_RATES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '3.3.X', '1', 'currencies.csv')
+
+currency_to_rub = {
+    "AZN": 35.68,
+    "BYR": 23.91,
+    "EUR": 59.90,
+    "GEL": 21.74,
+    "KGS": 0.76,
+    "KZT": 0.13,
+    "RUR": 1,
+    "UAH": 1.64,
+    "USD": 60.66,
+    "UZS": 0.0055,
+}
+
+
+def get_month(published_at):
+    """Переводит дату публикации в номер месяца (год * 12 + месяц - 1).
+
+    Args:
+        published_at (str): Дата и время публикации
+
+    Returns:
+        int: Номер месяца
+
+    >>> get_month('2022-06-21T17:33:46+0300')
+    24269
+    """
+    return int(published_at[:4]) * 12 + int(published_at[5:7]) - 1
+
+
+class RateTable:
+    """Класс для таблицы курсов валют по месяцам. Курсы хранятся в плотном массиве (месяц × валюта), поэтому
+    курс находится по двум индексам за O(1), а массив сумм переводится в рубли одной векторной операцией (convert).
+    Для месяцев до первого и после последнего месяца таблицы берется ближайший месяц. Для валют, которых нет
+    в файле курсов, во всех месяцах стоит постоянный курс из currency_to_rub.
+
+    Attributes:
+        first_month (int): Номер первого месяца таблицы (см. get_month)
+        currencies (list[str]): Коды валют (столбцы таблицы)
+        codes (dict[str, int]): Номера столбцов валют
+        rates (np.ndarray): Курсы валют (строки - месяцы, столбцы - валюты)
+        fixed_rates (np.ndarray): Постоянные курсы валют (для сумм без даты)
+    """
+    _default = None
+
+    def __init__(self, first_month, currencies, rates, fixed_rates):
+        """Инициализирует объект RateTable.
+
+        Args:
+            first_month (int): Номер первого месяца таблицы
+            currencies (list[str]): Коды валют
+            rates (np.ndarray): Курсы валют (строки - месяцы, столбцы - валюты)
+            fixed_rates (np.ndarray): Постоянные курсы валют
+        """
+        self.first_month = first_month
+        self.currencies = list(currencies)
+        self.codes = {currency: i for i, currency in enumerate(self.currencies)}
+        self.rates = rates
+        self.fixed_rates = fixed_rates
+        self._rows = rates.tolist()
+        self._fixed = fixed_rates.tolist()
+
+    @classmethod
+    def from_fixed(cls, fixed=currency_to_rub):
+        """Создает таблицу из одного месяца с постоянными курсами.
+
+        Args:
+            fixed (dict[str, float]): Постоянные курсы валют
+
+        Returns:
+            RateTable: Таблица курсов
+
+        >>> RateTable.from_fixed().get_rate('EUR', '2010-01-15T10:00:00+0300')
+        59.9
+        """
+        fixed_rates = np.array(list(fixed.values()), dtype=np.float64)
+        return cls(0, list(fixed), fixed_rates.reshape(1, -1), fixed_rates)
+
+    @classmethod
+    def from_csv(cls, file_name=DEFAULT_RATES_FILE, fixed=currency_to_rub):
+        """Читает таблицу курсов в формате currencies.csv: столбец date (ММ/ГГГГ) и столбцы валют. Пропущенные
+        месяцы заполняются курсами предыдущего месяца, пустые значения - постоянными курсами.
+
+        Args:
+            file_name (str): Название файла
+            fixed (dict[str, float]): Постоянные курсы валют
+
+        Returns:
+            RateTable: Таблица курсов
+        """
+        with open(file_name, newline='', encoding='utf-8-sig') as file:
+            reader = csv.reader(file)
+            header = next(reader, [])
+            months = {}
+            for row in reader:
+                if len(row) == len(header) and len(row) > 1:
+                    month, year = row[0].split('/')
+                    months[int(year) * 12 + int(month) - 1] = row[1:]
+        if len(months) == 0:
+            return cls.from_fixed(fixed)
+        currencies = list(dict.fromkeys(list(fixed) + header[1:]))
+        fixed_rates = np.array([fixed.get(currency, np.nan) for currency in currencies], dtype=np.float64)
+        first_month, last_month = min(months), max(months)
+        rates = np.tile(fixed_rates, (last_month - first_month + 1, 1))
+        codes = [currencies.index(currency) for currency in header[1:]]
+        values = None
+        for i in range(len(rates)):
+            values = months.get(first_month + i, values)
+            for code, value in zip(codes, values):
+                if value != '':
+                    rates[i, code] = float(value)
+        fixed_rates = np.where(np.isnan(fixed_rates), rates[-1], fixed_rates)
+        return cls(first_month, currencies, rates, fixed_rates)
+
+    @classmethod
+    def get_default(cls):
+        """Возвращает общую таблицу курсов из DEFAULT_RATES_FILE. Файл читается один раз на процесс, если его нет -
+        используются постоянные курсы.
+
+        Returns:
+            RateTable: Таблица курсов
+        """
+        if cls._default is None:
+            try:
+                cls._default = cls.from_csv()
+            except OSError:
+                cls._default = cls.from_fixed()
+        return cls._default
+
+    def get_currency_index(self, currency):
+        """Возвращает номер столбца валюты.
+
+        Args:
+            currency (str): Код валюты
+
+        Returns:
+            int: Номер столбца
+
+        Raises:
+            KeyError: Валюты нет в таблице
+        """
+        return self.codes[currency]
+
+    def get_month_index(self, month):
+        """Возвращает номер строки месяца (ближайшего месяца, если месяц вне таблицы).
+
+        Args:
+            month (int): Номер месяца (см. get_month)
+
+        Returns:
+            int: Номер строки
+        """
+        return min(max(month - self.first_month, 0), len(self._rows) - 1)
+
+    def get_month_indexes(self, months):
+        """Возвращает номера строк для массива месяцев.
+
+        Args:
+            months (np.ndarray): Номера месяцев
+
+        Returns:
+            np.ndarray: Номера строк
+        """
+        return np.clip(np.asarray(months, dtype=np.int64) - self.first_month, 0, len(self._rows) - 1)
+
+    def get_rate(self, currency, published_at=None):
+        """Возвращает курс валюты за месяц публикации.
+
+        Args:
+            currency (str): Код валюты
+            published_at (str or None): Дата публикации (None - постоянный курс)
+
+        Returns:
+            float: Стоимость единицы валюты в рублях
+
+        Raises:
+            KeyError: Валюты нет в таблице
+
+        >>> RateTable.get_default().get_rate('RUR', '2022-06-21T17:33:46+0300')
+        1.0
+        >>> RateTable.get_default().get_rate('USD')
+        60.66
+        """
+        code = self.codes[currency]
+        if published_at is None:
+            return self._fixed[code]
+        return self._rows[self.get_month_index(get_month(published_at))][code]
+
+    def convert(self, month_idx, currency_idx, amount):
+        """Переводит суммы в рубли: каждая сумма умножается на курс из строки month_idx и столбца currency_idx.
+
+        Args:
+            month_idx (np.ndarray or int): Номера строк (см. get_month_indexes)
+            currency_idx (np.ndarray or int): Номера столбцов валют
+            amount (np.ndarray or float): Суммы в валюте
+
+        Returns:
+            np.ndarray or float: Суммы в рублях
+
+        >>> table = RateTable.from_fixed()
+        >>> table.convert(np.array([0, 0]), np.array([table.codes['RUR'], table.codes['KZT']]), np.array([100.0, 100.0]))
+        array([100.,  13.])
+        """
+        return amount * self.rates[month_idx, currency_idx]
@@ -0,0 +1,349 @@
+import argparse
+import json
+import os
+import socketserver
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from indexes import VacancyIndex
+from vacancies import ColumnStatistics, DataSet, InputConnect, InputError
+
+Snapshot = namedtuple('Snapshot', ['stamp', 'vacancies', 'index'])
+
+
+def get_stamp(file_name):
+    """Возвращает отметку версии файла: по ней сервер понимает, что файл изменился.
+
+    Args:
+        file_name (str): Название файла
+
+    Returns:
+        tuple[int, int]: Размер файла и время изменения в наносекундах
+    """
+    stat = os.stat(file_name)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class VacancyService:
+    """Класс для ответов на запросы к вакансиям одного файла. Файл читается один раз: вакансии (Vacancy) и
+    индексы кеша (VacancyIndex) хранятся в памяти, поэтому запрос стоит только фильтрации, сортировки и вывода.
+    Если файл изменился, вакансии загружаются заново и подменяются целиком: запросы, начатые до подмены,
+    дорабатывают со старыми данными.
+
+    Attributes:
+        file_name (str): Название файла
+        interval (float): Период проверки файла на изменения в секундах
+        use_cache (bool): Читать вакансии из колоночного кеша файла и отвечать по его индексам
+        snapshot (Snapshot): Загруженные вакансии
+    """
+    def __init__(self, file_name, interval=1.0, use_cache=True):
+        """Инициализирует объект VacancyService и загружает файл.
+
+        Args:
+            file_name (str): Название файла
+            interval (float): Период проверки файла на изменения в секундах
+            use_cache (bool): Читать вакансии из колоночного кеша файла (False - всегда разбирать csv-файл)
+        """
+        self.file_name = file_name
+        self.interval = interval
+        self.use_cache = use_cache
+        self.snapshot = self.load()
+        self._stopped = threading.Event()
+
+    def load(self):
+        """Читает файл в память. Столбцы кеша читаются в память целиком (см. ColumnStore.preload), а индексы
+        строятся только в памяти: при подмене данных кеш рядом с файлом перестраивается, и запросы, которые
+        дорабатывают со старыми данными, не должны читать или дописывать новый кеш.
+
+        Returns:
+            Snapshot: Загруженные вакансии
+        """
+        stamp = get_stamp(self.file_name)
+        data = DataSet(self.file_name)
+        store = data.get_store() if self.use_cache else None
+        if store is None:
+            data.get_data(data.read_csv())
+            return Snapshot(stamp, data.vacancies_objects, None)
+        store.preload()
+        data.get_data(store.rows())
+        return Snapshot(stamp, data.vacancies_objects, VacancyIndex(store, persistent=False))
+
+    def reload(self):
+        """Загружает файл заново, если он изменился. Если новый файл прочитать не удалось, остаются старые данные.
+
+        Returns:
+            bool: Данные были заменены
+        """
+        try:
+            if get_stamp(self.file_name) == self.snapshot.stamp:
+                return False
+            self.snapshot = self.load()
+        except (OSError, SystemExit):
+            return False
+        return True
+
+    def watch(self):
+        """Проверяет файл на изменения каждые interval секунд, пока не вызван stop.
+
+        """
+        while not self._stopped.wait(self.interval):
+            self.reload()
+
+    def start(self):
+        """Запускает проверку файла на изменения в фоновом потоке.
+
+        Returns:
+            threading.Thread: Поток проверки
+        """
+        thread = threading.Thread(target=self.watch, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Останавливает проверку файла на изменения.
+
+        """
+        self._stopped.set()
+
+    def query(self, params):
+        """Отвечает на запрос. Параметры задаются так же, как при вводе с клавиатуры в InputConnect.
+
+        Args:
+            params (dict[str, str]): Параметры filter, sort, reverse, segment и fields (необязательные)
+
+        Returns:
+            dict: Количество найденных вакансий (count) и строки таблицы (rows) в виде словарей
+
+        Raises:
+            InputError: Параметры заданы некорректно
+        """
+        try:
+            connect = InputConnect.from_query(self.file_name, params.get('filter', ''), params.get('sort', ''),
+                                              params.get('reverse', ''), params.get('segment', ''),
+                                              params.get('fields', ''))
+        except ValueError:
+            raise InputError('Формат ввода некорректен')
+        fields = connect.get_fields(connect.rus_dict)
+        snapshot = self.snapshot
+        data_vacancies = self.filter(connect, snapshot)
+        result = connect.get_result(connect.get_sorted(data_vacancies))
+        header = list(connect.rus_dict.values())
+        rows = [{field: value for field, value in zip(header, row) if field in fields} for row in result]
+        return {'count': len(data_vacancies), 'rows': rows}
+
+    @staticmethod
+    def filter(connect, snapshot):
+        """Отбирает вакансии, прошедшие фильтр запроса: по индексам, если они есть для всех условий,
+        иначе проверкой каждой вакансии в порядке условий по статистике столбцов (см. ColumnStatistics).
+
+        Args:
+            connect (InputConnect): Параметры запроса
+            snapshot (Snapshot): Загруженные вакансии
+
+        Returns:
+            list[Vacancy]: Новый список вакансий (его можно сортировать, не затрагивая загруженные данные)
+        """
+        if connect._filter == True:
+            return list(snapshot.vacancies)
+        if snapshot.index is not None:
+            positions = connect._filter.get_positions(snapshot.index)
+            if positions is not None:
+                return [snapshot.vacancies[i] for i in positions.tolist()]
+            connect._filter.plan(ColumnStatistics(snapshot.index.store))
+        return connect.filter_vacs(snapshot.vacancies)
+
+
+class WorkerPoolMixIn:
+    """Примесь к socketserver: запросы обрабатываются пулом из workers потоков, а не потоком на каждый запрос.
+
+    Attributes:
+        workers (int): Количество потоков
+    """
+    workers = 8
+
+    def process_request(self, request, client_address):
+        """Передает запрос в пул потоков.
+
+        Args:
+            request (socket.socket): Соединение
+            client_address (Any): Адрес клиента
+        """
+        if not hasattr(self, 'executor'):
+            self.executor = ThreadPoolExecutor(self.workers)
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        """Обрабатывает запрос в потоке пула.
+
+        Args:
+            request (socket.socket): Соединение
+            client_address (Any): Адрес клиента
+        """
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        """Закрывает сокет и дожидается обработки начатых запросов.
+
+        """
+        super().server_close()
+        if hasattr(self, 'executor'):
+            self.executor.shutdown(wait=True)
+
+
+class PoolHTTPServer(WorkerPoolMixIn, HTTPServer):
+    """HTTP-сервер на TCP-сокете с пулом потоков.
+
+    Attributes:
+        service (VacancyService): Вакансии, на которые отвечает сервер
+    """
+
+
+class PoolUnixHTTPServer(WorkerPoolMixIn, socketserver.UnixStreamServer):
+    """HTTP-сервер на Unix-сокете с пулом потоков.
+
+    Attributes:
+        service (VacancyService): Вакансии, на которые отвечает сервер
+    """
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """Обработчик HTTP-запросов. GET /query?filter=...&sort=... или POST /query с json-объектом параметров
+    возвращает json со строками таблицы, GET /health - количество загруженных вакансий.
+
+    """
+    def do_GET(self):
+        """Обрабатывает GET-запрос.
+
+        """
+        url = urlsplit(self.path)
+        if url.path == '/health':
+            snapshot = self.server.service.snapshot
+            self.send_json(200, {'file': self.server.service.file_name, 'vacancies': len(snapshot.vacancies)})
+        elif url.path == '/query':
+            self.answer(dict(parse_qsl(url.query, keep_blank_values=True)))
+        else:
+            self.send_json(404, {'error': 'Неизвестный адрес'})
+
+    def do_POST(self):
+        """Обрабатывает POST-запрос.
+
+        """
+        if urlsplit(self.path).path != '/query':
+            self.send_json(404, {'error': 'Неизвестный адрес'})
+            return
+        try:
+            params = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        except ValueError:
+            self.send_json(400, {'error': 'Тело запроса должно быть json-объектом'})
+            return
+        if not isinstance(params, dict):
+            self.send_json(400, {'error': 'Тело запроса должно быть json-объектом'})
+            return
+        self.answer({key: str(value) for key, value in params.items()})
+
+    def answer(self, params):
+        """Отвечает на запрос к вакансиям. Некорректные параметры - ответ 400, любая другая ошибка - ответ 500.
+
+        Args:
+            params (dict[str, str]): Параметры запроса
+        """
+        start = time.perf_counter()
+        try:
+            result = self.server.service.query(params)
+        except InputError as error:
+            self.send_json(400, {'error': str(error)})
+            return
+        except Exception as error:
+            self.log_error('Ошибка запроса %r: %r', params, error)
+            self.send_json(500, {'error': 'Внутренняя ошибка сервера'})
+            return
+        result['time'] = round(time.perf_counter() - start, 6)
+        self.send_json(200, result)
+
+    def send_json(self, code, data):
+        """Отправляет ответ в формате json.
+
+        Args:
+            code (int): Код ответа
+            data (dict): Данные ответа
+        """
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        """Возвращает адрес клиента для журнала (у клиентов Unix-сокета адреса нет).
+
+        Returns:
+            str: Адрес клиента
+        """
+        if isinstance(self.client_address, tuple):
+            return self.client_address[0]
+        return 'unix'
+
+
+def create_server(service, host='127.0.0.1', port=8000, socket_path=None, workers=8):
+    """Создает сервер для ответов на запросы к вакансиям.
+
+    Args:
+        service (VacancyService): Вакансии
+        host (str): Адрес TCP-сокета
+        port (int): Порт TCP-сокета (0 - любой свободный)
+        socket_path (str or None): Путь к Unix-сокету (если задан, TCP-сокет не используется)
+        workers (int): Количество потоков
+
+    Returns:
+        PoolHTTPServer or PoolUnixHTTPServer: Сервер
+    """
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = PoolUnixHTTPServer(socket_path, QueryHandler)
+    else:
+        server = PoolHTTPServer((host, port), QueryHandler)
+    server.workers = workers
+    server.service = service
+    return server
+
+
+def main():
+    """Загружает файл и отвечает на запросы, пока сервер не остановлен (Ctrl+C).
+
+    """
+    parser = argparse.ArgumentParser(description='Сервер запросов к вакансиям')
+    parser.add_argument('file', help='csv-файл с вакансиями')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--socket', help='путь к Unix-сокету вместо TCP')
+    parser.add_argument('--workers', type=int, default=8, help='количество потоков для запросов')
+    parser.add_argument('--interval', type=float, default=1.0, help='период проверки файла на изменения (с)')
+    parser.add_argument('--no-cache', action='store_true', help='не читать и не записывать колоночный кеш')
+    args = parser.parse_args()
+    service = VacancyService(args.file, args.interval, not args.no_cache)
+    service.start()
+    server = create_server(service, args.host, args.port, args.socket, args.workers)
+    print(f'Загружено вакансий: {len(service.snapshot.vacancies)}. Сервер запущен: '
+          f'{args.socket or f"http://{args.host}:{server.server_address[1]}"}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,31 @@
+import contextlib
+import csv
+import os
+import shutil
+import io
+import json
+import sqlite3
+import tempfile
+import threading
 import unittest
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import urlopen
 
+import numpy as np
+
+import benchmark
+import divider
+import output
+import server
+import skills
 import statistics
-from vacancies import InputConnect, Vacancy
+import vacancies
+from column_cache import ColumnCache
+from columnar import VacancyColumns
+from rates import RateTable
+from sketch import QuantileSketch
+from vacancies import DataSet, InputConnect, InputError, Vacancy
 
 
 class InputConnectTests(unittest.TestCase):
@@ -59,19 +83,642 @@ class VacancyTest(unittest.TestCase):
                 'key_skills': "Программирование", 'experience_id': 'noExperience', 'premium': 'True',
                 'employer_name': "URFU", 'salary_from': '100000', 'salary_to': '150000', 'salary_gross': 'True',
                 'salary_currency': "RUR", 'area_name': 'Ekat', 'published_at': "2022-06-21T17:33:46+0300"}
-        name = 'Программист'
-        vac = statistics.Vacancy(dict, name)
+        vac = statistics.Vacancy(dict)
 
         self.assertEqual(vac.name, 'Программист')
         self.assertEqual(vac.year, 2022)
         self.assertEqual(vac.salary, 125000.0)
 
-        self.assertEqual(statistics.DataSet.salary_by_year[vac.year], 125000.0)
-        self.assertEqual(statistics.DataSet.p_name_salary_by_year[vac.year], 125000.0)
-        self.assertEqual(statistics.DataSet.vacancies_by_year[vac.year], 1)
-        self.assertEqual(statistics.DataSet.p_name_vacancies_by_year[vac.year], 1)
-        self.assertEqual(statistics.DataSet.vacancies_by_city['Ekat'], 1)
-        self.assertEqual(statistics.DataSet.salary_by_city['Ekat'], 125000.0)
+        accumulator = statistics.Accumulator('Программист')
+        accumulator.add(vac)
+        self.assertEqual(accumulator.salary_by_year[vac.year], 125000.0)
+        self.assertEqual(accumulator.p_name_salary_by_year[vac.year], 125000.0)
+        self.assertEqual(accumulator.vacancies_by_year[vac.year], 1)
+        self.assertEqual(accumulator.p_name_vacancies_by_year[vac.year], 1)
+        self.assertEqual(accumulator.vacancies_by_city['Ekat'], 1)
+        self.assertEqual(accumulator.salary_by_city['Ekat'], 125000.0)
+
+
+class RawFilterTests(unittest.TestCase):
+    vac = {'name': '<b>Программист</b>', 'description': '<p>Описание</p>', 'key_skills': 'Python\nSQL\nGit',
+           'experience_id': 'between1And3', 'premium': 'False', 'employer_name': 'URFU', 'salary_from': '100000.0',
+           'salary_to': '150000.0', 'salary_gross': 'True', 'salary_currency': 'USD', 'area_name': 'Ekat',
+           'published_at': '2022-06-21T17:33:46+0300'}
+    values = {'Название': ['Программист', '<b>Программист</b>'], 'Навыки': ['Python, Git', 'Python, Java'],
+              'Опыт работы': ['От 1 года до 3 лет', 'Нет опыта'], 'Премиум-вакансия': ['Нет', 'Да'],
+              'Компания': ['URFU', 'Яндекс'], 'Оклад': ['120000', '99999.5'],
+              'Идентификатор валюты оклада': ['Доллары', 'Рубли'], 'Название региона': ['Ekat', 'Москва'],
+              'Дата публикации вакансии': ['21.06.2022', '2022-06-21']}
+
+    def test_raw_filters(self):
+        self.assertEqual(InputConnect.raw_filters_dict.keys(), InputConnect.filters_dict.keys())
+        for key, values in self.values.items():
+            for value, expected in zip(values, (True, False)):
+                self.assertEqual(InputConnect.raw_filters_dict[key](self.vac, value), expected, key)
+                self.assertEqual(InputConnect.filters_dict[key](Vacancy(self.vac), value), expected, key)
+
+
+class CompoundFilterTests(unittest.TestCase):
+    def get_filter(self, string):
+        connect = InputConnect.__new__(InputConnect)
+        connect._filter = string
+        connect.validate_filter()
+        return connect._filter
+
+    def test_matches(self):
+        vac = Vacancy(RawFilterTests.vac)
+        for string, expected in (('Название региона: Ekat; Навыки: Python, Git', True),
+                                 ('Название региона: Москва; Навыки: Python, Git', False),
+                                 ('Название региона: Москва | Компания: URFU', True),
+                                 ('Оклад: 150000 - 200000', True), ('Оклад: 150001 - 200000', False),
+                                 ('Дата публикации вакансии: 01.06.2022 - 21.06.2022', True),
+                                 ('Дата публикации вакансии: 22.06.2022 - 31.12.2022', False)):
+            _filter = self.get_filter(string)
+            self.assertEqual(_filter.matches_raw(RawFilterTests.vac), expected, string)
+            self.assertEqual(_filter.matches(vac), expected, string)
+
+    def test_plan(self):
+        _filter = self.get_filter('Навыки: Python; Название: Программист; Компания: URFU | Название региона: Ekat')
+        self.assertEqual([[condition.key for condition in group] for group in _filter.groups],
+                         [['Название региона'], ['Компания', 'Название', 'Навыки']])
+
+    def test_separators_in_value(self):
+        _filter = self.get_filter('Компания: Рога; Копыта | Ко; Название региона: Ekat | Компания: URFU')
+        self.assertEqual([[(condition.key, condition.value) for condition in group] for group in _filter.groups],
+                         [[('Компания', 'URFU')], [('Компания', 'Рога; Копыта | Ко'), ('Название региона', 'Ekat')]])
+        self.assertRaises(InputError, self.get_filter, 'Зарплата: 100 | Компания: URFU')
+        self.assertRaises(InputError, self.get_filter, 'Оклад: abc')
+
+
+class SortKeyTests(unittest.TestCase):
+    def test_keys(self):
+        vac = Vacancy(dict(RawFilterTests.vac, published_at='2022-06-21T17:33:46+0500'))
+        self.assertEqual(vac.published_epoch, 1655814826)
+        self.assertEqual(vac.salary_average, vac.salary.get_average())
+        self.assertEqual(vac.experience_rank, InputConnect.experience_weight[vac.experience_id])
+        self.assertEqual(vac.skills_count, len(vac.skills))
+        with self.assertRaises(AttributeError):
+            vac.extra = 1
+
+
+class CleaningTests(unittest.TestCase):
+    texts = ['<p> </p> <p><strong>Вам предстоит:</strong></p> <ul> <li>Работать', '<p>', 'a <b\nc> d',
+             '<p>' + 'Разработка <b>сервисов</b>. ' * 20 + '</p>', '  <br/>x' * 60, '<' * 300 + '>' * 300]
+
+    def test_matches_remove_html(self):
+        expected = [vacancies.shortener(vacancies.remove_html(text)) for text in self.texts]
+        self.assertEqual([vacancies.clean_description(text) for text in self.texts], expected)
+        self.assertEqual(list(vacancies.clean_texts(self.texts * 3, vacancies.PARALLEL_CLEAN_ROWS, processes_count=2,
+                                                    batch_size=4)), expected * 3)
+
+    def test_cache_column(self):
+        directory = tempfile.mkdtemp()
+        try:
+            file_name = os.path.join(directory, 'vacancies.csv')
+            benchmark.generate_csv(file_name, 'vacancies', 200)
+            raw_rows = list(DataSet(file_name).read_cache())
+            self.assertNotIn('description_clean', ColumnCache(file_name).load().columns)
+            self.assertFalse(any('description_clean' in row for row in raw_rows))
+            DataSet.add_clean_descriptions(DataSet(file_name).get_store(), processes_count=1)
+            rows = list(DataSet(file_name).read_cache())
+            self.assertIn('description_clean', ColumnCache(file_name).load().meta['derived'])
+            self.assertEqual([{key: value for key, value in row.items() if key != 'description_clean'}
+                              for row in rows], raw_rows)
+            self.assertEqual([Vacancy(row).description for row in rows],
+                             [vacancies.shortener(vacancies.remove_html(row['description'])) for row in rows])
+        finally:
+            shutil.rmtree(directory)
+
+
+class TopKTests(unittest.TestCase):
+    def test_top_k_matches_sort(self):
+        vacs = [Vacancy(dict(RawFilterTests.vac, name=str(i), salary_from=str(i % 7 * 1000),
+                             experience_id=['noExperience', 'moreThan6'][i % 2])) for i in range(100)]
+        for sort in ('Оклад', 'Опыт работы', 'Название'):
+            for is_reverse in (False, True):
+                connect = InputConnect.__new__(InputConnect)
+                connect._sort, connect.is_reverse, connect.segment = sort, is_reverse, [3, 21]
+                expected = list(vacs)
+                connect.do_sort(expected)
+                self.assertEqual([vac.name for vac in connect.get_sorted(list(vacs))],
+                                 [vac.name for vac in expected[:20]])
+                self.assertEqual([row[0] for row in connect.get_result(expected)], list(range(3, 21)))
+
+
+class IndexTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, 'vacancies.csv')
+        benchmark.generate_csv(self.file_name, 'vacancies', 500)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_index_matches_scan(self):
+        data = DataSet(self.file_name)
+        connect = InputConnect.__new__(InputConnect)
+        for _filter in ('Название: Аналитик', 'Навыки: Python, SQL', 'Опыт работы: Нет опыта',
+                        'Премиум-вакансия: Да', 'Компания: Яндекс', 'Оклад: 150000',
+                        'Идентификатор валюты оклада: Доллары', 'Название региона: Москва',
+                        'Дата публикации вакансии: 01.01.2007', 'Навыки: Python, Фортран',
+                        'Название региона: Москва; Навыки: Python', 'Компания: Яндекс | Опыт работы: Нет опыта',
+                        'Оклад: 100000 - 150000; Название региона: Москва',
+                        'Дата публикации вакансии: 01.01.2007 - 31.12.2010 | Премиум-вакансия: Да'):
+            connect._filter = _filter
+            connect.validate_filter()
+            expected = list(data.read_cache(connect.get_raw_filter()))
+            for _ in range(2):
+                self.assertEqual(list(connect.read_vacancies(data)), expected, _filter)
+
+    def test_plan_statistics(self):
+        connect = InputConnect.__new__(InputConnect)
+        connect._filter = 'Премиум-вакансия: Да; Название региона: Москва'
+        connect.validate_filter()
+        self.assertEqual([condition.key for condition in connect._filter.groups[0]],
+                         ['Премиум-вакансия', 'Название региона'])
+        rows = list(connect.read_vacancies(DataSet(self.file_name)))
+        self.assertEqual([condition.key for condition in connect._filter.groups[0]],
+                         ['Название региона', 'Премиум-вакансия'])
+        self.assertEqual(rows, list(DataSet(self.file_name).read_cache(connect.get_raw_filter())))
+
+
+class OutputTests(unittest.TestCase):
+    header = ['№', 'Название', 'Оклад']
+    rows = [[1, 'Программист', '100 - 200'], [2, 'Аналитик, старший', '300 - 400'], [3, 'Тестировщик', '0 - 1']]
+
+    def write(self, writer_class, fields, **kwargs):
+        file = io.StringIO()
+        count = writer_class(self.header, fields, file, **kwargs).write_rows(iter(self.rows))
+        self.assertEqual(count, len(self.rows))
+        return file.getvalue()
+
+    def test_csv(self):
+        self.assertEqual(self.write(output.CsvWriter, ['№', 'Название']).splitlines(),
+                         ['№,Название', '1,Программист', '2,"Аналитик, старший"', '3,Тестировщик'])
+
+    def test_jsonl(self):
+        lines = self.write(output.JsonLinesWriter, ['Оклад']).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [{'Оклад': row[2]} for row in self.rows])
+
+    def test_pages(self):
+        table = self.write(output.TableWriter, self.header)
+        self.assertEqual(table.count('| № '), 1)
+        self.assertEqual(self.write(output.TableWriter, self.header, page_size=2).count('| № '), 2)
+        file = io.StringIO()
+        output.TableWriter(self.header, self.header, file).write_rows([])
+        self.assertEqual(file.getvalue(), 'Ничего не найдено\n')
+
+
+class SkillTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, 'vacancies.csv')
+        benchmark.generate_csv(self.file_name, 'vacancies', 400)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_parallel_matches_sequential(self):
+        expected = skills.SkillCounter(['Аналитик'])
+        for vac in DataSet(self.file_name).read_csv():
+            expected.add(vac)
+        result = skills.get_skill_stats(self.file_name, ['Аналитик'], processes_count=2, capacity=None)
+        self.assertEqual(result.get_report(5), expected.get_report(5))
+        self.assertEqual(result.pairs_by_year, expected.pairs_by_year)
+        self.assertEqual(sum(result.vacancies_by_year.values()), len(DataSet(self.file_name).read_csv()))
+
+    def test_pruning_error_bound(self):
+        exact = skills.get_skill_stats(self.file_name, processes_count=2, capacity=None)
+        pruned = skills.get_skill_stats(self.file_name, processes_count=2, capacity=20)
+        self.assertGreater(pruned.error, 0)
+        for year, pairs in pruned.pairs_by_year.items():
+            self.assertLessEqual(len(pairs), 20)
+            for pair, count in pairs.items():
+                self.assertTrue(count <= exact.pairs_by_year[year][pair] <= count + pruned.error)
+
+
+class ServerTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, 'vacancies.csv')
+        benchmark.generate_csv(self.file_name, 'vacancies', 300)
+        self.service = server.VacancyService(self.file_name)
+        self.server = server.create_server(self.service, port=0, workers=2)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.directory)
+
+    def get(self, query):
+        with urlopen(f'{self.url}/query?{query}') as response:
+            return json.loads(response.read())
+
+    def test_query(self):
+        connect = InputConnect.from_query(self.file_name, 'Название региона: Москва', 'Оклад', 'Да', '1 6')
+        data = DataSet(self.file_name)
+        data.get_data(data.read_csv())
+        expected = connect.get_result(connect.get_sorted(connect.filter_vacs(data.vacancies_objects)))
+        result = self.get(f'filter={quote("Название региона: Москва")}&sort={quote("Оклад")}&reverse={quote("Да")}'
+                          f'&segment=1+6&fields={quote("Название, Оклад")}')
+        self.assertEqual(result['rows'], [{'№': row[0], 'Название': row[1], 'Оклад': row[7]} for row in expected])
+        for query in (f'sort={quote("Зарплата")}', f'filter={quote("Оклад: abc")}'):
+            with self.assertRaises(HTTPError) as error:
+                self.get(query)
+            self.assertEqual(error.exception.code, 400)
+
+    def test_sort_by_currency(self):
+        connect = InputConnect.from_query(self.file_name, sort='Идентификатор валюты оклада')
+        currencies = [vacancies.Salary.currencies[vacancy.salary.salary_currency]
+                      for vacancy in connect.get_sorted(list(self.service.snapshot.vacancies))]
+        self.assertEqual(currencies, sorted(currencies))
+        self.assertEqual(self.get(f'sort={quote("Идентификатор валюты оклада")}')['count'], 300)
+
+    def test_internal_error(self):
+        def fail(params):
+            raise KeyError(params)
+        self.service.query = fail
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(HTTPError) as error:
+            self.get('')
+        self.assertEqual(error.exception.code, 500)
+        self.assertEqual(json.loads(error.exception.read()), {'error': 'Внутренняя ошибка сервера'})
+
+    def test_reload(self):
+        self.assertFalse(self.service.reload())
+        old_snapshot, old_count = self.service.snapshot, len(self.service.snapshot.vacancies)
+        benchmark.generate_csv(self.file_name, 'vacancies', 50, seed=2)
+        self.assertTrue(self.service.reload())
+        self.assertEqual(self.get('')['count'], len(list(DataSet(self.file_name).read_csv())))
+        connect = InputConnect.from_query(self.file_name, 'Название региона: Москва')
+        self.assertEqual(server.VacancyService.filter(connect, old_snapshot),
+                         connect.filter_vacs(old_snapshot.vacancies))
+        self.assertEqual(len(old_snapshot.vacancies), old_count)
+
+
+class AccumulatorTests(unittest.TestCase):
+    vac = {'name': 'Аналитик', 'salary_from': '100000', 'salary_to': '150000', 'salary_currency': 'RUR',
+           'area_name': 'Ekat', 'published_at': '2022-06-21T17:33:46+0300'}
+
+    def test_isolation(self):
+        first = statistics.DataSet('file', 'Аналитик')
+        second = statistics.DataSet('file', 'Программист')
+        first.get_data([self.vac])
+        second.get_data([self.vac, self.vac])
+        self.assertEqual(first.vacancies_by_year, {2022: 1})
+        self.assertEqual(first.p_name_vacancies_by_year, {2022: 1})
+        self.assertEqual(second.vacancies_by_year, {2022: 2})
+        self.assertEqual(second.p_name_vacancies_by_year, {})
+
+    def test_merge(self):
+        first = statistics.Accumulator('Аналитик')
+        second = statistics.Accumulator('Аналитик')
+        first.add(statistics.Vacancy(self.vac))
+        second.add(statistics.Vacancy(dict(self.vac, area_name='Москва')))
+        first.merge(second)
+        self.assertEqual(first.vacancies_by_year, {2022: 2})
+        self.assertEqual(first.salary_by_city, {'Ekat': 125000.0, 'Москва': 125000.0})
+        self.assertRaises(ValueError, first.merge, statistics.Accumulator('Программист'))
+
+
+class QuantileSketchTests(unittest.TestCase):
+    def test_merge(self):
+        whole, first, second = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for salary in range(0, 100000, 7):
+            whole.add(salary)
+            (first if salary % 2 else second).add(salary)
+        self.assertEqual(first.merge(second).get_quantiles(), whole.get_quantiles())
+        for estimate, exact in zip(whole.get_quantiles(), (24997, 49994, 89992)):
+            self.assertAlmostEqual(estimate, exact, delta=exact * 0.01)
+        self.assertEqual(QuantileSketch.from_dict(whole.to_dict()).get_quantiles(), whole.get_quantiles())
+
+
+class BatchDataSetTests(unittest.TestCase):
+    def test_batch_matches_single(self):
+        vacs = [{'name': name, 'salary_from': '100000', 'salary_to': salary_to, 'salary_currency': 'RUR',
+                 'area_name': 'Ekat', 'published_at': published_at}
+                for name, salary_to, published_at in [('Аналитик данных', '150000', '2021-06-21T17:33:46+0300'),
+                                                      ('Web-программист', '120000', '2022-06-21T17:33:46+0300'),
+                                                      ('Программист-аналитик', '200000', '2022-01-21T17:33:46+0300')]]
+        batch = statistics.BatchDataSet('file', ['Аналитик', 'аналитик', 'программист'])
+        batch.get_data(vacs)
+        for p_name in batch.p_names:
+            single = statistics.DataSet('file', p_name)
+            single.get_data(vacs)
+            self.assertEqual(batch.datasets[p_name].p_name_salary_by_year, single.p_name_salary_by_year)
+            self.assertEqual(batch.datasets[p_name].p_name_vacancies_by_year, single.p_name_vacancies_by_year)
+            self.assertEqual(batch.datasets[p_name].salary_by_city, single.salary_by_city)
+
+
+class ColumnarTests(unittest.TestCase):
+    def test_columnar_matches_rows(self):
+        vacs = [{'name': name, 'salary_from': '1000.5', 'salary_to': salary_to, 'salary_currency': currency,
+                 'area_name': city, 'published_at': published_at}
+                for name, salary_to, currency, city, published_at in [
+                    ('Программист', '3000', 'USD', 'Москва', '2022-06-21T17:33:46+0300'),
+                    ('Аналитик', '2000', 'RUR', 'Ekat', '2021-06-21T17:33:46+0300'),
+                    ('Аналитик данных', '5000', 'EUR', 'Москва', '2022-01-21T17:33:46+0300')]]
+        rows = statistics.DataSet('file', 'Аналитик')
+        rows.get_data(vacs)
+        columnar = statistics.DataSet('file', 'Аналитик')
+        columnar.get_data_columnar(vacs)
+        for name in ('salary_by_year', 'vacancies_by_year', 'p_name_salary_by_year', 'p_name_vacancies_by_year',
+                     'salary_by_city', 'vacancies_by_city', 'salary_quantiles_by_year',
+                     'p_name_salary_quantiles_by_year', 'salary_quantiles_by_city'):
+            self.assertEqual(list(getattr(rows, name).items()), list(getattr(columnar, name).items()))
+
+    def test_bucket_keys(self):
+        salaries = np.array([0.0, 1.0, 1500.5, 60000.0, 1500.5, 0.0, 60000.0, 1e7])
+        sketch = QuantileSketch()
+        self.assertEqual(VacancyColumns.get_bucket_keys(salaries).tolist(),
+                         [sketch.get_key(value) if value > 0 else 0 for value in salaries.tolist()])
+
+
+class RateTableTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, 'currencies.csv')
+        with open(self.file_name, 'w', encoding='utf-8') as file:
+            file.write('date,USD,EUR\n11/2021,70.0,80.0\n01/2022,75.0,\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_rates(self):
+        table = RateTable.from_csv(self.file_name)
+        self.assertEqual(table.get_rate('USD', '2021-12-21T17:33:46+0300'), 70.0)
+        self.assertEqual(table.get_rate('USD', '2022-01-21T17:33:46+0300'), 75.0)
+        self.assertEqual(table.get_rate('EUR', '2022-01-21T17:33:46+0300'), 59.9)
+        self.assertEqual(table.get_rate('USD', '2023-06-21T17:33:46+0300'), 75.0)
+        self.assertEqual(table.get_rate('USD', '2003-06-21T17:33:46+0300'), 70.0)
+        self.assertEqual(table.get_rate('KZT', '2022-01-21T17:33:46+0300'), 0.13)
+        self.assertEqual(table.get_rate('USD'), 60.66)
+        self.assertRaises(KeyError, table.get_rate, 'рубли')
+        months = table.get_month_indexes([24000, 24263, 24300])
+        currencies = [table.get_currency_index('USD')] * 3
+        self.assertEqual(table.convert(months, currencies, 2.0).tolist(), [140.0, 140.0, 150.0])
+
+    def test_salary_uses_month_rate(self):
+        vac = Vacancy({'name': 'Программист', 'description': '', 'key_skills': 'SQL', 'experience_id': 'noExperience',
+                       'premium': 'False', 'employer_name': 'URFU', 'salary_from': '100', 'salary_to': '200',
+                       'salary_gross': 'True', 'salary_currency': 'USD', 'area_name': 'Ekat',
+                       'published_at': '2010-01-21T17:33:46+0300'})
+        self.assertEqual(vac.salary_average, 150 * RateTable.get_default().get_rate('USD', vac.published_at))
+        self.assertNotEqual(vac.salary_average, 150 * RateTable.get_default().get_rate('USD'))
+
+
+class DatabaseTests(unittest.TestCase):
+    vacs = [{'name': name, 'salary_from': salary, 'salary_to': salary, 'salary_currency': 'RUR', 'area_name': city,
+             'published_at': published_at}
+            for name, salary, city, published_at in [
+                ('Аналитик', '100000.0', 'Москва', '2022-06-21T17:33:46+0300'),
+                ('Программист', '80000.0', 'Казань', '2021-06-21T17:33:46+0300'),
+                ('Системный аналитик', '120000.0', 'Москва', '2021-01-21T17:33:46+0300'),
+                ('Бизнес-Аналитик данных', '0.0', 'Ekat', '2022-01-21T17:33:46+0300')]]
+    fields = ('salary_by_year', 'vacancies_by_year', 'p_name_salary_by_year', 'p_name_vacancies_by_year',
+              'salary_by_city', 'vacancies_by_city', 'salary_quantiles_by_year', 'p_name_salary_quantiles_by_year',
+              'salary_quantiles_by_city')
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, 'vacancies.db')
+        connection = sqlite3.connect(self.file_name)
+        connection.execute('CREATE TABLE vacancies (name TEXT, salary REAL, area_name TEXT, published_at TEXT)')
+        connection.executemany('INSERT INTO vacancies VALUES (?, ?, ?, ?)',
+                               [(vac['name'], float(vac['salary_from']), vac['area_name'], vac['published_at'])
+                                for vac in self.vacs] + [('Аналитик', None, 'Москва', '2022-06-21T17:33:46+0300')])
+        connection.commit()
+        connection.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_sql_matches_rows(self):
+        self.assertTrue(statistics.is_database(self.file_name))
+        rows = statistics.DataSet('file', 'Аналитик')
+        rows.get_data(self.vacs)
+        sql = statistics.DataSet(self.file_name, 'Аналитик')
+        sql.get_data_sql()
+        for name in self.fields:
+            self.assertEqual(list(getattr(rows, name).items()), list(getattr(sql, name).items()))
+
+    def test_new_rows_update_name_tokens(self):
+        statistics.DataSet(self.file_name, 'Аналитик').get_data_sql()
+        connection = sqlite3.connect(self.file_name)
+        connection.execute("INSERT INTO vacancies VALUES ('Аналитик BI', 90000.0, 'Казань', "
+                           "'2020-06-21T17:33:46+0300')")
+        connection.commit()
+        connection.close()
+        batch = statistics.BatchDataSet(self.file_name, ['Аналитик', 'Программист'])
+        batch.get_data_sql()
+        self.assertEqual(list(batch.datasets['Аналитик'].p_name_vacancies_by_year.items()), [(2022, 2), (2020, 1)])
+        self.assertEqual(batch.datasets['Программист'].p_name_vacancies_by_year, {2021: 1})
+
+
+class DividerTests(unittest.TestCase):
+    header = ['name', 'description', 'area_name', 'published_at']
+    rows = [['Аналитик', 'Строка 1\nСтрока 2', 'Москва', '2022-06-21T17:33:46+0300'],
+            ['Программист', 'Язык "Python", "SQL"', 'Казань', '2021-06-21T17:33:46+0300'],
+            ['Тестировщик', '""\n"а,б"\n\n', 'Москва', '2022-05-21T17:33:46+0300'],
+            ['Аналитик данных', '', 'Санкт-Петербург', '2021-06-01T17:33:46+0300'],
+            ['Программист', 'Много\n"строк"\nв\nописании', 'Казань', '2022-06-01T17:33:46+0300']]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, 'vacancies.csv')
+        with open(self.file_name, 'w', newline='', encoding='utf-8-sig') as file:
+            writer = csv.writer(file)
+            writer.writerow(self.header)
+            writer.writerows(self.rows * 3)
+            file.write('Без,полей\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_chunks(self):
+        with open(self.file_name, newline='', encoding='utf-8-sig') as file:
+            expected = list(csv.reader(file))[1:]
+        size = os.path.getsize(self.file_name)
+        for chunks_count in (1, 2, 3, 7, 50):
+            for block_size in (1, 2, 5, 64, 1 << 20):
+                header, chunks = divider.get_chunks(self.file_name, chunks_count, block_size)
+                self.assertEqual(header, self.header)
+                self.assertLessEqual(len(chunks), chunks_count)
+                self.assertEqual(chunks[-1][1], size)
+                self.assertTrue(all(chunks[i][1] == chunks[i + 1][0] for i in range(len(chunks) - 1)))
+                rows = [row for start, end in chunks for row in divider.read_chunk(self.file_name, start, end)]
+                self.assertEqual(rows, expected, (chunks_count, block_size))
+
+    def test_find_record_end(self):
+        data = b'a,"x\n""y\n",b\nc,d\n'
+        file_name = os.path.join(self.directory, 'records.csv')
+        with open(file_name, 'wb') as file:
+            file.write(data)
+        with open(file_name, 'rb') as file:
+            for block_size in (1, 3, 1 << 20):
+                file.seek(0)
+                self.assertEqual(divider.find_record_end(file, 0, False, block_size), data.index(b'c'))
+                file.seek(4)
+                self.assertEqual(divider.find_record_end(file, 4, True, block_size), data.index(b'c'))
+                file.seek(data.index(b'c'))
+                self.assertEqual(divider.find_record_end(file, data.index(b'c'), False, block_size), len(data))
+
+    def test_csv_divider(self):
+        for by, get_key in divider.partition_keys.items():
+            directory = os.path.join(self.directory, by)
+            manifest = divider.csv_divider(self.file_name, by, directory, buffer_size=2)
+            self.assertEqual(divider.read_manifest(directory), manifest)
+            self.assertEqual((manifest['by'], manifest['header']), (by, self.header))
+            expected = {}
+            for row in self.rows * 3:
+                expected.setdefault(get_key(dict(zip(self.header, row))), []).append(row)
+            self.assertEqual({partition['key'] for partition in manifest['partitions']}, set(expected))
+            sizes = [partition['bytes'] for partition in manifest['partitions']]
+            self.assertEqual(sizes, sorted(sizes, reverse=True))
+            for partition in manifest['partitions']:
+                with open(partition['file'], newline='', encoding='utf-8-sig') as file:
+                    rows = list(csv.reader(file))
+                self.assertEqual(rows, [self.header] + expected[partition['key']])
+                self.assertEqual(partition['rows'], len(expected[partition['key']]))
+                self.assertEqual(partition['bytes'], os.path.getsize(partition['file']))
+
+
+class ColumnCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, 'vacancies.csv')
+        with open(self.file_name, 'w', encoding='utf-8-sig') as file:
+            file.write('name,salary_from,salary_to,salary_currency,area_name,published_at\n'
+                       'Аналитик,100.0,200.0,RUR,Москва,2022-06-21T17:33:46+0300\n'
+                       '"Программист, ""Python""",1000.0,,USD,Казань,2021-06-21T17:33:46+0300\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_cache(self):
+        cache = ColumnCache(self.file_name)
+        self.assertIsNone(cache.load())
+        cache.build()
+        store = cache.load()
+        self.assertEqual(len(store), 1)
+        self.assertEqual(list(store.rows()), [{'name': 'Аналитик', 'salary_from': 100.0, 'salary_to': 200.0,
+                                               'salary_currency': 'RUR', 'area_name': 'Москва',
+                                               'published_at': '2022-06-21T17:33:46+0300'}])
+        with open(self.file_name, 'a', encoding='utf-8') as file:
+            file.write('Аналитик,300.0,400.0,RUR,Москва,2022-07-21T17:33:46+0300\n')
+        self.assertIsNone(cache.load())
+        self.assertEqual(len(cache.get()), 2)
+
+    def test_broken_cache(self):
+        ColumnCache(self.file_name).build()
+        with open(os.path.join(self.file_name + '.cache', 'area_name.vocabulary.json'), 'w') as file:
+            file.write('[')
+        expected = statistics.DataSet(self.file_name, 'Аналитик')
+        expected.get_data(expected.read_rows())
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = statistics.Report(self.file_name, 'Аналитик', use_cache=True)
+        self.assertEqual(report.data.vacancies_by_city, expected.vacancies_by_city)
+        self.assertEqual(report.data.salary_by_year, expected.salary_by_year)
+
+    def test_invalid_number(self):
+        with open(self.file_name, 'a', encoding='utf-8') as file:
+            file.write('Аналитик,n/a,400.0,RUR,Москва,2022-07-21T17:33:46+0300\n')
+        with self.assertRaises(ValueError):
+            ColumnCache(self.file_name).build()
+        self.assertEqual(os.listdir(self.directory), ['vacancies.csv'])
+        data = DataSet(self.file_name)
+        self.assertIsNone(data.get_store())
+        self.assertEqual(len(list(data.read_cache())), 2)
+
+    def test_no_cache(self):
+        benchmark.generate_csv(self.file_name, 'vacancies', 50)
+        service = server.VacancyService(self.file_name, use_cache=False)
+        self.assertIsNone(service.snapshot.index)
+        connect = InputConnect.from_query(self.file_name, use_cache=False)
+        self.assertEqual(len(list(connect.read_vacancies(DataSet(self.file_name)))), 50)
+        self.assertEqual(os.listdir(self.directory), ['vacancies.csv'])
+
+
+class IncrementalTests(unittest.TestCase):
+    header = 'name,salary_from,salary_to,salary_currency,area_name,published_at\n'
+    rows = ['Аналитик,100.0,200.0,RUR,Москва,2022-06-21T17:33:46+0300\n',
+            'Программист,1000.0,2000.0,USD,Казань,2021-06-21T17:33:46+0300\n',
+            'Аналитик данных,300.0,400.0,EUR,Казань,2022-07-21T17:33:46+0300\n']
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, 'vacancies.csv')
+        self.checkpoint_file = os.path.join(self.directory, 'checkpoint.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, text, mode):
+        with open(self.file_name, mode, encoding='utf-8') as file:
+            file.write(text)
+
+    def test_append(self):
+        self.write(self.header + self.rows[0], 'w')
+        statistics.DataSet(self.file_name, 'Аналитик').get_data_incremental(self.checkpoint_file)
+        self.write(''.join(self.rows[1:]), 'a')
+        incremental = statistics.DataSet(self.file_name, 'Аналитик')
+        incremental.get_data_incremental(self.checkpoint_file)
+        full = statistics.DataSet(self.file_name, 'Аналитик')
+        full.get_data(full.read_rows())
+        self.assertEqual(incremental.salary_by_year, full.salary_by_year)
+        self.assertEqual(incremental.p_name_vacancies_by_year, {2022: 2})
+        self.assertEqual(incremental.vacancies_by_city, full.vacancies_by_city)
+
+    def test_partial_row(self):
+        self.write(self.header + self.rows[0] + self.rows[1][:20], 'w')
+        first = statistics.DataSet(self.file_name, 'Аналитик')
+        first.get_data_incremental(self.checkpoint_file)
+        self.assertEqual(first.vacancies_by_year, {2022: 1})
+        self.write(self.rows[1][20:] + '"Аналитик\nданных",300.0,400.0', 'a')
+        second = statistics.DataSet(self.file_name, 'Аналитик')
+        second.get_data_incremental(self.checkpoint_file)
+        self.assertEqual(second.vacancies_by_year, {2022: 1, 2021: 1})
+        self.write(',EUR,Казань,2022-07-21T17:33:46+0300\n', 'a')
+        third = statistics.DataSet(self.file_name, 'Аналитик')
+        third.get_data_incremental(self.checkpoint_file)
+        full = statistics.DataSet(self.file_name, 'Аналитик')
+        full.get_data(full.read_rows())
+        self.assertEqual(third.vacancies_by_year, full.vacancies_by_year)
+        self.assertEqual(third.salary_by_year, full.salary_by_year)
+
+    def test_no_data(self):
+        for text in ('', self.header):
+            self.write(text, 'w')
+            with self.assertRaises(SystemExit), contextlib.redirect_stdout(io.StringIO()):
+                statistics.DataSet(self.file_name, 'Аналитик').get_data_incremental(self.checkpoint_file)
+            self.assertFalse(os.path.exists(self.checkpoint_file))
+
+    def test_rewrite(self):
+        self.write(self.header + self.rows[0], 'w')
+        statistics.DataSet(self.file_name, 'Аналитик').get_data_incremental(self.checkpoint_file)
+        self.write(self.header + self.rows[2], 'w')
+        dataset = statistics.DataSet(self.file_name, 'Аналитик')
+        dataset.get_data_incremental(self.checkpoint_file)
+        self.assertEqual(dataset.vacancies_by_city, {'Казань': 1.0})
+
+
+class BenchmarkTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_generate(self):
+        for schema in benchmark.schemas:
+            file_name = benchmark.get_dataset(self.directory, schema, 50)
+            with open(file_name, 'rb') as file:
+                content = file.read()
+            os.remove(file_name)
+            with open(benchmark.get_dataset(self.directory, schema, 50), 'rb') as file:
+                self.assertEqual(file.read(), content)
+            self.assertEqual(len(DataSet(file_name).read_csv()), 50)
 
 
 class DataSetTests(unittest.TestCase):
@@ -0,0 +1,159 @@
+import math
+
+
+class QuantileSketch:
+    """Класс для приближенного вычисления квантилей зарплат в ограниченной памяти.
+    Значения раскладываются по логарифмическим корзинам (как в DDSketch): значение v попадает в корзину
+    ceil(log(v) / log(gamma)), где gamma = (1 + alpha) / (1 - alpha). Оценка квантиля отличается от точного значения
+    не больше чем на alpha * значение (при alpha = 0.01 - на 1%). Скетчи объединяются сложением корзин, поэтому
+    результат не зависит от того, как вакансии были разделены между процессами. Память ограничена max_buckets
+    корзинами: при переполнении сливаются самые младшие корзины, что влияет только на самые низкие квантили.
+
+    Attributes:
+        alpha (float): Относительная погрешность
+        max_buckets (int): Максимальное количество корзин
+        gamma_log (float): Логарифм основания корзин
+        buckets (dict[int, int]): Количество значений в корзинах
+        zero_count (int): Количество нулевых значений
+        count (int): Количество значений
+    """
+    def __init__(self, alpha=0.01, max_buckets=2048):
+        """Инициализирует пустой скетч.
+
+        Args:
+            alpha (float): Относительная погрешность
+            max_buckets (int): Максимальное количество корзин
+        """
+        self.alpha = alpha
+        self.max_buckets = max_buckets
+        self.gamma_log = math.log((1 + alpha) / (1 - alpha))
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def get_key(self, value):
+        """Возвращает номер корзины для положительного значения.
+
+        Args:
+            value (float): Значение
+
+        Returns:
+            int: Номер корзины
+        """
+        return math.ceil(math.log(value) / self.gamma_log)
+
+    def add(self, value):
+        """Добавляет значение в скетч.
+
+        Args:
+            value (float): Значение
+
+        >>> sketch = QuantileSketch()
+        >>> for salary in range(1, 1001):
+        ...     sketch.add(salary)
+        >>> [round(value) for value in sketch.get_quantiles()]
+        [252, 498, 907]
+        """
+        if value <= 0:
+            self.add_bucket(None)
+        else:
+            self.add_bucket(self.get_key(value))
+
+    def add_bucket(self, key, count=1):
+        """Добавляет значения сразу в корзину.
+
+        Args:
+            key (int or None): Номер корзины (None - нулевые значения)
+            count (int): Количество значений
+        """
+        self.count += count
+        if key is None:
+            self.zero_count += count
+            return
+        self.buckets[key] = self.buckets.get(key, 0) + count
+        if len(self.buckets) > self.max_buckets:
+            self.collapse()
+
+    def collapse(self):
+        """Сливает самые младшие корзины, чтобы их осталось не больше max_buckets.
+
+        """
+        keys = sorted(self.buckets)
+        extra = len(keys) - self.max_buckets
+        target = keys[extra]
+        for key in keys[:extra]:
+            self.buckets[target] += self.buckets.pop(key)
+
+    def merge(self, other):
+        """Добавляет в скетч значения другого скетча с той же погрешностью.
+
+        Args:
+            other (QuantileSketch): Скетч
+
+        Returns:
+            QuantileSketch: Текущий скетч
+        """
+        if other.alpha != self.alpha:
+            raise ValueError('Нельзя объединить скетчи с разной погрешностью')
+        self.count += other.count
+        self.zero_count += other.zero_count
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        if len(self.buckets) > self.max_buckets:
+            self.collapse()
+        return self
+
+    def quantile(self, q):
+        """Оценивает квантиль: значение с номером q * (count - 1) в отсортированном списке.
+
+        Args:
+            q (float): Уровень квантиля от 0 до 1
+
+        Returns:
+            float: Оценка квантиля (0, если скетч пуст)
+        """
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                return 2 * math.exp(key * self.gamma_log) / (1 + math.exp(self.gamma_log))
+        return 0.0
+
+    def get_quantiles(self, levels=(0.25, 0.5, 0.9)):
+        """Оценивает несколько квантилей.
+
+        Args:
+            levels (Iterable[float]): Уровни квантилей
+
+        Returns:
+            tuple[float]: Оценки квантилей
+        """
+        return tuple(self.quantile(q) for q in levels)
+
+    def to_dict(self):
+        """Сохраняет скетч в словарь, который можно записать в json.
+
+        Returns:
+            dict: Состояние скетча
+        """
+        return {'alpha': self.alpha, 'max_buckets': self.max_buckets, 'count': self.count,
+                'zero_count': self.zero_count, 'buckets': {str(key): count for key, count in self.buckets.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Восстанавливает скетч из словаря, полученного через to_dict.
+
+        Args:
+            data (dict): Состояние скетча
+
+        Returns:
+            QuantileSketch: Скетч
+        """
+        sketch = cls(data['alpha'], data['max_buckets'])
+        sketch.count = data['count']
+        sketch.zero_count = data['zero_count']
+        sketch.buckets = {int(key): count for key, count in data['buckets'].items()}
+        return sketch
@@ -0,0 +1,307 @@
+import argparse
+import heapq
+import json
+import multiprocessing
+from collections import Counter, defaultdict
+from itertools import combinations
+
+from divider import get_chunks, read_chunk
+from matcher import ProfessionMatcher
+
+
+class SkillCounter:
+    """Класс для частичных счетчиков навыков: по годам, по городам, по годам для профессий и попарной
+    встречаемости навыков по годам (разреженная матрица: хранятся только пары, которые встретились).
+    Счетчики разных частей файла объединяются сложением (merge). Пока таблицы пар не переполнялись (error = 0),
+    результат не зависит от того, как вакансии были разделены между процессами.
+
+    Вакансии учитываются по исходным полям строки csv-файла (без создания Vacancy и перевода зарплат),
+    профессии ищутся в исходном названии вакансии, как в statistics.py.
+
+    Чтобы память не росла с размером файла, таблица пар одного года ограничена capacity записями: при
+    переполнении остаются capacity // 2 самых частых пар, а наибольшее отброшенное значение прибавляется
+    к error. Посчитанное количество любой пары меньше точного не больше чем на error. После отбрасывания таблицы
+    пар приближенные: какие пары остались и их количества зависят от разделения файла и порядка объединения
+    (при одном и том же разделении и порядке результат одинаковый).
+
+    Attributes:
+        professions (list[str]): Названия профессий
+        capacity (int or None): Максимальное количество пар в таблице одного года (None - без ограничения)
+        error (int): Максимальная недостача количества пары из-за отбрасывания
+        vacancies_by_year (Counter): Количество вакансий по годам
+        vacancies_by_area (Counter): Количество вакансий по городам
+        skills_by_year (dict[int, Counter]): Количество навыков по годам
+        skills_by_area (dict[str, Counter]): Количество навыков по городам
+        skills_by_profession (dict[str, dict[int, Counter]]): Количество навыков по годам для профессий
+        pairs_by_year (dict[int, Counter]): Количество пар навыков (по алфавиту) по годам
+    """
+    def __init__(self, professions=(), capacity=None):
+        """Инициализирует пустые счетчики.
+
+        Args:
+            professions (Iterable[str]): Названия профессий (ищутся в названии вакансии, как в статистике)
+            capacity (int or None): Максимальное количество пар в таблице одного года
+        """
+        self.professions = list(professions)
+        self.capacity = capacity
+        self.error = 0
+        self.vacancies_by_year = Counter()
+        self.vacancies_by_area = Counter()
+        self.skills_by_year = defaultdict(Counter)
+        self.skills_by_area = defaultdict(Counter)
+        self.skills_by_profession = {profession: defaultdict(Counter) for profession in self.professions}
+        self.pairs_by_year = defaultdict(Counter)
+        self._matcher = ProfessionMatcher(self.professions)
+
+    @staticmethod
+    def get_skills(vac):
+        """Возвращает различные навыки вакансии по алфавиту.
+
+        Args:
+            vac (dict): Вакансия в виде словаря
+
+        Returns:
+            list[str]: Навыки
+
+        >>> SkillCounter.get_skills({'key_skills': 'SQL\\r\\nPython\\nSQL'})
+        ['Python', 'SQL']
+        """
+        return sorted({skill.strip() for skill in vac['key_skills'].split('\n')} - {''})
+
+    def add(self, vac):
+        """Добавляет навыки вакансии в счетчики.
+
+        Args:
+            vac (dict): Вакансия в виде словаря (нужны key_skills, name, area_name и published_at)
+        """
+        year = int(vac['published_at'][:4])
+        area_name = vac['area_name']
+        skills = self.get_skills(vac)
+        self.vacancies_by_year[year] += 1
+        self.vacancies_by_area[area_name] += 1
+        self.skills_by_year[year].update(skills)
+        self.skills_by_area[area_name].update(skills)
+        for profession in self._matcher.find(vac['name']):
+            self.skills_by_profession[profession][year].update(skills)
+        pairs = self.pairs_by_year[year]
+        pairs.update(combinations(skills, 2))
+        if self.capacity is not None and len(pairs) > self.capacity:
+            self.prune(pairs)
+
+    def prune(self, pairs):
+        """Оставляет в таблице пар capacity // 2 самых частых пар.
+
+        Args:
+            pairs (Counter): Таблица пар одного года
+        """
+        ranked = self.most_common(pairs)
+        kept = ranked[:self.capacity // 2]
+        self.error += ranked[len(kept)][1]
+        pairs.clear()
+        pairs.update(dict(kept))
+
+    def merge(self, other):
+        """Добавляет в счетчики значения счетчиков другой части файла (с теми же профессиями).
+
+        Args:
+            other (SkillCounter): Счетчики
+
+        Returns:
+            SkillCounter: Текущие счетчики
+        """
+        self.vacancies_by_year.update(other.vacancies_by_year)
+        self.vacancies_by_area.update(other.vacancies_by_area)
+        for target, source in ((self.skills_by_year, other.skills_by_year),
+                               (self.skills_by_area, other.skills_by_area),
+                               (self.pairs_by_year, other.pairs_by_year)):
+            for key, counter in source.items():
+                target[key].update(counter)
+        for profession, skills_by_year in other.skills_by_profession.items():
+            for year, counter in skills_by_year.items():
+                self.skills_by_profession[profession][year].update(counter)
+        self.error += other.error
+        if self.capacity is not None:
+            for pairs in self.pairs_by_year.values():
+                if len(pairs) > self.capacity:
+                    self.prune(pairs)
+        return self
+
+    @staticmethod
+    def most_common(counter, k=None):
+        """Возвращает самые частые значения счетчика. Значения с одинаковым количеством упорядочиваются
+        по возрастанию, поэтому результат не зависит от порядка, в котором объединялись счетчики.
+
+        Args:
+            counter (Counter): Счетчик
+            k (int or None): Количество значений (None - все значения)
+
+        Returns:
+            list[tuple[Any, int]]: Значения и их количества
+
+        >>> SkillCounter.most_common(Counter({'SQL': 3, 'Git': 1, 'Python': 3}), 2)
+        [('Python', 3), ('SQL', 3)]
+        """
+        if k is None:
+            return sorted(counter.items(), key=lambda item: (-item[1], item[0]))
+        return heapq.nsmallest(k, counter.items(), key=lambda item: (-item[1], item[0]))
+
+    @classmethod
+    def get_top(cls, counters, k):
+        """Оставляет в каждом счетчике k самых частых значений.
+
+        Args:
+            counters (dict[Any, Counter]): Счетчики по ключам
+            k (int): Количество значений
+
+        Returns:
+            dict[Any, dict]: Самые частые значения по ключам (ключи по возрастанию)
+
+        >>> SkillCounter.get_top({2022: Counter({'SQL': 3, 'Git': 1, 'Python': 3})}, 2)
+        {2022: {'Python': 3, 'SQL': 3}}
+        """
+        return {key: dict(cls.most_common(counters[key], k)) for key in sorted(counters)}
+
+    def get_neighbours(self, skill, k=10):
+        """Возвращает навыки, которые чаще всего встречаются вместе с заданным, за все годы.
+
+        Args:
+            skill (str): Навык
+            k (int): Количество навыков
+
+        Returns:
+            dict[str, int]: Навыки и количество вакансий, где они встречаются вместе с заданным
+        """
+        neighbours = Counter()
+        for pairs in self.pairs_by_year.values():
+            for (first, second), count in pairs.items():
+                if first == skill:
+                    neighbours[second] += count
+                elif second == skill:
+                    neighbours[first] += count
+        return dict(self.most_common(neighbours, k))
+
+    def get_report(self, k=10):
+        """Формирует итоговую статистику: k самых частых навыков и пар навыков (навыки по городам - для k городов
+        с наибольшим количеством вакансий).
+
+        Args:
+            k (int): Количество значений в каждой верхушке
+
+        Returns:
+            dict: Статистика, которую можно записать в json
+        """
+        return {
+            'vacancies_by_year': dict(sorted(self.vacancies_by_year.items())),
+            'skills_by_year': self.get_top(self.skills_by_year, k),
+            'skills_by_area': {area: dict(self.most_common(self.skills_by_area[area], k))
+                               for area, count in self.most_common(self.vacancies_by_area, k)},
+            'skills_by_profession': {profession: self.get_top(skills_by_year, k)
+                                     for profession, skills_by_year in self.skills_by_profession.items()},
+            'pairs_by_year': {year: {' + '.join(pair): count for pair, count in top.items()}
+                              for year, top in self.get_top(self.pairs_by_year, k).items()},
+            'error': self.error,
+        }
+
+
+def read_vacancies(file_name, start, end, head):
+    """Читает вакансии из диапазона байт csv-файла. Строки отбрасываются по тем же правилам, что и в
+    vacancies.DataSet.csv_filter (неполные строки и строки с пустыми полями).
+
+    Args:
+        file_name (str): Название файла
+        start (int): Начало диапазона
+        end (int): Конец диапазона
+        head (list[str]): Заголовок csv-файла
+
+    Yields:
+        dict: Вакансия в виде словаря
+    """
+    for row in read_chunk(file_name, start, end):
+        if len(row) == len(head) and '' not in row:
+            yield dict(zip(head, row))
+
+
+def count_chunk(file_name, start, end, head, professions, capacity):
+    """Считает навыки в диапазоне байт csv-файла.
+
+    Args:
+        file_name (str): Название файла
+        start (int): Начало диапазона
+        end (int): Конец диапазона
+        head (list[str]): Заголовок csv-файла
+        professions (list[str]): Названия профессий
+        capacity (int or None): Максимальное количество пар в таблице одного года
+
+    Returns:
+        SkillCounter: Частичные счетчики
+    """
+    counter = SkillCounter(professions, capacity)
+    for vac in read_vacancies(file_name, start, end, head):
+        counter.add(vac)
+    return counter
+
+
+def count_range(args):
+    """Вызывает count_chunk с аргументами из кортежа (для imap).
+
+    Args:
+        args (tuple): Аргументы count_chunk
+
+    Returns:
+        SkillCounter: Частичные счетчики
+    """
+    return count_chunk(*args)
+
+
+def get_skill_stats(file_name, professions=(), processes_count=None, capacity=200000):
+    """Делит csv-файл на диапазоны байт и считает навыки по ним в отдельных процессах. Частичные счетчики
+    объединяются в порядке диапазонов в файле, поэтому при отбрасывании пар (см. SkillCounter) результат
+    зависит только от количества процессов, а не от того, какой процесс закончил раньше.
+
+    Args:
+        file_name (str): Название файла
+        professions (Iterable[str]): Названия профессий
+        processes_count (int or None): Количество процессов (по умолчанию - количество ядер)
+        capacity (int or None): Максимальное количество пар в таблице одного года
+
+    Returns:
+        SkillCounter: Счетчики по всему файлу
+    """
+    professions = list(professions)
+    processes_count = processes_count or multiprocessing.cpu_count()
+    head, chunks = get_chunks(file_name, processes_count * 4)
+    result = SkillCounter(professions, capacity)
+    with multiprocessing.Pool(processes_count) as pool:
+        for counter in pool.imap(count_range, [(file_name, start, end, head, professions, capacity)
+                                               for start, end in chunks]):
+            result.merge(counter)
+    return result
+
+
+def main():
+    """Считает статистику навыков и печатает ее или записывает в json.
+
+    """
+    parser = argparse.ArgumentParser(description='Статистика навыков по годам, городам и профессиям')
+    parser.add_argument('file', help='csv-файл с вакансиями')
+    parser.add_argument('--professions', nargs='*', default=[], help='названия профессий')
+    parser.add_argument('--top', type=int, default=10, help='количество навыков в каждой верхушке')
+    parser.add_argument('--processes', type=int, help='количество процессов (по умолчанию - количество ядер)')
+    parser.add_argument('--capacity', type=int, default=200000, help='максимальное количество пар навыков за год')
+    parser.add_argument('--output', help='json-файл для результата (по умолчанию - вывод на экран)')
+    args = parser.parse_args()
+    report = get_skill_stats(args.file, args.professions, args.processes, args.capacity).get_report(args.top)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        return
+    print(f"Количество вакансий по годам: {report['vacancies_by_year']}")
+    print(f"Самые частые навыки по годам: {report['skills_by_year']}")
+    print(f"Самые частые навыки по городам: {report['skills_by_area']}")
+    for profession, skills_by_year in report['skills_by_profession'].items():
+        print(f"Самые частые навыки по годам для профессии {profession}: {skills_by_year}")
+    print(f"Самые частые пары навыков по годам: {report['pairs_by_year']}")
+
+
+if __name__ == '__main__':
+    main()
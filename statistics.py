@@ -1,4 +1,6 @@
 import csv
+import hashlib
+import json
 import os
 import openpyxl
 from openpyxl.styles import Font, Border, Side
@@ -6,6 +8,14 @@ from openpyxl.styles.numbers import BUILTIN_FORMATS
 import matplotlib.pyplot as plt
 import numpy as np
 
+from column_cache import ColumnCache
+from columnar import VacancyColumns
+from database import VacancyDatabase, is_database
+from divider import read_record
+from matcher import ProfessionMatcher
+from rates import RateTable
+from sketch import QuantileSketch
+
 
 class Vacancy:
     """Класс для представления вакансии.
@@ -18,29 +28,13 @@ class Vacancy:
         area_name (str): Город
         published_at (str): Дата и время публикации
         year (int): Год публикации вакансии
-        salary (float): Средняя зарплата в рублях
-        currency_to_rub (dict[str, float]): Словарь с валютами для превода зарплаты в рубли
+        salary (float): Средняя зарплата в рублях (по курсу за месяц публикации)
     """
-    currency_to_rub = {
-        "AZN": 35.68,
-        "BYR": 23.91,
-        "EUR": 59.90,
-        "GEL": 21.74,
-        "KGS": 0.76,
-        "KZT": 0.13,
-        "RUR": 1,
-        "UAH": 1.64,
-        "USD": 60.66,
-        "UZS": 0.0055,
-    }
-
-    def __init__(self, vac, name):
-        """Инициализирует объект Vacancy, вычисляет среднюю зарплату и распределяет данные вакансии по словарям
-        датасета, для дальнейшего сбора статистики.
+    def __init__(self, vac):
+        """Инициализирует объект Vacancy и вычисляет среднюю зарплату в рублях по курсу из общей таблицы курсов.
 
         Args:
             vac (dict[str, str]): Вакансия в виде словаря
-            name (str): Название профессии, которую нужно учитывать в статистике
         """
         self.name = vac['name']
         self.salary_from = vac['salary_from']
@@ -49,38 +43,289 @@ class Vacancy:
         self.area_name = vac['area_name']
         self.published_at = vac['published_at']
         self.year = int(vac['published_at'].split('-')[0])
-        self.salary = (float(self.salary_from) + float(self.salary_to)) / 2 * self.currency_to_rub[self.salary_currency]
+        self.salary = (float(self.salary_from) + float(self.salary_to)) / 2 * \
+            RateTable.get_default().get_rate(self.salary_currency, self.published_at)
 
-        if self.year in DataSet.salary_by_year:
-            DataSet.salary_by_year[self.year] += self.salary
-        else:
-            DataSet.salary_by_year[self.year] = self.salary
 
-        if self.year in DataSet.vacancies_by_year:
-            DataSet.vacancies_by_year[self.year] += 1
-        else:
-            DataSet.vacancies_by_year[self.year] = 1
+class Accumulator:
+    """Класс для накопления статистики по вакансиям. Хранит суммы зарплат и количества вакансий
+    по годам и городам. Каждый датасет владеет своим экземпляром, поэтому несколько отчетов
+    могут считаться одновременно в одном процессе, а частичные результаты - объединяться через merge.
 
-        if name in self.name:
-            if self.year in DataSet.p_name_salary_by_year:
-                DataSet.p_name_salary_by_year[self.year] += self.salary
-            else:
-                DataSet.p_name_salary_by_year[self.year] = self.salary
+    Attributes:
+        p_name (str): Название профессии, которую нужно учитывать в статистике
+        salary_by_year (dict[int, float]): Сумма зарплат по годам
+        vacancies_by_year (dict[int, int]): Количество вакансий по годам
+        p_name_salary_by_year (dict[int, float]): Сумма зарплат по годам для выбранной профессии
+        p_name_vacancies_by_year (dict[int, int]): Количество вакансий по годам для выбранной профессии
+        salary_by_city (dict[str, float]): Сумма зарплат по городам
+        vacancies_by_city (dict[str, int]): Количество вакансий по городам
+        salary_sketch_by_year (dict[int, QuantileSketch]): Распределение зарплат по годам
+        p_name_salary_sketch_by_year (dict[int, QuantileSketch]): Распределение зарплат по годам для выбранной профессии
+        salary_sketch_by_city (dict[str, QuantileSketch]): Распределение зарплат по городам
+    """
+    year_fields = ('salary_by_year', 'vacancies_by_year', 'p_name_salary_by_year', 'p_name_vacancies_by_year')
+    city_fields = ('salary_by_city', 'vacancies_by_city')
+    sketch_fields = ('salary_sketch_by_year', 'p_name_salary_sketch_by_year', 'salary_sketch_by_city')
 
-            if self.year in DataSet.p_name_vacancies_by_year:
-                DataSet.p_name_vacancies_by_year[self.year] += 1
-            else:
-                DataSet.p_name_vacancies_by_year[self.year] = 1
+    def __init__(self, p_name):
+        """Инициализирует пустой аккумулятор.
 
-        if self.area_name in DataSet.salary_by_city:
-            DataSet.salary_by_city[self.area_name] += self.salary
-        else:
-            DataSet.salary_by_city[self.area_name] = self.salary
+        Args:
+            p_name (str): Название профессии, которую нужно учитывать в статистике
+        """
+        self.p_name = p_name
+        self.salary_by_year = {}
+        self.vacancies_by_year = {}
+        self.p_name_salary_by_year = {}
+        self.p_name_vacancies_by_year = {}
+        self.salary_by_city = {}
+        self.vacancies_by_city = {}
+        self.salary_sketch_by_year = {}
+        self.p_name_salary_sketch_by_year = {}
+        self.salary_sketch_by_city = {}
+
+    def add(self, vacancy):
+        """Учитывает вакансию в статистике по годам и городам.
 
-        if self.area_name in DataSet.vacancies_by_city:
-            DataSet.vacancies_by_city[self.area_name] += 1
-        else:
-            DataSet.vacancies_by_city[self.area_name] = 1
+        Args:
+            vacancy (Vacancy): Вакансия
+        """
+        year, salary, city = vacancy.year, vacancy.salary, vacancy.area_name
+        self.salary_by_year[year] = self.salary_by_year.get(year, 0) + salary
+        self.vacancies_by_year[year] = self.vacancies_by_year.get(year, 0) + 1
+        self.get_sketch(self.salary_sketch_by_year, year).add(salary)
+        if self.p_name in vacancy.name:
+            self.p_name_salary_by_year[year] = self.p_name_salary_by_year.get(year, 0) + salary
+            self.p_name_vacancies_by_year[year] = self.p_name_vacancies_by_year.get(year, 0) + 1
+            self.get_sketch(self.p_name_salary_sketch_by_year, year).add(salary)
+        self.salary_by_city[city] = self.salary_by_city.get(city, 0) + salary
+        self.vacancies_by_city[city] = self.vacancies_by_city.get(city, 0) + 1
+        self.get_sketch(self.salary_sketch_by_city, city).add(salary)
+
+    @staticmethod
+    def get_sketch(sketches, key):
+        """Возвращает скетч распределения зарплат для ключа, создавая пустой при первом обращении.
+
+        Args:
+            sketches (dict): Скетчи по ключам
+            key (int or str): Год или город
+
+        Returns:
+            QuantileSketch: Скетч
+        """
+        sketch = sketches.get(key)
+        if sketch is None:
+            sketch = sketches[key] = QuantileSketch()
+        return sketch
+
+    @classmethod
+    def merge_sketches(cls, target, source):
+        """Добавляет скетчи из одного словаря в другой по совпадающим ключам.
+
+        Args:
+            target (dict): Скетчи, в которые добавляются значения
+            source (dict): Добавляемые скетчи
+        """
+        for key, sketch in source.items():
+            cls.get_sketch(target, key).merge(sketch)
+
+    def merge(self, other):
+        """Добавляет к аккумулятору частичную статистику другого аккумулятора той же профессии.
+
+        Args:
+            other (Accumulator): Аккумулятор с частичной статистикой
+
+        Returns:
+            Accumulator: Текущий аккумулятор
+        """
+        if other.p_name != self.p_name:
+            raise ValueError(f'Нельзя объединить статистику профессий {self.p_name!r} и {other.p_name!r}')
+        for name in self.year_fields + self.city_fields:
+            target = getattr(self, name)
+            for key, value in getattr(other, name).items():
+                target[key] = target.get(key, 0) + value
+        for name in self.sketch_fields:
+            self.merge_sketches(getattr(self, name), getattr(other, name))
+        return self
+
+    def to_dict(self):
+        """Сохраняет накопленные суммы и количества в словарь, который можно записать в json.
+
+        Returns:
+            dict: Состояние аккумулятора (годы записываются строками)
+        """
+        data = {'p_name': self.p_name}
+        for name in self.year_fields:
+            data[name] = {str(year): value for year, value in getattr(self, name).items()}
+        for name in self.city_fields:
+            data[name] = dict(getattr(self, name))
+        for name in self.sketch_fields:
+            data[name] = {str(key): sketch.to_dict() for key, sketch in getattr(self, name).items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Восстанавливает аккумулятор из словаря, полученного через to_dict.
+
+        Args:
+            data (dict): Состояние аккумулятора
+
+        Returns:
+            Accumulator: Аккумулятор
+        """
+        accumulator = cls(data['p_name'])
+        accumulator.load_dict(data)
+        return accumulator
+
+    def load_dict(self, data):
+        """Заполняет аккумулятор суммами и количествами из словаря, полученного через to_dict.
+
+        Args:
+            data (dict): Состояние аккумулятора
+        """
+        for name in self.year_fields:
+            setattr(self, name, {int(year): value for year, value in data[name].items()})
+        for name in self.city_fields:
+            setattr(self, name, dict(data[name]))
+        for name in self.sketch_fields:
+            key_type = str if name == 'salary_sketch_by_city' else int
+            setattr(self, name, {key_type(key): QuantileSketch.from_dict(sketch)
+                                 for key, sketch in data.get(name, {}).items()})
+
+
+class BatchAccumulator(Accumulator):
+    """Класс для накопления статистики сразу по нескольким профессиям за один проход по файлу.
+    Профессии ищутся в названии вакансии одним проходом ProfessionMatcher, поэтому стоимость строки
+    не растет линейно с количеством профессий.
+
+    Attributes:
+        p_names (list[str]): Названия профессий
+        matcher (ProfessionMatcher): Поиск названий профессий в названии вакансии
+        p_names_salary_by_year (dict[str, dict[int, float]]): Сумма зарплат по годам для каждой профессии
+        p_names_vacancies_by_year (dict[str, dict[int, int]]): Количество вакансий по годам для каждой профессии
+        p_names_salary_sketch_by_year (dict[str, dict[int, QuantileSketch]]): Распределение зарплат по годам
+            для каждой профессии
+    """
+    def __init__(self, p_names):
+        """Инициализирует пустой аккумулятор.
+
+        Args:
+            p_names (Iterable[str]): Названия профессий
+        """
+        super().__init__(None)
+        self.p_names = list(dict.fromkeys(p_names))
+        self.matcher = ProfessionMatcher(self.p_names)
+        self.p_names_salary_by_year = {p_name: {} for p_name in self.p_names}
+        self.p_names_vacancies_by_year = {p_name: {} for p_name in self.p_names}
+        self.p_names_salary_sketch_by_year = {p_name: {} for p_name in self.p_names}
+
+    def add(self, vacancy):
+        """Учитывает вакансию в общей статистике и в статистике всех профессий из ее названия.
+
+        Args:
+            vacancy (Vacancy): Вакансия
+        """
+        year, salary, city = vacancy.year, vacancy.salary, vacancy.area_name
+        self.salary_by_year[year] = self.salary_by_year.get(year, 0) + salary
+        self.vacancies_by_year[year] = self.vacancies_by_year.get(year, 0) + 1
+        self.get_sketch(self.salary_sketch_by_year, year).add(salary)
+        for p_name in self.matcher.find(vacancy.name):
+            salaries, vacancies = self.p_names_salary_by_year[p_name], self.p_names_vacancies_by_year[p_name]
+            salaries[year] = salaries.get(year, 0) + salary
+            vacancies[year] = vacancies.get(year, 0) + 1
+            self.get_sketch(self.p_names_salary_sketch_by_year[p_name], year).add(salary)
+        self.salary_by_city[city] = self.salary_by_city.get(city, 0) + salary
+        self.vacancies_by_city[city] = self.vacancies_by_city.get(city, 0) + 1
+        self.get_sketch(self.salary_sketch_by_city, city).add(salary)
+
+    def merge(self, other):
+        """Добавляет к аккумулятору частичную статистику другого аккумулятора с теми же профессиями.
+
+        Args:
+            other (BatchAccumulator): Аккумулятор с частичной статистикой
+
+        Returns:
+            BatchAccumulator: Текущий аккумулятор
+        """
+        if other.p_names != self.p_names:
+            raise ValueError('Нельзя объединить статистику разных наборов профессий')
+        super().merge(other)
+        for p_name in self.p_names:
+            for target, source in ((self.p_names_salary_by_year[p_name], other.p_names_salary_by_year[p_name]),
+                                   (self.p_names_vacancies_by_year[p_name], other.p_names_vacancies_by_year[p_name])):
+                for year, value in source.items():
+                    target[year] = target.get(year, 0) + value
+            self.merge_sketches(self.p_names_salary_sketch_by_year[p_name], other.p_names_salary_sketch_by_year[p_name])
+        return self
+
+    def to_dict(self):
+        """Сохраняет накопленные суммы и количества всех профессий в словарь, который можно записать в json.
+
+        Returns:
+            dict: Состояние аккумулятора (годы записываются строками)
+        """
+        data = super().to_dict()
+        data['p_names'] = self.p_names
+        data['p_names_salary_by_year'] = {p_name: {str(year): value for year, value in salaries.items()}
+                                          for p_name, salaries in self.p_names_salary_by_year.items()}
+        data['p_names_vacancies_by_year'] = {p_name: {str(year): value for year, value in vacancies.items()}
+                                             for p_name, vacancies in self.p_names_vacancies_by_year.items()}
+        data['p_names_salary_sketch_by_year'] = {
+            p_name: {str(year): sketch.to_dict() for year, sketch in sketches.items()}
+            for p_name, sketches in self.p_names_salary_sketch_by_year.items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Восстанавливает аккумулятор из словаря, полученного через to_dict.
+
+        Args:
+            data (dict): Состояние аккумулятора
+
+        Returns:
+            BatchAccumulator: Аккумулятор
+        """
+        accumulator = cls(data['p_names'])
+        accumulator.load_dict(data)
+        return accumulator
+
+    def load_dict(self, data):
+        """Заполняет аккумулятор суммами и количествами всех профессий из словаря, полученного через to_dict.
+
+        Args:
+            data (dict): Состояние аккумулятора
+        """
+        super().load_dict(data)
+        for name in ('p_names_salary_by_year', 'p_names_vacancies_by_year'):
+            setattr(self, name, {p_name: {int(year): value for year, value in values.items()}
+                                 for p_name, values in data[name].items()})
+        self.p_names_salary_sketch_by_year = {p_name: {} for p_name in self.p_names}
+        for p_name, sketches in data.get('p_names_salary_sketch_by_year', {}).items():
+            self.p_names_salary_sketch_by_year[p_name] = {int(year): QuantileSketch.from_dict(sketch)
+                                                          for year, sketch in sketches.items()}
+
+    def get_accumulator(self, p_name):
+        """Возвращает представление накопленной статистики для одной профессии. Словари не копируются,
+        поэтому представление нельзя изменять.
+
+        Args:
+            p_name (str): Название профессии
+
+        Returns:
+            Accumulator: Статистика в формате обычного аккумулятора
+        """
+        accumulator = Accumulator(p_name)
+        accumulator.salary_by_year = self.salary_by_year
+        accumulator.vacancies_by_year = self.vacancies_by_year
+        accumulator.p_name_salary_by_year = self.p_names_salary_by_year[p_name]
+        accumulator.p_name_vacancies_by_year = self.p_names_vacancies_by_year[p_name]
+        accumulator.salary_by_city = self.salary_by_city
+        accumulator.vacancies_by_city = self.vacancies_by_city
+        accumulator.salary_sketch_by_year = self.salary_sketch_by_year
+        accumulator.p_name_salary_sketch_by_year = self.p_names_salary_sketch_by_year[p_name]
+        accumulator.salary_sketch_by_city = self.salary_sketch_by_city
+        return accumulator
 
 
 class DataSet:
@@ -89,20 +334,17 @@ class DataSet:
     Attributes:
         file_name (str): Название файла
         p_name (str): : Название профессии, которую нужно учитывать в статистике
+        accumulator (Accumulator): Накопленные суммы и количества, из которых вычисляется статистика
         salary_by_year (dict[int, float]): Динамика уровня зарплат по годам
         vacancies_by_year (dict[int, int]): Динамика количества вакансий по годам
         p_name_salary_by_year (dict[int, float]): Динамика уровня зарплат по годам для выбранной профессии
         p_name_vacancies_by_year (dict[int, int]): Динамика количества вакансий по годам для выбранной профессии
         salary_by_city (dict[str, float]): Уровень зарплат по городам (в порядке убывания) - только первые 10 значений
         vacancies_by_city (dict[str, float]): Доля вакансий по городам (в порядке убывания) - только первые 10 значений
+        salary_quantiles_by_year (dict[int, tuple[int]]): Квантили зарплат p25, p50, p90 по годам
+        p_name_salary_quantiles_by_year (dict[int, tuple[int]]): Квантили зарплат по годам для выбранной профессии
+        salary_quantiles_by_city (dict[str, tuple[int]]): Квантили зарплат по городам из salary_by_city
     """
-    salary_by_year = {}
-    vacancies_by_year = {}
-    p_name_salary_by_year = {}
-    p_name_vacancies_by_year = {}
-    salary_by_city = {}
-    vacancies_by_city = {}
-
     def __init__(self, file_name, p_name):
         """Инициализирует датасет.
 
@@ -112,6 +354,16 @@ class DataSet:
         """
         self.file_name = file_name
         self.p_name = p_name
+        self.accumulator = Accumulator(p_name)
+        self.salary_by_year = {}
+        self.vacancies_by_year = {}
+        self.p_name_salary_by_year = {}
+        self.p_name_vacancies_by_year = {}
+        self.salary_by_city = {}
+        self.vacancies_by_city = {}
+        self.salary_quantiles_by_year = {}
+        self.p_name_salary_quantiles_by_year = {}
+        self.salary_quantiles_by_city = {}
 
     def print_data(self):
         """Печатает всю статистику в консоль.
@@ -123,35 +375,182 @@ class DataSet:
         print(f'Динамика количества вакансий по годам для выбранной профессии: {self.p_name_vacancies_by_year}')
         print(f'Уровень зарплат по городам (в порядке убывания): {self.salary_by_city}')
         print(f'Доля вакансий по городам (в порядке убывания): {self.vacancies_by_city}')
+        print(f'Квантили уровня зарплат по годам (p25, p50, p90): {self.salary_quantiles_by_year}')
+        print(f'Квантили уровня зарплат по годам для выбранной профессии (p25, p50, p90): '
+              f'{self.p_name_salary_quantiles_by_year}')
+        print(f'Квантили уровня зарплат по городам (p25, p50, p90): {self.salary_quantiles_by_city}')
 
     def get_data(self, data_vacancies):
-        """Вычисляет всю статистику. Преобразует словари в объекты Vacancy, далее вычисляет динамику по годам и городам, а затем
-        форматирует данные.
+        """Вычисляет всю статистику. Преобразует словари в объекты Vacancy, накапливает динамику по годам и городам
+        в аккумуляторе датасета, а затем форматирует данные.
 
         Args:
-            data_vacancies (list[dict]): Список вакансий, в виде словарей
+            data_vacancies (Iterable[dict]): Вакансии в виде словарей (список или генератор из read_rows)
         """
         for vac in data_vacancies:
-            Vacancy(vac, self.p_name)
+            self.accumulator.add(Vacancy(vac))
+        self.calculate(self.accumulator)
+
+    def get_data_columnar(self, data_vacancies):
+        """Вычисляет всю статистику колоночным движком: вакансии раскладываются в массивы NumPy,
+        валюты переводятся векторно по таблице курсов, а группировка выполняется через np.bincount. Результат совпадает с get_data.
 
-        for year in self.vacancies_by_year:
-            self.salary_by_year[year] = int(self.salary_by_year[year] / self.vacancies_by_year[year])
+        Args:
+            data_vacancies (Iterable[dict] or VacancyColumns): Вакансии в виде словарей или уже в колоночном виде
+        """
+        columns = data_vacancies if isinstance(data_vacancies, VacancyColumns) else \
+            VacancyColumns.from_rows(data_vacancies)
+        columns.accumulate(self.accumulator, RateTable.get_default())
+        self.calculate(self.accumulator)
 
-        length = len(self.p_name_salary_by_year)
-        for year in self.p_name_salary_by_year:
-            if length > 0:
-                self.p_name_salary_by_year[year] = int(
-                    self.p_name_salary_by_year[year] / self.p_name_vacancies_by_year[year])
-            else:
-                self.p_name_salary_by_year[year] = 0
-                self.p_name_vacancies_by_year[year] = 0
+    def get_data_sql(self):
+        """Вычисляет всю статистику запросами GROUP BY к базе SQLite (таблица vacancies из 3.5.X/2/vac_sql.py,
+        зарплаты в ней уже переведены в рубли). База не читается в память: суммы, количества и корзины скетчей
+        по годам, городам и профессии считаются по индексам (см. VacancyDatabase), а в Python остаются доли
+        и топ-10 городов.
 
-        self.salary_by_city = {city: self.salary_by_city[city] / self.vacancies_by_city[city] for city in
-                               self.salary_by_city}
+        """
+        database = VacancyDatabase(self.file_name)
+        try:
+            database.accumulate(self.accumulator)
+        finally:
+            database.close()
+        if len(self.accumulator.vacancies_by_city) == 0:
+            print('Нет данных')
+            exit()
+        self.calculate(self.accumulator)
+
+    def get_data_incremental(self, checkpoint_file=None):
+        """Вычисляет статистику для файла, в который только дописываются строки. В контрольной точке хранятся
+        накопленные суммы и количества и смещение, до которого файл уже обработан, поэтому при следующем запуске
+        читается только дописанный хвост, а средние, доли и топ-10 городов пересчитываются по объединенным суммам.
+        Смещение сдвигается только до конца последней полной записи (с переводом строки и закрытыми кавычками):
+        недописанная последняя запись будет прочитана целиком при следующем запуске. Если начало файла изменилось
+        (см. get_prefix_hash), статистика считается заново.
+
+        Args:
+            checkpoint_file (str or None): Файл контрольной точки (по умолчанию file_name.checkpoint.json)
+        """
+        if os.stat(self.file_name).st_size == 0:
+            print('Пустой файл')
+            exit()
+        checkpoint_file = checkpoint_file or self.file_name + '.checkpoint.json'
+        checkpoint = self.load_checkpoint(checkpoint_file)
+        head, offset, lines = [], 0, 0
+        if checkpoint is not None:
+            self.accumulator = type(self.accumulator).from_dict(checkpoint['accumulator'])
+            head, offset, lines = checkpoint['header'], checkpoint['offset'], checkpoint['lines']
+
+        with open(self.file_name, 'rb') as raw:
+            raw.seek(offset)
+            records = self.read_records(raw)
+            if offset == 0:
+                record, offset = next(records, ('', 0))
+                head = next(csv.reader([record.lstrip('\ufeff')]), [])
+
+            def tail():
+                nonlocal offset, lines
+                for record, offset in records:
+                    lines += 1
+                    yield record
+
+            for vac in self.filter_rows(csv.reader(tail()), head):
+                self.accumulator.add(Vacancy(vac))
+        if lines == 0:
+            print('Нет данных')
+            exit()
 
-        vac_amount = sum(self.vacancies_by_city.values())
-        self.vacancies_by_city = {city: round(self.vacancies_by_city[city] / vac_amount, 4) for city in
-                                  self.vacancies_by_city}
+        checkpoint = {'file': os.path.abspath(self.file_name), 'header': head, 'offset': offset, 'lines': lines,
+                      'prefix_hash': self.get_prefix_hash(offset), 'accumulator': self.accumulator.to_dict()}
+        with open(checkpoint_file + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(checkpoint, file, ensure_ascii=False)
+        os.replace(checkpoint_file + '.tmp', checkpoint_file)
+        self.calculate(self.accumulator)
+
+    @staticmethod
+    def read_records(raw):
+        """Читает полные записи csv-файла с текущей позиции и останавливается перед недописанной записью
+        (без перевода строки в конце или с незакрытыми кавычками).
+
+        Args:
+            raw (BinaryIO): Файл, открытый в бинарном режиме
+
+        Yields:
+            tuple[str, int]: Запись и смещение ее конца в файле
+        """
+        while True:
+            record = read_record(raw)
+            if not record.endswith(b'\n') or record.count(b'"') % 2 == 1:
+                return
+            yield record.decode('utf-8'), raw.tell()
+
+    def load_checkpoint(self, checkpoint_file):
+        """Читает контрольную точку, если она относится к этому файлу и набору профессий, а файл с тех пор
+        только дописывался.
+
+        Args:
+            checkpoint_file (str): Файл контрольной точки
+
+        Returns:
+            dict or None: Контрольная точка или None, если статистику нужно считать с начала файла
+        """
+        try:
+            with open(checkpoint_file, encoding='utf-8') as file:
+                checkpoint = json.load(file)
+        except (OSError, ValueError):
+            return None
+        accumulator = checkpoint.get('accumulator', {})
+        if checkpoint.get('file') != os.path.abspath(self.file_name) or 'lines' not in checkpoint or \
+                accumulator.get('p_name') != self.accumulator.p_name or \
+                accumulator.get('p_names') != getattr(self.accumulator, 'p_names', None):
+            return None
+        if os.path.getsize(self.file_name) < checkpoint['offset'] or \
+                self.get_prefix_hash(checkpoint['offset']) != checkpoint['prefix_hash']:
+            return None
+        return checkpoint
+
+    def get_prefix_hash(self, offset, sample_size=1 << 16):
+        """Хеширует начало файла и последние байты перед смещением, чтобы проверить, что уже обработанная часть
+        файла не изменилась. Хешируются только первые и последние sample_size байт, поэтому хеш замечает
+        перезапись файла, но не изменение в середине уже обработанной части: инкрементальный режим рассчитан
+        на файлы, в которые только дописываются строки.
+
+        Args:
+            offset (int): Смещение
+            sample_size (int): Размер хешируемых участков
+
+        Returns:
+            str: Хеш
+        """
+        digest = hashlib.blake2b(str(offset).encode(), digest_size=16)
+        with open(self.file_name, 'rb') as file:
+            digest.update(file.read(min(sample_size, offset)))
+            file.seek(max(0, offset - sample_size))
+            digest.update(file.read(offset - file.tell()))
+        return digest.hexdigest()
+
+    def calculate(self, accumulator):
+        """Вычисляет и форматирует статистику по накопленным суммам. Аккумулятор при этом не изменяется,
+        поэтому его можно дальше объединять с другими частичными результатами.
+
+        Args:
+            accumulator (Accumulator): Накопленная статистика
+        """
+        self.salary_by_year = {year: int(accumulator.salary_by_year[year] / accumulator.vacancies_by_year[year])
+                               for year in accumulator.vacancies_by_year}
+        self.vacancies_by_year = dict(accumulator.vacancies_by_year)
+
+        self.p_name_salary_by_year = {year: int(accumulator.p_name_salary_by_year[year] /
+                                                accumulator.p_name_vacancies_by_year[year])
+                                      for year in accumulator.p_name_salary_by_year}
+        self.p_name_vacancies_by_year = dict(accumulator.p_name_vacancies_by_year)
+
+        self.salary_by_city = {city: accumulator.salary_by_city[city] / accumulator.vacancies_by_city[city]
+                               for city in accumulator.salary_by_city}
+
+        vac_amount = sum(accumulator.vacancies_by_city.values())
+        self.vacancies_by_city = {city: round(accumulator.vacancies_by_city[city] / vac_amount, 4) for city in
+                                  accumulator.vacancies_by_city}
 
         self.salary_by_city = {city: int(self.salary_by_city[city]) for city in self.salary_by_city if
                                self.vacancies_by_city[city] > 0.01}
@@ -164,6 +563,24 @@ class DataSet:
         self.salary_by_city = dict(list(self.salary_by_city.items())[:10])
         self.vacancies_by_city = dict(list(self.vacancies_by_city.items())[:10])
 
+        self.salary_quantiles_by_year = self.get_quantiles(accumulator.salary_sketch_by_year)
+        self.p_name_salary_quantiles_by_year = self.get_quantiles(accumulator.p_name_salary_sketch_by_year)
+        self.salary_quantiles_by_city = self.get_quantiles(accumulator.salary_sketch_by_city, self.salary_by_city)
+
+    @staticmethod
+    def get_quantiles(sketches, keys=None):
+        """Оценивает квантили зарплат p25, p50 и p90 по скетчам.
+
+        Args:
+            sketches (dict): Скетчи распределения зарплат по ключам
+            keys (Iterable or None): Ключи, для которых нужны квантили (по умолчанию все ключи в порядке sketches)
+
+        Returns:
+            dict: Квантили по ключам, округленные вниз до целого
+        """
+        keys = sketches if keys is None else keys
+        return {key: tuple(int(value) for value in sketches[key].get_quantiles()) for key in keys}
+
     def csv_filter(self, reader, list_naming):
         """Форматирует данные полученные после чтения csv файла и возвращает результат.
 
@@ -174,17 +591,61 @@ class DataSet:
         Returns:
            list[dict]: Список словарей
         """
-        result = []
+        return list(self.filter_rows(reader, list_naming))
+
+    @staticmethod
+    def filter_rows(reader, list_naming):
+        """Построчно валидирует данные csv файла, не накапливая их в памяти.
+
+        Args:
+           reader (Iterable[list[str]]): Строки csv файла
+           list_naming (list[str]): Список с ключами для создания словаря
+
+        Yields:
+           dict[str, str]: Корректная вакансия в виде словаря
+        """
         for row in reader:
-            is_correct = True
-            if len(row) != len(list_naming):
-                is_correct = False
-            for v in row:
-                if v == '':
-                    is_correct = False
-            if is_correct:
-                result.append(dict(zip(list_naming, row)))
-        return result
+            if len(row) == len(list_naming) and '' not in row:
+                yield dict(zip(list_naming, row))
+
+    def read_rows(self):
+        """Потоково читает csv файл: строки по одной проходят валидацию и сразу отдаются на обработку.
+        Память не зависит от количества строк в файле.
+
+        Yields:
+            dict[str, str]: Корректная вакансия в виде словаря
+        """
+        if os.stat(self.file_name).st_size == 0:
+            print('Пустой файл')
+            exit()
+        with open(self.file_name, newline='', encoding='utf-8-sig') as File:
+            reader = csv.reader(File)
+            head = next(reader, [])
+            yield from self.filter_rows(reader, head)
+            if reader.line_num <= 1:
+                print('Нет данных')
+                exit()
+
+    def read_columns(self):
+        """Читает столбцы статистики из колоночного кеша рядом с файлом (см. ColumnCache). Если кеша нет или файл
+        изменился, файл разбирается и кеш строится заново. Если кеш нельзя записать или прочитать (например,
+        папка файла только для чтения или кеш поврежден), файл читается потоково.
+
+        Returns:
+            VacancyColumns: Вакансии в колоночном виде
+        """
+        if os.stat(self.file_name).st_size == 0:
+            print('Пустой файл')
+            exit()
+        try:
+            store = ColumnCache(self.file_name).get()
+            columns = store.get_vacancy_columns() if store.meta['lines'] else None
+        except (OSError, ValueError):
+            return VacancyColumns.from_rows(self.read_rows())
+        if columns is None:
+            print('Нет данных')
+            exit()
+        return columns
 
     def read_csv(self):
         """Читает csv файл и возвращает отформатированные данные.
@@ -211,6 +672,57 @@ class DataSet:
         return self.csv_filter(result, head)
 
 
+class BatchDataSet(DataSet):
+    """Класс для представления датасета, статистика которого вычисляется сразу по нескольким профессиям.
+
+    Attributes:
+        p_names (list[str]): Названия профессий
+        accumulator (BatchAccumulator): Накопленная статистика по всем профессиям
+        datasets (dict[str, DataSet]): Вычисленная статистика для каждой профессии
+    """
+    def __init__(self, file_name, p_names):
+        """Инициализирует датасет.
+
+        Args:
+            file_name (str): Название файла
+            p_names (Iterable[str]): Названия профессий, которые нужно учитывать в статистике
+        """
+        super().__init__(file_name, None)
+        self.p_names = list(dict.fromkeys(p_names))
+        self.accumulator = BatchAccumulator(self.p_names)
+        self.datasets = {}
+
+    def calculate(self, accumulator):
+        """Вычисляет и форматирует общую статистику и статистику каждой профессии.
+
+        Args:
+            accumulator (BatchAccumulator): Накопленная статистика по всем профессиям
+        """
+        super().calculate(accumulator)
+        for p_name in self.p_names:
+            dataset = DataSet(self.file_name, p_name)
+            dataset.calculate(accumulator.get_accumulator(p_name))
+            self.datasets[p_name] = dataset
+
+    def print_data(self):
+        """Печатает общую статистику и статистику каждой профессии в консоль.
+
+        """
+        print(f'Динамика уровня зарплат по годам: {self.salary_by_year}')
+        print(f'Динамика количества вакансий по годам: {self.vacancies_by_year}')
+        for p_name, dataset in self.datasets.items():
+            print(f'Динамика уровня зарплат по годам для профессии "{p_name}": {dataset.p_name_salary_by_year}')
+            print(f'Динамика количества вакансий по годам для профессии "{p_name}": '
+                  f'{dataset.p_name_vacancies_by_year}')
+        print(f'Уровень зарплат по городам (в порядке убывания): {self.salary_by_city}')
+        print(f'Доля вакансий по городам (в порядке убывания): {self.vacancies_by_city}')
+        print(f'Квантили уровня зарплат по годам (p25, p50, p90): {self.salary_quantiles_by_year}')
+        for p_name, dataset in self.datasets.items():
+            print(f'Квантили уровня зарплат по годам для профессии "{p_name}" (p25, p50, p90): '
+                  f'{dataset.p_name_salary_quantiles_by_year}')
+        print(f'Квантили уровня зарплат по городам (p25, p50, p90): {self.salary_quantiles_by_city}')
+
+
 class Report:
     """Класс для представления отчета и запуска программы.
 
@@ -219,15 +731,34 @@ class Report:
         name (str): : Название профессии, которую нужно учитывать в статистике
         data (DataSet): Датасет, в котором вычисляется и хранится статистика
     """
-    def __init__(self):
+    def __init__(self, file=None, name=None, is_columnar=False, use_cache=True, checkpoint_file=None):
         """Инициализирует отчет. Создает датасет, который вычисляет статистику и выводит ее в консоль.
+        Если файл или профессия не переданы, они запрашиваются у пользователя. Если файл - база SQLite,
+        статистика вычисляется запросами к ней (DataSet.get_data_sql).
 
+        Args:
+            file (str or None): Название файла
+            name (str or None): Название профессии, которую нужно учитывать в статистике
+            is_columnar (bool): Вычислять статистику колоночным движком NumPy
+            use_cache (bool): Читать столбцы из колоночного кеша файла (всегда использует колоночный движок).
+                Если кеш нельзя записать или прочитать, файл читается потоково
+            checkpoint_file (str or None): Файл контрольной точки для инкрементального режима
+                (читается только дописанная часть файла)
         """
-        self.file = input('Введите название файла: ')
-        self.name = input('Введите название профессии: ')
+        self.file = input('Введите название файла: ') if file is None else file
+        self.name = input('Введите название профессии: ') if name is None else name
 
         self.data = DataSet(self.file, self.name)
-        self.data.get_data(self.data.read_csv())
+        if is_database(self.file):
+            self.data.get_data_sql()
+        elif checkpoint_file is not None:
+            self.data.get_data_incremental(checkpoint_file)
+        elif use_cache:
+            self.data.get_data_columnar(self.data.read_columns())
+        elif is_columnar:
+            self.data.get_data_columnar(self.data.read_rows())
+        else:
+            self.data.get_data(self.data.read_rows())
         self.data.print_data()
 
     def generate_image(self):
@@ -340,3 +871,44 @@ class Report:
             is_title = False
         for col, value in dims.items():
             ws.column_dimensions[col].width = value + 2
+
+
+class BatchReport:
+    """Класс для представления пакетного отчета сразу по нескольким профессиям.
+
+    Attributes:
+        file (str): Название файла
+        names (list[str]): Названия профессий, которые нужно учитывать в статистике
+        data (BatchDataSet): Датасет, в котором вычисляется и хранится статистика
+    """
+    def __init__(self, file=None, names=None, is_columnar=False, use_cache=True, checkpoint_file=None):
+        """Инициализирует отчет. Вычисляет статистику по всем профессиям за один проход по файлу и выводит ее
+        в консоль. Если файл или профессии не переданы, они запрашиваются у пользователя. Если файл - база SQLite,
+        статистика вычисляется запросами к ней (DataSet.get_data_sql).
+
+        Args:
+            file (str or None): Название файла
+            names (Iterable[str] or None): Названия профессий
+            is_columnar (bool): Вычислять статистику колоночным движком NumPy
+            use_cache (bool): Читать столбцы из колоночного кеша файла (всегда использует колоночный движок).
+                Если кеш нельзя записать или прочитать, файл читается потоково
+            checkpoint_file (str or None): Файл контрольной точки для инкрементального режима
+                (читается только дописанная часть файла)
+        """
+        self.file = input('Введите название файла: ') if file is None else file
+        if names is None:
+            names = input('Введите названия профессий через запятую: ').split(',')
+        self.names = [name.strip() for name in names if name.strip()]
+
+        self.data = BatchDataSet(self.file, self.names)
+        if is_database(self.file):
+            self.data.get_data_sql()
+        elif checkpoint_file is not None:
+            self.data.get_data_incremental(checkpoint_file)
+        elif use_cache:
+            self.data.get_data_columnar(self.data.read_columns())
+        elif is_columnar:
+            self.data.get_data_columnar(self.data.read_rows())
+        else:
+            self.data.get_data(self.data.read_rows())
+        self.data.print_data()
@@ -1,9 +1,24 @@
 import csv
 import os
 from datetime import datetime
-import prettytable
+from operator import attrgetter
+import argparse
 import re
 import doctest
+import heapq
+import multiprocessing
+from itertools import islice
+import numpy as np
+
+from column_cache import ColumnCache, get_epoch
+from indexes import VacancyIndex
+from output import TableWriter, writers
+from rates import RateTable
+
+tag_pattern = re.compile(r'<.*?>')
+space_pattern = re.compile(r'\s+')
+
+PARALLEL_CLEAN_ROWS = 50000
 
 
 def remove_html(string):
@@ -20,8 +35,8 @@ def remove_html(string):
     >>> remove_html("<p>")
     ''
     """
-    result = re.sub(r'<.*?>', '', string)
-    result = re.sub(r'\s+', ' ', result)
+    result = tag_pattern.sub('', string)
+    result = space_pattern.sub(' ', result)
     return result.strip()
 
 
@@ -42,6 +57,135 @@ def shortener(string):
     return string if len(string) <= 100 else string[:100] + '...'
 
 
+def clean_description(string, length=100):
+    """Очищает строку от html тегов и обрезает до length символов, как shortener(remove_html(string)), но очищает
+    только начало строки. Строка режется сразу после символа '>': тег, начатый до разреза, не может закончиться
+    после него (тег заканчивается первым '>'), поэтому очищенное начало совпадает с началом очищенной строки.
+    Если очищенное начало длиннее length, остальная строка не нужна, иначе начало берется вдвое длиннее.
+
+    Args:
+        string (str): Исходная строка
+        length (int): Максимальная длина результата без многоточия
+
+    Returns:
+        str: Строка без html тегов (до length символов)
+
+    >>> clean_description("<p> </p> <p><strong>Вам предстоит:</strong></p> <ul> <li>Работать в составе команды")
+    'Вам предстоит: Работать в составе команды'
+    >>> clean_description('<p>' + 'Разработка сервисов. ' * 10 + '</p>' * 100) == shortener(remove_html('<p>' + 'Разработка сервисов. ' * 10 + '</p>' * 100))
+    True
+    """
+    limit = 4 * length
+    while True:
+        end = string.find('>', limit)
+        if end == -1:
+            result = remove_html(string)
+            return result if len(result) <= length else result[:length] + '...'
+        result = remove_html(string[:end + 1])
+        if len(result) > length:
+            return result[:length] + '...'
+        limit = 2 * end + 1
+
+
+def clean_descriptions(descriptions):
+    """Очищает пакет описаний (см. clean_description). Функция выполняется в процессах пула clean_texts.
+
+    Args:
+        descriptions (list[str]): Исходные описания
+
+    Returns:
+        list[str]: Описания без html тегов (до 100 символов)
+    """
+    return [clean_description(description) for description in descriptions]
+
+
+def clean_texts(texts, count, processes_count=None, batch_size=10000):
+    """Очищает описания пакетами по batch_size. Если описаний не меньше PARALLEL_CLEAN_ROWS,
+    пакеты очищаются в пуле процессов. Порядок описаний сохраняется.
+
+    Args:
+        texts (Iterable[str]): Исходные описания
+        count (int): Количество описаний
+        processes_count (int or None): Количество процессов (по умолчанию - количество ядер)
+        batch_size (int): Количество описаний в пакете
+
+    Yields:
+        str: Описание без html тегов (до 100 символов)
+    """
+    texts = iter(texts)
+    batches = iter(lambda: list(islice(texts, batch_size)), [])
+    processes_count = processes_count or multiprocessing.cpu_count()
+    if processes_count < 2 or count < PARALLEL_CLEAN_ROWS:
+        for batch in batches:
+            yield from clean_descriptions(batch)
+        return
+    with multiprocessing.Pool(processes_count) as pool:
+        for batch in pool.imap(clean_descriptions, batches):
+            yield from batch
+
+
+def format_date(published_at):
+    """Форматирует дату публикации для вывода в таблицу.
+
+    Args:
+        published_at (str): Дата и время публикации
+
+    Returns:
+        str: Дата в формате ДД.ММ.ГГГГ
+
+    >>> format_date('2022-06-21T17:33:46+0300')
+    '21.06.2022'
+    """
+    return '{0[2]}.{0[1]}.{0[0]}'.format(published_at[:10].split('-'))
+
+
+class CachedSlot:
+    """Аналог functools.cached_property для классов со __slots__: значение вычисляется при первом обращении
+    и сохраняется в слот '_cached_<имя свойства>', который должен быть объявлен в __slots__ класса.
+
+    Attributes:
+        function ((object) -> Any): Функция, вычисляющая значение
+        slot (member_descriptor): Слот для хранения значения
+    """
+    def __init__(self, function):
+        """Инициализирует объект CachedSlot.
+
+        Args:
+            function ((object) -> Any): Функция, вычисляющая значение
+        """
+        self.function = function
+        self.__doc__ = function.__doc__
+        self.slot = None
+
+    def __set_name__(self, owner, name):
+        """Находит слот для значения после создания класса.
+
+        Args:
+            owner (type): Класс
+            name (str): Название свойства
+        """
+        self.slot = getattr(owner, f'_cached_{name}')
+
+    def __get__(self, instance, owner=None):
+        """Возвращает сохраненное значение или вычисляет и сохраняет его.
+
+        Args:
+            instance (object or None): Объект
+            owner (type): Класс
+
+        Returns:
+            Any: Значение свойства
+        """
+        if instance is None:
+            return self
+        try:
+            return self.slot.__get__(instance, owner)
+        except AttributeError:
+            value = self.function(instance)
+            self.slot.__set__(instance, value)
+            return value
+
+
 class Salary:
     """Класс для представления зарплаты.
 
@@ -51,10 +195,12 @@ class Salary:
         salary_gross (str): Вычет налогов
         salary_currency (str): Валюта
         salary (str): Оклад
+        published_at (str or None): Дата публикации (по ней выбирается курс валюты)
         currencies (dict[str, str]): Словарь с валютами
-        currency_to_rub (dict[str, float]): Словарь с валютами для превода зарплаты в рубли
         salary_gross_dict (dict[str, str]): Словарь типов вычета налогов для перевода с английского на русский
     """
+    __slots__ = ('salary_from', 'salary_to', 'salary_gross', 'salary_currency', 'salary', 'published_at')
+
     currencies = {
         'AZN': 'Манаты',
         'BYR': 'Белорусские рубли',
@@ -68,19 +214,6 @@ class Salary:
         'UZS': 'Узбекский сум'
     }
 
-    currency_to_rub = {
-        "AZN": 35.68,
-        "BYR": 23.91,
-        "EUR": 59.90,
-        "GEL": 21.74,
-        "KGS": 0.76,
-        "KZT": 0.13,
-        "RUR": 1,
-        "UAH": 1.64,
-        "USD": 60.66,
-        "UZS": 0.0055,
-    }
-
     salary_gross_dict = {
         'True': 'Без вычета налогов',
         'False': 'С вычетом налогов',
@@ -109,10 +242,12 @@ class Salary:
         self.salary_to = int(float(vac['salary_to']))
         self.salary_gross = vac['salary_gross']
         self.salary_currency = vac['salary_currency']
+        self.published_at = vac.get('published_at')
         self.salary = self.get_salary()
 
     def get_average(self):
-        """Вычисляет среднюю зарплату и переводит ее в рубли, с помощью словаря currency_to_rub.
+        """Вычисляет среднюю зарплату и переводит ее в рубли по курсу за месяц публикации (без даты - по
+        постоянному курсу).
 
         Returns:
             float: Средняя зарплата в рублях
@@ -124,8 +259,32 @@ class Salary:
         Traceback (most recent call last):
             ...
         KeyError: 'рубли'
+        >>> Salary({'salary_from': 100, 'salary_to': 200, 'salary_gross': 'True', 'salary_currency': "USD", 'published_at': '2022-06-21T17:33:46+0300'}).get_average()
+        8563.89
+        """
+        return self.get_rub_average(self.salary_from, self.salary_to, self.salary_currency, self.published_at)
+
+    @staticmethod
+    def get_rub_average(salary_from, salary_to, salary_currency, published_at=None):
+        """Вычисляет среднюю зарплату в рублях по границам вилки и валюте. Курс берется из общей таблицы
+        курсов (RateTable) за месяц публикации.
+
+        Args:
+            salary_from (int): Нижняя граница вилки оклада
+            salary_to (int): Верхняя граница вилки оклада
+            salary_currency (str): Валюта
+            published_at (str or None): Дата публикации (None - постоянный курс)
+
+        Returns:
+            float: Средняя зарплата в рублях
+
+        >>> Salary.get_rub_average(100, 200, 'EUR')
+        8985.0
+        >>> Salary.get_rub_average(100, 200, 'EUR', '2010-01-15T10:00:00+0300')
+        6416.46
         """
-        return (float(self.salary_from) + float(self.salary_to)) / 2 * self.currency_to_rub[self.salary_currency]
+        return (float(salary_from) + float(salary_to)) / 2 * RateTable.get_default().get_rate(salary_currency,
+                                                                                               published_at)
 
     def get_salary(self):
         """Возвращает отформатированную строку оклада, используя зарплатную вилку, валюту и gross.
@@ -148,7 +307,12 @@ class Salary:
 
 
 class Vacancy:
-    """Класс для представления вакансии.
+    """Класс для представления вакансии. Хранит исходные поля в слотах (__slots__), а очищенные и
+    отформатированные значения (название, описание, навыки, оклад, дату) вычисляет при первом обращении:
+    их получают только вакансии, которые участвуют в фильтрации, сортировке или попадают в таблицу.
+    Числовые ключи сортировки (время публикации, средняя зарплата в рублях, опыт работы, количество навыков)
+    вычисляются один раз при создании вакансии. Если в словаре вакансии есть уже очищенное описание
+    (description_clean из колоночного кеша), оно используется без повторной очистки.
 
     Attributes:
         name (str): Название вакансии
@@ -162,9 +326,20 @@ class Vacancy:
         area_name (str): Город
         date (str): Отформатированная дата публикации
         published_at (str): Дата и время публикации
+        published_epoch (int): Время публикации в секундах с начала эпохи
+        salary_average (float): Средняя зарплата в рублях
+        experience_rank (int): Опыт работы в виде числа (0 - нет опыта, 3 - более 6 лет)
+        skills_count (int): Количество навыков
         bools (dict[str, str]): Словарь булевых перменных для перевода с английского на русский
         job_exp (dict[str, str]): Словарь типов опыта работы для перевода с английского на русский
+        experience_ranks (dict[str, int]): Словарь типов опыта работы для перевода в число
     """
+    __slots__ = ('_name', '_description', '_key_skills', '_experience_id', '_premium', 'employer_name',
+                 '_salary_from', '_salary_to', '_salary_gross', '_salary_currency', 'area_name', 'published_at',
+                 'published_epoch', 'salary_average', 'experience_rank', 'skills_count',
+                 '_cached_name', '_cached_description', '_cached_skills', '_cached_key_skills',
+                 '_cached_experience_id', '_cached_premium', '_cached_salary', '_cached_date')
+
     bools = {
         'True': 'Да',
         'False': 'Нет',
@@ -177,9 +352,15 @@ class Vacancy:
         'between3And6': 'От 3 до 6 лет',
         'moreThan6': 'Более 6 лет'
     }
+    experience_ranks = {
+        'noExperience': 0,
+        'between1And3': 1,
+        'between3And6': 2,
+        'moreThan6': 3
+    }
 
     def __init__(self, vac):
-        """Инициализирует объект Vacancy и валидирует данные.
+        """Инициализирует объект Vacancy, сохраняя исходные поля вакансии и вычисляя ключи сортировки.
 
         Args:
             vac (dict): Вакансия в виде словаря
@@ -196,22 +377,74 @@ class Vacancy:
         'Salary'
         >>> Vacancy({'name': 'Программист', 'description': '<p> </p> <p><strong>Вам предстоит:</strong></p> <ul> <li>:', 'key_skills': "Программирование", 'experience_id': 'noExperience', 'premium': 'True', 'employer_name': "URFU", 'salary_from': 100, 'salary_to': '200', 'salary_gross': 'True', 'salary_currency': "RUR", 'area_name': 'Ekat', 'published_at': "2022-06-21T17:33:46+0300"}).date
         '21.06.2022'
+        >>> Vacancy({'name': 'Программист', 'description': '<p> </p> <p><strong>Вам предстоит:</strong></p> <ul> <li>:', 'key_skills': "Программирование", 'experience_id': 'noExperience', 'premium': 'True', 'employer_name': "URFU", 'salary_from': 100, 'salary_to': '200', 'salary_gross': 'True', 'salary_currency': "RUR", 'area_name': 'Ekat', 'published_at': "2022-06-21T17:33:46+0300"}).salary_average
+        150.0
         >>> Vacancy({'salary_from': '1', 'salary_to': '10', 'salary_gross': True, 'salary_currency': "RUR"})
         Traceback (most recent call last):
             ...
         KeyError: 'name'
         """
-        self.name = remove_html(vac['name'])
-        self.description = shortener(remove_html(vac['description']))
-        self.skills = vac['key_skills'].split('\n')
-        self.key_skills = shortener(vac['key_skills'].replace('\r', ''))
-        self.experience_id = self.job_exp[vac['experience_id']]
-        self.premium = self.bools[vac['premium']]
+        self._name = vac['name']
+        self._description = vac['description']
+        if 'description_clean' in vac:
+            self._cached_description = vac['description_clean']
+        self._key_skills = vac['key_skills']
+        self._experience_id = vac['experience_id']
+        self._premium = vac['premium']
         self.employer_name = vac['employer_name']
-        self.salary = Salary(vac)
+        self._salary_from = vac['salary_from']
+        self._salary_to = vac['salary_to']
+        self._salary_gross = vac['salary_gross']
+        self._salary_currency = vac['salary_currency']
         self.area_name = vac['area_name']
-        self.date = '{0[2]}.{0[1]}.{0[0]}'.format(vac['published_at'][:10].split('-'))
         self.published_at = vac['published_at']
+        self.published_epoch = get_epoch(self.published_at)
+        self.salary_average = Salary.get_rub_average(int(float(self._salary_from)), int(float(self._salary_to)),
+                                                     self._salary_currency, self.published_at)
+        self.experience_rank = self.experience_ranks[self._experience_id]
+        self.skills_count = self._key_skills.count('\n') + 1
+
+    @CachedSlot
+    def name(self):
+        """str: Название вакансии без html тегов"""
+        return remove_html(self._name)
+
+    @CachedSlot
+    def description(self):
+        """str: Описание вакансии без html тегов (до 100 символов)"""
+        return clean_description(self._description)
+
+    @CachedSlot
+    def skills(self):
+        """list[str]: Список всех навыков"""
+        return self._key_skills.split('\n')
+
+    @CachedSlot
+    def key_skills(self):
+        """str: Навыки (до 100 символов)"""
+        return shortener(self._key_skills.replace('\r', ''))
+
+    @CachedSlot
+    def experience_id(self):
+        """str: Опыт работы"""
+        return self.job_exp[self._experience_id]
+
+    @CachedSlot
+    def premium(self):
+        """str: Премиум-вакансия"""
+        return self.bools[self._premium]
+
+    @CachedSlot
+    def salary(self):
+        """Salary: Зарплата"""
+        return Salary({'salary_from': self._salary_from, 'salary_to': self._salary_to,
+                       'salary_gross': self._salary_gross, 'salary_currency': self._salary_currency,
+                       'published_at': self.published_at})
+
+    @CachedSlot
+    def date(self):
+        """str: Отформатированная дата публикации"""
+        return format_date(self.published_at)
 
 
 class DataSet:
@@ -245,12 +478,13 @@ class DataSet:
         for vac in data_vacancies:
             self.vacancies_objects.append(Vacancy(vac))
 
-    def csv_filter(self, reader, list_naming):
+    def csv_filter(self, reader, list_naming, predicate=None):
         """Форматирует данные полученные после чтения csv файла и возвращает результат.
 
         Args:
             reader (list): Данные полученные после чтения csv файла
             list_naming (list[str]): Список с ключами для создания словаря
+            predicate ((dict) -> bool or None): Фильтр по исходным полям вакансии (None - без фильтрации)
 
         Returns:
             list[dict]: Список словарей
@@ -264,11 +498,17 @@ class DataSet:
                 if row[i] == '':
                     is_correct = False
             if is_correct:
-                result.append(dict(zip(list_naming, row)))
+                vac = dict(zip(list_naming, row))
+                if predicate is None or predicate(vac):
+                    result.append(vac)
         return result
 
-    def read_csv(self):
-        """Читает csv файл и возвращает отформатированные данные.
+    def read_csv(self, predicate=None):
+        """Читает csv файл и возвращает отформатированные данные. Если передан фильтр, он применяется
+        к исходным полям до создания объектов Vacancy.
+
+        Args:
+            predicate ((dict) -> bool or None): Фильтр по исходным полям вакансии (None - без фильтрации)
 
         Returns:
             list[dict]: Список словарей
@@ -298,7 +538,66 @@ class DataSet:
         if len(result) == 0:
             print('Нет данных')
             exit()
-        return self.csv_filter(result, head)
+        return self.csv_filter(result, head, predicate)
+
+    def get_store(self):
+        """Возвращает колоночный кеш рядом с файлом (см. ColumnCache). Если кеша нет или файл изменился,
+        кеш строится заново.
+
+        Returns:
+            ColumnStore or None: Кеш или None, если кеш нельзя записать или в файле есть некорректные числа
+        """
+        if os.stat(self.file_name).st_size == 0:
+            print('Пустой файл')
+            exit()
+        try:
+            store = ColumnCache(self.file_name).get()
+        except (OSError, ValueError):
+            return None
+        if store.meta['lines'] == 0:
+            print('Нет данных')
+            exit()
+        return store
+
+    @staticmethod
+    def add_clean_descriptions(store, processes_count=None):
+        """Очищает все описания пакетами (см. clean_texts) и дописывает их в кеш столбцом description_clean,
+        чтобы следующие загрузки их не очищали. Это отдельный шаг (ключ --clean-descriptions): при обычном чтении
+        описание очищается при первом обращении (см. Vacancy.description), то есть только для выводимых вакансий.
+        Если кеш нельзя записать, описания не сохраняются.
+
+        Args:
+            store (ColumnStore): Колоночный кеш
+            processes_count (int or None): Количество процессов (по умолчанию - количество ядер)
+        """
+        if 'description' not in store.meta['columns'] or 'description_clean' in store.meta['columns']:
+            return
+        try:
+            store.add_text_column('description_clean', clean_texts(store.iter_column('description'), len(store),
+                                                                    processes_count))
+        except OSError:
+            pass
+
+    def read_cache(self, predicate=None):
+        """Читает вакансии из колоночного кеша, не разбирая csv заново. Если кеш нельзя построить,
+        файл читается через read_csv.
+
+        Args:
+            predicate ((dict) -> bool or None): Фильтр по исходным полям вакансии (None - без фильтрации)
+
+        Returns:
+            Iterable[dict]: Вакансии в виде словарей (границы вилки оклада - числа)
+        """
+        store = self.get_store()
+        if store is None:
+            return self.read_csv(predicate)
+        return store.rows() if predicate is None else filter(predicate, store.rows())
+
+
+class InputError(Exception):
+    """Исключение для некорректных параметров запроса. Текст исключения - сообщение для пользователя.
+
+    """
 
 
 class InputConnect:
@@ -306,18 +605,23 @@ class InputConnect:
 
     Attributes:
         file (str): Название файла
-        _filter (bool or list[str]): Параметр фильтрации (True, если параметр не введен)
+        _filter (bool or CompoundFilter): Параметр фильтрации (True, если параметр не введен)
         _sort (bool or str): Параметр сортировки (True, если параметр не введен)
         is_reverse (bool): Обратный порядок сортировки
         segment (list[int]): Диапазон вывода
         fields (list[str] or str): Требуемые столбцы
+        use_cache (bool): Читать вакансии из колоночного кеша файла (False - всегда разбирать csv-файл)
         header (list[str]): Список заголовков
         keys_dict (list[str]): Список ключей в словаре
         experience_weight (dict[str, int]): Вес в зависимости от опыта работы
         rus_dict (dict[str, str]): Словарь для перевода ключей с английского на русский
         eng_dict (dict[str, str]): Словарь для перевода ключей с русского на английский
         filters_dict (dict[str, () -> bool]): Словарь фильтров
+        raw_filters_dict (dict[str, () -> bool]): Те же фильтры по исходным полям вакансии (до создания Vacancy)
+        index_queries (dict[str, () -> np.ndarray]): Те же фильтры в виде запросов к индексам VacancyIndex
     """
+    use_cache = True
+
     header = ['Навыки', 'Оклад', 'Дата публикации вакансии', 'Опыт работы', 'Премиум-вакансия',
               'Идентификатор валюты оклада', 'Название', 'Название региона', 'Компания']
 
@@ -368,6 +672,31 @@ class InputConnect:
         'Дата публикации вакансии': lambda vac, value: vac.date == value,
     }
 
+    raw_filters_dict = {
+        'Название': lambda vac, value: remove_html(vac['name']) == value,
+        'Навыки': lambda vac, value: all([s in vac['key_skills'].split('\n') for s in value.split(', ')]),
+        'Опыт работы': lambda vac, value: Vacancy.job_exp[vac['experience_id']] == value,
+        'Премиум-вакансия': lambda vac, value: Vacancy.bools[vac['premium']] == value,
+        'Компания': lambda vac, value: vac['employer_name'] == value,
+        'Оклад': lambda vac, value: int(float(vac['salary_from'])) <= float(value) <= int(float(vac['salary_to'])),
+        'Идентификатор валюты оклада': lambda vac, value: Salary.currencies[vac['salary_currency']] == value,
+        'Название региона': lambda vac, value: vac['area_name'] == value,
+        'Дата публикации вакансии': lambda vac, value: format_date(vac['published_at']) == value,
+    }
+
+    index_queries = {
+        'Название': lambda index, value: index.get_hash_index('name', remove_html).get(value),
+        'Навыки': lambda index, value: index.get_inverted_index('key_skills').get_all(value.split(', ')),
+        'Опыт работы': lambda index, value: index.get_hash_index('experience_id', Vacancy.job_exp.get).get(value),
+        'Премиум-вакансия': lambda index, value: index.get_hash_index('premium', Vacancy.bools.get).get(value),
+        'Компания': lambda index, value: index.get_hash_index('employer_name').get(value),
+        'Оклад': lambda index, value: index.get_interval_tree('salary_from', 'salary_to').query(float(value)),
+        'Идентификатор валюты оклада': lambda index, value:
+            index.get_hash_index('salary_currency', Salary.currencies.get).get(value),
+        'Название региона': lambda index, value: index.get_hash_index('area_name').get(value),
+        'Дата публикации вакансии': lambda index, value: index.get_hash_index('published_at', format_date).get(value),
+    }
+
     def __init__(self):
         """Инициализирует объект InputConnect, валидирует введенные данные и запускает программу.
 
@@ -379,20 +708,69 @@ class InputConnect:
         self.segment = input('Введите диапазон вывода: ')
         self.fields = input('Введите требуемые столбцы: ')
 
-        self.validate()
+        try:
+            self.validate()
+        except InputError as error:
+            print(error)
+            exit()
+
+        self.run()
 
+    def run(self, writer=None):
+        """Читает вакансии, прошедшие фильтр, и выводит таблицу. Вакансии создаются по мере чтения:
+        в памяти одновременно находятся только вакансии, которые нужны для сортировки.
+
+        Args:
+            writer (RowWriter or None): Способ вывода строк (None - таблица по страницам)
+        """
         data = DataSet(self.file)
-        data.get_data(data.read_csv())
-        self.print_table(data.vacancies_objects, self.rus_dict)
+        self.print_table(map(Vacancy, self.read_vacancies(data)), self.rus_dict, is_filtered=True, writer=writer)
+
+    @classmethod
+    def from_query(cls, file, _filter='', sort='', is_reverse='', segment='', fields='', use_cache=True):
+        """Создает объект InputConnect по готовым параметрам (в том же виде, что и при вводе с клавиатуры)
+        и валидирует их. Файл не читается и таблица не печатается.
+
+        Args:
+            file (str): Название файла
+            _filter (str): Параметр фильтрации
+            sort (str): Параметр сортировки
+            is_reverse (str): Обратный порядок сортировки (Да / Нет)
+            segment (str): Диапазон вывода
+            fields (str): Требуемые столбцы
+            use_cache (bool): Читать вакансии из колоночного кеша файла
+
+        Returns:
+            InputConnect: Объект с валидированными параметрами
+
+        Raises:
+            InputError: Параметры заданы некорректно
+
+        >>> InputConnect.from_query('vacancies.csv', sort='Оклад', is_reverse='Да', segment='1 10').segment
+        [1, 10]
+        >>> InputConnect.from_query('vacancies.csv', sort='Зарплата')
+        Traceback (most recent call last):
+            ...
+        vacancies.InputError: Параметр сортировки некорректен
+        """
+        connect = cls.__new__(cls)
+        connect.file, connect._filter, connect._sort = file, _filter, sort
+        connect.is_reverse, connect.segment, connect.fields = is_reverse, segment, fields
+        connect.use_cache = use_cache
+        connect.validate()
+        return connect
 
     def validate(self):
         """Запускает функции валидации для каждой перменной.
 
+        Raises:
+            InputError: Параметры заданы некорректно
         """
         self.validate_segment()
         self.validate_filter()
         self.validate_sort()
         self.validate_reverse()
+        self.validate_fields()
 
     def validate_segment(self):
         """Валидирует введенный диапазон, преобразуя его из строки в список list[int].
@@ -404,21 +782,33 @@ class InputConnect:
         self.segment = result
 
     def validate_filter(self):
-        """Валидирует введенный параметр фильрации, преобразуя его из строки в список list[str].
+        """Валидирует введенный параметр фильрации, преобразуя его из строки в составной фильтр CompoundFilter.
+        Условия вида 'Параметр: значение' объединяются через '; ' (И), группы условий - через ' | ' (ИЛИ).
+        '; ' и ' | ' разделяют условия, только если за ними идет 'Параметр: ' с известным параметром, поэтому
+        значение условия может содержать эти последовательности (например, 'Компания: Рога; Копыта').
+        Для оклада и даты публикации можно задать диапазон 'от - до'.
         Если параметр не был введен, то _filter = True.
 
         """
         if len(self._filter) == 0:
             self._filter = True
             return
-        if len(self._filter) > 0 and ': ' not in self._filter:
-            print('Формат ввода некорректен')
-            exit()
-        result = self._filter.split(': ')
-        if result[0] not in self.header:
-            print('Параметр поиска некорректен')
-            exit()
-        self._filter = result
+        keys = '|'.join(re.escape(key) for key in self.header)
+        parts = re.split(f'(; | \\| )(?=(?:{keys}): )', self._filter)
+        groups = [[]]
+        for separator, condition in zip(['; '] + parts[1::2], parts[::2]):
+            if separator == ' | ':
+                groups.append([])
+            if ': ' not in condition:
+                raise InputError('Формат ввода некорректен')
+            key, value = condition.split(': ', 1)
+            if key not in self.header:
+                raise InputError('Параметр поиска некорректен')
+            try:
+                groups[-1].append(Condition(key, value))
+            except ValueError:
+                raise InputError('Формат ввода некорректен')
+        self._filter = CompoundFilter(groups)
 
     def validate_sort(self):
         """Валидирует введенный параметр сортировки. Если параметр не был введен, то _sort = True.
@@ -428,8 +818,7 @@ class InputConnect:
             self._sort = True
             return
         if self._sort not in self.header:
-            print('Параметр сортировки некорректен')
-            exit()
+            raise InputError('Параметр сортировки некорректен')
 
     def validate_reverse(self):
         """Валидирует введенный параметр обратной сортировки. Преобразует строку в булеан, по умолчанию - False.
@@ -445,55 +834,108 @@ class InputConnect:
             self.is_reverse = False
             return
         else:
-            print('Порядок сортировки задан некорректно')
-            exit()
+            raise InputError('Порядок сортировки задан некорректно')
+
+    def validate_fields(self):
+        """Валидирует введенные требуемые столбцы.
+
+        """
+        if any(field not in self.rus_dict.values() for field in self.get_fields(self.rus_dict)):
+            raise InputError('Требуемые столбцы некорректны')
 
-    def print_table(self, data_vacancies, dic_naming):
-        """Метод для печати таблицы. Перед печатью, данные сортируются и фильтруются. Далее выводится таблица
-        с необходимым диапазоном и выбранными столбцами.
+    def print_table(self, data_vacancies, dic_naming, is_filtered=False, writer=None):
+        """Метод для печати таблицы. Перед печатью, данные фильтруются и сортируются (сортируются только
+        прошедшие фильтр вакансии). Далее строки с необходимым диапазоном и выбранными столбцами выводятся
+        по одной, по мере получения (см. RowWriter).
 
         Args:
-            data_vacancies (list[Vacancy]): Cписок всех вакансий
+            data_vacancies (Iterable[Vacancy]): Все вакансии
             dic_naming (dict[str, str]): Словарь с заголовками столбцов
+            is_filtered (bool): Вакансии уже отфильтрованы при чтении файла (см. get_raw_filter)
+            writer (RowWriter or None): Способ вывода строк (None - таблица по страницам)
+        """
+        if writer is None:
+            writer = TableWriter(list(dic_naming.values()), self.get_fields(dic_naming))
+        if not is_filtered:
+            data_vacancies = self.filter_vacs(data_vacancies)
+        data_vacancies = self.get_sorted(data_vacancies)
+        writer.write_rows(self.iter_result(data_vacancies))
+
+    def get_fields(self, dic_naming):
+        """Возвращает заголовки выводимых столбцов: номер и требуемые столбцы или все столбцы.
+
+        Args:
+            dic_naming (dict[str, str]): Словарь с заголовками столбцов
+
+        Returns:
+            list[str]: Заголовки столбцов
         """
-        table = prettytable.PrettyTable()
-        table.hrules = prettytable.ALL
-        table.align = 'l'
-        table.field_names = dic_naming.values()
-        table.max_width = 20
-        self.do_sort(data_vacancies)
-        data_vacancies = self.filter_vacs(data_vacancies)
-        result = self.get_result(data_vacancies)
-        if len(result) == 0:
-            print('Ничего не найдено')
-            return
-        else:
-            table.add_rows(result)
         if len(self.fields) == 0:
-            self.fields = dic_naming.values()
-        else:
-            self.fields = ('№, ' + str(self.fields)).split(', ')
-        print(table.get_string(fields=self.fields))
+            return list(dic_naming.values())
+        return ('№, ' + str(self.fields)).split(', ')
 
     def get_result(self, data_vacancies):
         """Метод для получения всех необходимых рядов таблицы, учитывая диапазон.
 
         Args:
-            data_vacancies (list[Vacancy]): Cписок всех вакансий
+            data_vacancies (Iterable[Vacancy]): Все вакансии
 
         Returns:
             list[list[int | str]]: Список всех необходимых рядов таблицы
         """
-        result = []
+        return list(self.iter_result(data_vacancies))
+
+    def iter_result(self, data_vacancies):
+        """Последовательно формирует необходимые ряды таблицы, учитывая диапазон.
+
+        Args:
+            data_vacancies (Iterable[Vacancy]): Все вакансии
+
+        Yields:
+            list[int | str]: Ряд таблицы
+        """
         length = len(self.segment)
         i = 0
         for vac in data_vacancies:
             i += 1
+            if length > 1 and i >= self.segment[1]:
+                break
             if (length > 1 and self.segment[0] <= i < self.segment[1]) or (
                     length == 1 and self.segment[0] <= i) or length == 0:
-                result.append([i, vac.name, vac.description, vac.key_skills, vac.experience_id, vac.premium,
-                               vac.employer_name, vac.salary.salary, vac.area_name, vac.date])
-        return result
+                yield [i, vac.name, vac.description, vac.key_skills, vac.experience_id, vac.premium,
+                       vac.employer_name, vac.salary.salary, vac.area_name, vac.date]
+
+    def read_vacancies(self, data):
+        """Читает вакансии, прошедшие фильтр. Сначала условия упорядочиваются по статистике столбцов кеша
+        (см. ColumnStatistics). Если для всех условий фильтра есть индексы, строки берутся из кеша по индексам,
+        иначе фильтр применяется к исходным полям в этом порядке при чтении кеша.
+
+        Args:
+            data (DataSet): Датасет
+
+        Returns:
+            Iterable[dict]: Вакансии в виде словарей
+        """
+        store = data.get_store() if self.use_cache else None
+        if store is None:
+            return data.read_csv(self.get_raw_filter())
+        if self._filter == True:
+            return store.rows()
+        self._filter.plan(ColumnStatistics(store))
+        positions = self._filter.get_positions(VacancyIndex(store))
+        if positions is not None:
+            return [store.row(i) for i in positions.tolist()]
+        return filter(self.get_raw_filter(), store.rows())
+
+    def get_raw_filter(self):
+        """Возвращает фильтр по исходным полям вакансии, чтобы отбросить неподходящие строки еще при чтении файла.
+
+        Returns:
+            (dict) -> bool or None: Фильтр или None, если параметр фильтрации не задан
+        """
+        if self._filter == True:
+            return None
+        return self._filter.matches_raw
 
     def filter_vacs(self, data_vacancies):
         """Метод для фильтрации вакансий. Использует словарь - filters_dict.
@@ -507,30 +949,393 @@ class InputConnect:
         """
         if self._filter == True:
             return data_vacancies
-        return list(
-            filter(lambda vac: self.filters_dict[self._filter[0]](vac, self._filter[1]), data_vacancies))
+        return list(filter(self._filter.matches, data_vacancies))
 
-    def do_sort(self, data_vacancies):
-        """Метод для сортировки вакансий. Если параметр сортировки не задан, список остается без изменений.
+    def get_sorted(self, data_vacancies):
+        """Возвращает вакансии в порядке сортировки. Если диапазон вывода ограничен сверху, полная сортировка
+        не нужна: первые segment[1] - 1 вакансий выбираются кучей за O(n log k). heapq.nsmallest и heapq.nlargest
+        устойчивы, поэтому порядок равных вакансий и обратный порядок совпадают с do_sort.
 
         Args:
-            data_vacancies (list[]): Cписок всех вакансий
+            data_vacancies (Iterable[Vacancy]): Все вакансии
+
+        Returns:
+            Iterable[Vacancy]: Отсортированные вакансии (при ограниченном диапазоне - только до его конца,
+                без сортировки - исходные вакансии)
+        """
+        key = self.get_sort_key()
+        if key is None:
+            return data_vacancies
+        if len(self.segment) < 2:
+            if not isinstance(data_vacancies, list):
+                data_vacancies = list(data_vacancies)
+            self.do_sort(data_vacancies)
+            return data_vacancies
+        count = max(self.segment[1] - 1, 0)
+        if self.is_reverse:
+            return heapq.nlargest(count, data_vacancies, key=key)
+        return heapq.nsmallest(count, data_vacancies, key=key)
+
+    def get_sort_key(self):
+        """Возвращает ключ сортировки для выбранного параметра сортировки.
+
+        Returns:
+            (Vacancy) -> Any or None: Ключ сортировки или None, если параметр сортировки не задан
         """
         if self._sort == True:
-            return
+            return None
         if self._sort == 'Дата публикации вакансии':
-            data_vacancies.sort(reverse=self.is_reverse,
-                                key=lambda v: datetime.strptime(v.published_at, '%Y-%m-%dT%H:%M:%S%z'))
-            return
+            return attrgetter('published_epoch')
         if self._sort == 'Навыки':
-            data_vacancies.sort(reverse=self.is_reverse,
-                                key=lambda v: len(v.skills) if type(v.skills) == list else 1)
-            return
+            return attrgetter('skills_count')
         if self._sort == 'Оклад':
-            data_vacancies.sort(reverse=self.is_reverse, key=lambda v: v.salary.get_average())
-            return
+            return attrgetter('salary_average')
         if self._sort == 'Опыт работы':
-            data_vacancies.sort(reverse=self.is_reverse,
-                                key=lambda v: self.experience_weight[v.experience_id])
+            return attrgetter('experience_rank')
+        if self._sort == 'Идентификатор валюты оклада':
+            return lambda v: Salary.currencies[v.salary.salary_currency]
+        return lambda v: getattr(v, self.eng_dict[self._sort])
+
+    def do_sort(self, data_vacancies):
+        """Метод для сортировки вакансий. Если параметр сортировки не задан, список остается без изменений.
+
+        Args:
+            data_vacancies (list[]): Cписок всех вакансий
+        """
+        key = self.get_sort_key()
+        if key is None:
             return
-        data_vacancies.sort(reverse=self.is_reverse, key=lambda v: getattr(v, self.eng_dict[self._sort]))
+        data_vacancies.sort(reverse=self.is_reverse, key=key)
+
+
+class Condition:
+    """Класс для условия составного фильтра: параметр фильтрации и значение. Для оклада и даты публикации
+    значение может быть диапазоном 'от - до' (границы включаются, оклад подходит, если вилка пересекается
+    с диапазоном).
+
+    Attributes:
+        key (str): Параметр фильтрации
+        value (str): Значение
+        bounds (tuple[float, float] or tuple[str, str] or None): Границы диапазона (даты в виде ГГГГ-ММ-ДД)
+            или None, если задано одно значение
+        cost (int): Относительная стоимость проверки условия
+        selectivity (float): Оценка доли вакансий, проходящих условие
+        costs (dict[str, int]): Относительная стоимость проверки по параметрам фильтрации
+        range_filters_dict (dict[str, () -> bool]): Фильтры по диапазону
+        raw_range_filters_dict (dict[str, () -> bool]): Те же фильтры по исходным полям вакансии
+    """
+    costs = {
+        'Опыт работы': 1,
+        'Премиум-вакансия': 1,
+        'Компания': 1,
+        'Идентификатор валюты оклада': 1,
+        'Название региона': 1,
+        'Дата публикации вакансии': 2,
+        'Оклад': 3,
+        'Название': 4,
+        'Навыки': 8,
+    }
+
+    range_filters_dict = {
+        'Оклад': lambda vac, low, high: vac.salary.salary_from <= high and low <= vac.salary.salary_to,
+        'Дата публикации вакансии': lambda vac, low, high: low <= vac.published_at[:10] <= high,
+    }
+
+    raw_range_filters_dict = {
+        'Оклад': lambda vac, low, high: int(float(vac['salary_from'])) <= high and low <= int(float(vac['salary_to'])),
+        'Дата публикации вакансии': lambda vac, low, high: low <= vac['published_at'][:10] <= high,
+    }
+
+    def __init__(self, key, value):
+        """Инициализирует условие.
+
+        Args:
+            key (str): Параметр фильтрации
+            value (str): Значение или диапазон 'от - до'
+
+        Raises:
+            ValueError: Оклад или границы диапазона заданы некорректно
+
+        >>> Condition('Дата публикации вакансии', '01.01.2022 - 31.03.2022').bounds
+        ('2022-01-01', '2022-03-31')
+        >>> Condition('Оклад', '100000').bounds is None
+        True
+        """
+        self.key = key
+        self.value = value
+        self.bounds = None
+        if key in self.range_filters_dict and ' - ' in value:
+            low, high = value.split(' - ', 1)
+            self.bounds = self.parse_bound(low), self.parse_bound(high)
+        elif key == 'Оклад':
+            self.parse_bound(value)
+        self.cost = self.costs[key]
+        self.selectivity = 0.5
+
+    def parse_bound(self, value):
+        """Преобразует границу диапазона к виду, в котором она сравнивается с полем вакансии.
+
+        Args:
+            value (str): Граница (число для оклада, ДД.ММ.ГГГГ для даты)
+
+        Returns:
+            float or str: Граница
+        """
+        if self.key == 'Оклад':
+            return float(value)
+        return datetime.strptime(value, '%d.%m.%Y').strftime('%Y-%m-%d')
+
+    def matches(self, vac):
+        """Проверяет условие для вакансии.
+
+        Args:
+            vac (Vacancy): Вакансия
+
+        Returns:
+            bool: Вакансия проходит условие
+        """
+        if self.bounds is not None:
+            return self.range_filters_dict[self.key](vac, *self.bounds)
+        return InputConnect.filters_dict[self.key](vac, self.value)
+
+    def matches_raw(self, vac):
+        """Проверяет условие по исходным полям вакансии.
+
+        Args:
+            vac (dict): Вакансия в виде словаря
+
+        Returns:
+            bool: Вакансия проходит условие
+        """
+        if self.bounds is not None:
+            return self.raw_range_filters_dict[self.key](vac, *self.bounds)
+        return InputConnect.raw_filters_dict[self.key](vac, self.value)
+
+    def get_positions(self, index):
+        """Находит вакансии, проходящие условие, по индексам.
+
+        Args:
+            index (VacancyIndex): Индексы кеша
+
+        Returns:
+            np.ndarray or None: Номера строк по возрастанию или None, если для условия нет индекса
+        """
+        if self.bounds is not None:
+            return None
+        return InputConnect.index_queries[self.key](index, self.value)
+
+
+class ColumnStatistics:
+    """Класс для дешевой статистики по столбцам кеша, по которой оценивается избирательность условий.
+    Для столбцов, закодированных словарем, доля считается точно: условие проверяется один раз для каждого
+    значения словаря, а количество строк берется из частот кодов. Для остальных условий доля оценивается
+    по равномерной выборке строк.
+
+    Attributes:
+        store (ColumnStore): Кеш
+        sample_size (int): Размер выборки строк
+        category_columns (dict[str, str]): Столбцы, которые проверяют условия по параметрам фильтрации
+    """
+    category_columns = {
+        'Название': 'name',
+        'Опыт работы': 'experience_id',
+        'Премиум-вакансия': 'premium',
+        'Компания': 'employer_name',
+        'Идентификатор валюты оклада': 'salary_currency',
+        'Название региона': 'area_name',
+    }
+
+    def __init__(self, store, sample_size=1000):
+        """Инициализирует объект ColumnStatistics.
+
+        Args:
+            store (ColumnStore): Кеш
+            sample_size (int): Размер выборки строк
+        """
+        self.store = store
+        self.sample_size = sample_size
+        self._counts = {}
+        self._sample = None
+
+    def get_counts(self, column):
+        """Возвращает частоты значений столбца, закодированного словарем.
+
+        Args:
+            column (str): Название столбца
+
+        Returns:
+            list[tuple[str, int]]: Значения словаря и количество строк с ними
+        """
+        if column not in self._counts:
+            codes, vocabulary = self.store.get_category(column)
+            counts = np.bincount(codes, minlength=len(vocabulary)).tolist()
+            self._counts[column] = list(zip(vocabulary, counts))
+        return self._counts[column]
+
+    def get_sample(self):
+        """Возвращает равномерную выборку строк кеша.
+
+        Returns:
+            list[dict]: Вакансии в виде словарей
+        """
+        if self._sample is None:
+            step = max(len(self.store) // self.sample_size, 1)
+            self._sample = [self.store.row(i) for i in range(0, len(self.store), step)]
+        return self._sample
+
+    def get_selectivity(self, condition):
+        """Оценивает долю вакансий, проходящих условие (со сглаживанием, чтобы оценка не была ровно 0 или 1).
+
+        Args:
+            condition (Condition): Условие
+
+        Returns:
+            float: Оценка доли
+        """
+        column = self.category_columns.get(condition.key)
+        if condition.bounds is None and self.store.meta['columns'].get(column) == 'category':
+            passed = sum(count for value, count in self.get_counts(column) if condition.matches_raw({column: value}))
+            total = len(self.store)
+        else:
+            sample = self.get_sample()
+            passed = sum(1 for vac in sample if condition.matches_raw(vac))
+            total = len(sample)
+        return (passed + 1) / (total + 2)
+
+
+class CompoundFilter:
+    """Класс для составного фильтра: условия внутри группы объединяются через И, группы - через ИЛИ.
+    Условия проверяются в порядке, выбранном plan, а all и any прекращают проверку на первом решающем условии,
+    поэтому дорогие проверки (например, навыков) выполняются только для вакансий, прошедших дешевые.
+
+    Attributes:
+        groups (list[list[Condition]]): Группы условий
+    """
+    def __init__(self, groups):
+        """Инициализирует фильтр и упорядочивает условия по стоимости.
+
+        Args:
+            groups (list[list[Condition]]): Группы условий
+        """
+        self.groups = groups
+        self.plan()
+
+    def plan(self, statistics=None):
+        """Упорядочивает условия. Внутри группы первыми идут условия с наименьшим отношением стоимости
+        к доле отсеиваемых вакансий, среди групп - с наименьшим отношением ожидаемой стоимости проверки
+        к доле прошедших вакансий. Порядок не влияет на результат фильтра, только на количество проверок.
+
+        Args:
+            statistics (ColumnStatistics or None): Статистика для оценки избирательности (None - только
+                по стоимости)
+        """
+        for group in self.groups:
+            if statistics is not None:
+                for condition in group:
+                    condition.selectivity = statistics.get_selectivity(condition)
+            group.sort(key=lambda condition: condition.cost / max(1 - condition.selectivity, 1e-9))
+        self.groups.sort(key=lambda group: self.get_cost(group) / max(self.get_selectivity(group), 1e-9))
+
+    @staticmethod
+    def get_cost(group):
+        """Оценивает ожидаемую стоимость проверки группы с учетом прерывания на первом ложном условии.
+
+        Args:
+            group (list[Condition]): Группа условий
+
+        Returns:
+            float: Ожидаемая стоимость
+        """
+        cost, passed = 0, 1
+        for condition in group:
+            cost += passed * condition.cost
+            passed *= condition.selectivity
+        return cost
+
+    @staticmethod
+    def get_selectivity(group):
+        """Оценивает долю вакансий, проходящих все условия группы.
+
+        Args:
+            group (list[Condition]): Группа условий
+
+        Returns:
+            float: Оценка доли
+        """
+        passed = 1
+        for condition in group:
+            passed *= condition.selectivity
+        return passed
+
+    def matches(self, vac):
+        """Проверяет фильтр для вакансии.
+
+        Args:
+            vac (Vacancy): Вакансия
+
+        Returns:
+            bool: Вакансия проходит фильтр
+        """
+        return any(all(condition.matches(vac) for condition in group) for group in self.groups)
+
+    def matches_raw(self, vac):
+        """Проверяет фильтр по исходным полям вакансии.
+
+        Args:
+            vac (dict): Вакансия в виде словаря
+
+        Returns:
+            bool: Вакансия проходит фильтр
+        """
+        return any(all(condition.matches_raw(vac) for condition in group) for group in self.groups)
+
+    def get_positions(self, index):
+        """Находит вакансии, проходящие фильтр, по индексам: номера строк пересекаются внутри группы
+        (начиная с самых коротких списков) и объединяются между группами.
+
+        Args:
+            index (VacancyIndex): Индексы кеша
+
+        Returns:
+            np.ndarray or None: Номера строк по возрастанию или None, если хотя бы для одного условия нет индекса
+        """
+        if any(condition.bounds is not None for group in self.groups for condition in group):
+            return None
+        result = None
+        for group in self.groups:
+            found = None
+            for positions in sorted((condition.get_positions(index) for condition in group), key=len):
+                found = positions if found is None else np.intersect1d(found, positions, assume_unique=True)
+            result = found if result is None else np.union1d(result, found)
+        return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Выгрузка вакансий без ввода с клавиатуры')
+    parser.add_argument('file', help='csv-файл с вакансиями')
+    parser.add_argument('--filter', default='', help='параметр фильтрации')
+    parser.add_argument('--sort', default='', help='параметр сортировки')
+    parser.add_argument('--reverse', default='', help='обратный порядок сортировки (Да / Нет)')
+    parser.add_argument('--segment', default='', help='диапазон вывода')
+    parser.add_argument('--fields', default='', help='требуемые столбцы')
+    parser.add_argument('--format', choices=list(writers), default='table', help='формат вывода')
+    parser.add_argument('--page-size', type=int, default=1000, help='количество строк на странице таблицы')
+    parser.add_argument('--no-cache', action='store_true', help='не читать и не записывать колоночный кеш')
+    parser.add_argument('--clean-descriptions', action='store_true',
+                        help='заранее очистить все описания и сохранить их в кеш')
+    args = parser.parse_args()
+    try:
+        connect = InputConnect.from_query(args.file, args.filter, args.sort, args.reverse, args.segment, args.fields,
+                                          not args.no_cache)
+    except InputError as error:
+        print(error)
+        exit()
+    if args.clean_descriptions:
+        store = DataSet(args.file).get_store()
+        if store is not None:
+            DataSet.add_clean_descriptions(store)
+    header, fields = list(connect.rus_dict.values()), connect.get_fields(connect.rus_dict)
+    if args.format == 'table':
+        connect.run(TableWriter(header, fields, page_size=args.page_size))
+    else:
+        connect.run(writers[args.format](header, fields))